@@ -4,6 +4,22 @@ Configuration tools module
 import configparser
 from enum import Enum
 from os.path import join
+from typing import Union
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def config_bool(value: Union[bool, str, None]) -> bool:
+    """
+    Parse the specified boolean configuration value, which can be a configuration string
+
+    Args:
+        value: configuration value to parse
+
+    Returns: the value if it is a boolean, True if it is one of the true strings, False otherwise
+
+    """
+    return value if isinstance(value, bool) else str(value).lower() in TRUE_VALUES
 
 
 class ConfigProfile(Enum):
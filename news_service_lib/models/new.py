@@ -1,9 +1,9 @@
 """
 New model module
 """
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields, MISSING
 from datetime import datetime
-from typing import Iterator, List
+from typing import Iterator, List, FrozenSet
 
 from .named_entity import NamedEntity
 
@@ -23,6 +23,50 @@ class New:
     noun_chunks: List[str] = field(default_factory=list)
     summary: str = None
     sentiment: float = 0.0
+    _missing_fields: FrozenSet[str] = field(default_factory=frozenset, init=False, repr=False, compare=False)
+
+    @classmethod
+    def partial(cls, **values) -> 'New':
+        """
+        Create a partially loaded new, for example from a storage projection. The not provided fields are set to
+        None and the values which are not new fields (like storage identifiers) are ignored.
+
+        Args:
+            **values: loaded new fields values
+
+        Returns: partially loaded new
+
+        """
+        init_fields = [new_field for new_field in fields(cls) if new_field.init]
+        required_values = {new_field.name: None for new_field in init_fields
+                           if new_field.default is MISSING and new_field.default_factory is MISSING}
+        loaded_values = {new_field.name: values[new_field.name] for new_field in init_fields
+                         if new_field.name in values}
+
+        new = cls(**{**required_values, **loaded_values})
+        new._missing_fields = frozenset(new_field.name for new_field in init_fields
+                                        if new_field.name not in loaded_values)
+        return new
+
+    @property
+    def missing_fields(self) -> FrozenSet[str]:
+        """
+        Get the fields not loaded in the new
+
+        Returns: set of not loaded fields names
+
+        """
+        return self._missing_fields
+
+    @property
+    def is_partial(self) -> bool:
+        """
+        Check if the new is partially loaded
+
+        Returns: True if some fields are not loaded, False otherwise
+
+        """
+        return len(self._missing_fields) > 0
 
     def __iter__(self) -> Iterator[tuple]:
         """
@@ -5,11 +5,28 @@ from logging import Logger
 
 from .implementation.sql_storage import SqlStorage
 from .implementation.mongo_storage import MongoStorage
+from .implementation.async_sql_storage import AsyncSqlStorage
+from .implementation.async_mongo_storage import AsyncMongoStorage
+from .implementation.cached_storage import CachedStorage
+from .implementation.memory_storage import MemoryStorage
+from .implementation.partitioned_storage import PartitionedStorage
 from .storage_type import StorageType
+from .partition_granularity import PartitionGranularity
 from .implementation.storage import Storage
+from .implementation.async_storage import AsyncStorage
 from .storage_watcher import StorageWatcher
+from .async_storage_watcher import AsyncStorageWatcher
+from .resume_token_store import ResumeTokenStore, MemoryResumeTokenStore, MongoResumeTokenStore
 from .sort_direction import SortDirection
 from .exceptions import StorageError, StorageIntegrityError
+from .bulk_save_result import BulkSaveResult, BulkSaveError
+from .ttl_lru_cache import CacheStats
+from .index_spec import IndexSpec
+from .index_advisor import IndexAdvisor
+from .aggregation import Aggregation, AggregationOperation, GroupKey
+from .slow_operation import SlowOperation, SlowOperationHook
+from .buffered_storage_writer import BufferedStorageWriter
+from .watcher_hub import WatcherHub, Subscription, SlowConsumerPolicy
 
 
 def storage_factory(stor_type: str, storage_config: dict, logger: Logger) -> Storage:
@@ -31,6 +48,33 @@ def storage_factory(stor_type: str, storage_config: dict, logger: Logger) -> Sto
             return MongoStorage(**storage_config, logger=logger)
         elif stor == StorageType.SQL:
             return SqlStorage(**storage_config, logger=logger)
+        elif stor == StorageType.MEMORY:
+            return MemoryStorage(**storage_config, logger=logger)
+    else:
+        raise NotImplementedError('Specified storage type not implemented')
+
+
+def async_storage_factory(stor_type: str, storage_config: dict, logger: Logger) -> AsyncStorage:
+    """
+    Get the specified asynchronous storage implementation
+
+    Args:
+        stor_type: type of the storage
+        storage_config: storage configuration parameters
+        logger: logger instance used by the storage interface
+
+    Returns: configured asynchronous storage implementation
+
+    """
+    if stor_type in list(map(lambda stor_typ: stor_typ.value, StorageType)):
+        stor = StorageType[stor_type]
+
+        if stor == StorageType.MONGO:
+            return AsyncMongoStorage(**storage_config, logger=logger)
+        elif stor == StorageType.SQL:
+            return AsyncSqlStorage(**storage_config, logger=logger)
+        elif stor == StorageType.MEMORY:
+            raise NotImplementedError('Memory storage does not have an asynchronous implementation')
     else:
         raise NotImplementedError('Specified storage type not implemented')
 
@@ -38,8 +82,31 @@ def storage_factory(stor_type: str, storage_config: dict, logger: Logger) -> Sto
 __all__ = [
     "StorageType",
     "StorageWatcher",
+    "AsyncStorageWatcher",
+    "ResumeTokenStore",
+    "MemoryResumeTokenStore",
+    "MongoResumeTokenStore",
     "SortDirection",
     "StorageError",
     "StorageIntegrityError",
-    "storage_factory"
+    "BulkSaveResult",
+    "BulkSaveError",
+    "CachedStorage",
+    "MemoryStorage",
+    "PartitionedStorage",
+    "PartitionGranularity",
+    "CacheStats",
+    "IndexSpec",
+    "IndexAdvisor",
+    "Aggregation",
+    "AggregationOperation",
+    "GroupKey",
+    "SlowOperation",
+    "SlowOperationHook",
+    "BufferedStorageWriter",
+    "WatcherHub",
+    "Subscription",
+    "SlowConsumerPolicy",
+    "storage_factory",
+    "async_storage_factory"
 ]
@@ -0,0 +1,71 @@
+"""
+Storage aggregations definitions module
+"""
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Union
+
+from sqlalchemy import func
+
+
+class AggregationOperation(Enum):
+    """
+    Storage aggregation operations:
+    - COUNT = number of items of the group
+    - SUM = sum of the key values of the group
+    - AVG = average of the key values of the group
+    - MIN = minimum key value of the group
+    - MAX = maximum key value of the group
+    """
+    COUNT = ['$sum', func.count]
+    SUM = ['$sum', func.sum]
+    AVG = ['$avg', func.avg]
+    MIN = ['$min', func.min]
+    MAX = ['$max', func.max]
+
+
+@dataclass(frozen=True)
+class Aggregation:
+    """
+    Aggregation of the values of a key for each group
+    """
+    operation: AggregationOperation
+    key: Optional[str] = None
+    name: Optional[str] = None
+
+    @property
+    def alias(self) -> str:
+        """
+        Get the name of the aggregation in the results
+
+        Returns: aggregation name if specified, the operation and key names otherwise
+
+        """
+        if self.name:
+            return self.name
+        if self.key:
+            return f'{self.operation.name.lower()}_{self.key}'
+        return self.operation.name.lower()
+
+
+@dataclass(frozen=True)
+class GroupKey:
+    """
+    Key used to group the items. If the bucket size is specified the numeric key values are grouped in buckets
+    of that size, for example timestamps in days with a bucket size of 86400.
+    """
+    key: str
+    bucket_size: Optional[float] = None
+
+
+def group_key(group: Union[str, GroupKey]) -> GroupKey:
+    """
+    Get the group key of the specified group definition
+
+    Args:
+        group: key name or group key
+
+    Returns: group key
+
+    """
+    return group if isinstance(group, GroupKey) else GroupKey(group)
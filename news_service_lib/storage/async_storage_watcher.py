@@ -0,0 +1,51 @@
+"""
+Abstract asynchronous storage watcher module
+"""
+from abc import ABCMeta, abstractmethod
+from typing import Any, AsyncIterator, List
+
+from .resume_token_store import ResumeTokenStore
+from .storage_watcher import DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+
+
+class AsyncStorageWatcher(metaclass=ABCMeta):
+    """
+    Asynchronous storage watcher interface
+    """
+
+    @abstractmethod
+    def consume_inserts(self, fields: List[str] = None,
+                        resume_store: ResumeTokenStore = None,
+                        consumer: str = None) -> AsyncIterator[Any]:
+        """
+        Consume the inserts in the database
+
+        Args:
+            fields: fields of the inserted items to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed inserts and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store
+
+        Returns: asynchronous iterator to the inserted items
+
+        """
+
+    @abstractmethod
+    def consume_insert_batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                               batch_window: float = DEFAULT_BATCH_WINDOW,
+                               fields: List[str] = None,
+                               resume_store: ResumeTokenStore = None,
+                               consumer: str = None) -> AsyncIterator[List[Any]]:
+        """
+        Consume the inserts in the database in batches, bounded by size and by time window. The batches are
+        checkpointed once processed, when the next batch is requested.
+
+        Args:
+            batch_size: maximum number of inserted items of a batch
+            batch_window: maximum seconds to wait for the inserted items of a batch
+            fields: fields of the inserted items to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed batches and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store
+
+        Returns: asynchronous iterator to the not empty batches of inserted items
+
+        """
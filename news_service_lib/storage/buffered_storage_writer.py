@@ -0,0 +1,247 @@
+"""
+Write behind buffered storage writer module
+"""
+import atexit
+from collections import deque
+from logging import Logger
+from threading import Condition, Thread
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable, List, Optional
+
+from .bulk_save_result import BulkSaveError
+from .exceptions import StorageError, StorageIntegrityError
+from .implementation.storage import Storage
+
+DEFAULT_BUFFER_SIZE = 10000
+DEFAULT_FLUSH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_DELAY = 0.5
+
+
+class BufferedStorageWriter:
+    """
+    Write behind writer queueing the items saved through it and persisting them in the background with the bulk
+    save of the wrapped storage. The queued items are flushed when there are enough of them to fill a bulk save,
+    when the oldest one waited the flush interval and when a flush is requested. The save calls block while the
+    buffer is full. The failed items are retried, except the integrity errors, and reported to the error callback
+    once their retries are exhausted. The pending items are flushed when the writer is closed, which is done at the
+    interpreter exit if it was not closed before.
+    """
+
+    def __init__(self, storage: Storage, logger: Logger,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 flush_size: int = DEFAULT_FLUSH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 retry_delay: float = DEFAULT_RETRY_DELAY,
+                 ordered: bool = False,
+                 on_error: Callable[[BulkSaveError], Any] = None):
+        """
+        Initialize the buffered writer and start its flushing thread
+
+        Args:
+            storage: storage which persists the items
+            logger: logger instance to use
+            buffer_size: maximum number of queued items, the save calls block while it is reached
+            flush_size: maximum number of items persisted by each bulk save, flushed as soon as they are queued
+            flush_interval: maximum seconds an item waits in the buffer before being flushed
+            max_retries: number of times the failed items are saved again before being reported as errors
+            retry_delay: seconds to wait before saving again the failed items, doubled after each retry
+            ordered: True to persist each bulk in order, stopping at its first failing item
+            on_error: function called with each item which could not be saved
+        """
+        if buffer_size < flush_size:
+            raise ValueError(f'Buffer size {buffer_size} smaller than the flush size {flush_size}')
+        self._storage = storage
+        self._logger = logger
+        self._buffer_size = buffer_size
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._ordered = ordered
+        self._on_error = on_error
+
+        self._buffer = deque()
+        self._condition = Condition()
+        self._queued = 0
+        self._written = 0
+        self._flush_requested = 0
+        self._closed = False
+        self._flushing_thread = Thread(target=self._flush_loop, name='buffered-storage-writer', daemon=True)
+        self._flushing_thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> 'BufferedStorageWriter':
+        """
+        Use the writer as a context manager, closing it on exit
+
+        Returns: this writer
+
+        """
+        return self
+
+    def __exit__(self, *_):
+        """
+        Close the writer, flushing the pending items
+        """
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """
+        Get the number of items queued or being saved
+
+        Returns: number of not written items
+
+        """
+        with self._condition:
+            return self._queued - self._written
+
+    def save(self, item: Any, timeout: float = None):
+        """
+        Queue the item to be saved, waiting for space in the buffer if it is full
+
+        Args:
+            item: item to save
+            timeout: maximum seconds to wait for space in the buffer, wait indefinitely if not specified
+
+        """
+        self.save_many([item], timeout)
+
+    def save_many(self, items: Iterable[Any], timeout: float = None):
+        """
+        Queue the items to be saved, waiting for space in the buffer while it is full
+
+        Args:
+            items: items to save
+            timeout: maximum seconds to wait for space in the buffer, wait indefinitely if not specified
+
+        """
+        deadline = monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            for item in items:
+                while not self._closed and len(self._buffer) >= self._buffer_size:
+                    remaining = deadline - monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        raise StorageError(f'Buffered writer full with {len(self._buffer)} items')
+                    self._condition.wait(remaining)
+                if self._closed:
+                    raise StorageError('Buffered writer closed')
+                self._buffer.append((monotonic(), item))
+                self._queued += 1
+                if len(self._buffer) == self._flush_size or len(self._buffer) == 1:
+                    self._condition.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Flush the queued items and wait for all the items queued before the call to be written
+
+        Args:
+            timeout: maximum seconds to wait, wait indefinitely if not specified
+
+        Returns: True if the items were written, False if the timeout expired before
+
+        """
+        with self._condition:
+            target = self._queued
+            self._flush_requested = max(self._flush_requested, target)
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self, timeout: float = None):
+        """
+        Stop accepting items, flush the pending ones and stop the flushing thread
+
+        Args:
+            timeout: maximum seconds to wait for the pending items to be written, wait indefinitely if not specified
+
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        atexit.unregister(self.close)
+        self._flushing_thread.join(timeout)
+        if self._flushing_thread.is_alive():
+            self._logger.warning(f'Buffered writer closed with {self.pending} items not written')
+
+    def _next_batch(self) -> Optional[List[Any]]:
+        """
+        Wait until a batch of items has to be flushed and take it from the buffer
+
+        Returns: items to save, None if the writer is closed and there are no pending items
+
+        """
+        with self._condition:
+            while True:
+                if self._buffer:
+                    flush_due = self._buffer[0][0] + self._flush_interval
+                    if self._closed or len(self._buffer) >= self._flush_size or monotonic() >= flush_due \
+                            or self._flush_requested > self._written:
+                        batch = [self._buffer.popleft()[1] for _ in range(min(self._flush_size, len(self._buffer)))]
+                        self._condition.notify_all()
+                        return batch
+                    self._condition.wait(flush_due - monotonic())
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+    def _write(self, items: List[Any]) -> List[BulkSaveError]:
+        """
+        Save the items with bulk saves, retrying the failed items which are not integrity errors
+
+        Args:
+            items: items to save
+
+        Returns: errors of the items which could not be saved, indexed by their position in the saved items
+
+        """
+        errors = list()
+        pending = list(enumerate(items))
+        retry_delay = self._retry_delay
+        for attempt in range(self._max_retries + 1):
+            try:
+                result_errors = self._storage.save_many([item for _, item in pending], ordered=self._ordered).errors
+            except Exception as ex:
+                error = ex if isinstance(ex, StorageError) else StorageError(str(ex))
+                result_errors = [BulkSaveError(index, item, error) for index, (_, item) in enumerate(pending)]
+            result_errors = [BulkSaveError(pending[bulk_error.index][0], bulk_error.item, bulk_error.error)
+                             for bulk_error in result_errors]
+            errors.extend(bulk_error for bulk_error in result_errors
+                          if isinstance(bulk_error.error, StorageIntegrityError))
+            retryable = [bulk_error for bulk_error in result_errors
+                         if not isinstance(bulk_error.error, StorageIntegrityError)]
+            if not retryable:
+                break
+            if attempt == self._max_retries:
+                errors.extend(retryable)
+                break
+            self._logger.warning(f'Retrying the save of {len(retryable)} items in {retry_delay} seconds: '
+                                 f'{retryable[0].error}')
+            sleep(retry_delay)
+            retry_delay *= 2
+            pending = [(bulk_error.index, bulk_error.item) for bulk_error in retryable]
+        return sorted(errors, key=lambda bulk_error: bulk_error.index)
+
+    def _flush_loop(self):
+        """
+        Save the batches of queued items until the writer is closed and all the items are written
+        """
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            for bulk_error in self._write(batch):
+                self._logger.error(f'Error saving buffered item: {bulk_error.error}')
+                if self._on_error is not None:
+                    try:
+                        self._on_error(bulk_error)
+                    except Exception as ex:
+                        self._logger.error(f'Error in the buffered writer error callback: {ex}')
+            with self._condition:
+                self._written += len(batch)
+                self._condition.notify_all()
@@ -0,0 +1,46 @@
+"""
+Bulk save result module
+"""
+from dataclasses import dataclass, field
+from typing import Any, List
+
+from .exceptions import StorageError
+
+
+@dataclass
+class BulkSaveError:
+    """
+    Error of a single item in a bulk save operation
+    """
+    index: int
+    item: Any
+    error: StorageError
+
+
+@dataclass
+class BulkSaveResult:
+    """
+    Result of a bulk save operation
+    """
+    saved: List[Any] = field(default_factory=list)
+    errors: List[BulkSaveError] = field(default_factory=list)
+
+    @property
+    def failed(self) -> List[Any]:
+        """
+        Get the items which could not be saved
+
+        Returns: list of not saved items
+
+        """
+        return [bulk_error.item for bulk_error in self.errors]
+
+    @property
+    def success(self) -> bool:
+        """
+        Check if all the items were saved
+
+        Returns: True if no item failed, False otherwise
+
+        """
+        return len(self.errors) == 0
@@ -4,9 +4,20 @@ Storage filters module
 from .filter import Filter
 from .match_filter import MatchFilter
 from .range_filter import RangeFilter
+from .in_filter import InFilter
+from .boolean_filter import BooleanFilter, And, Or, Not, normalize_filters
+from .compiler import FilterPlan, compile_filters
 
 __all__ = [
     "Filter",
     "MatchFilter",
-    "RangeFilter"
+    "RangeFilter",
+    "InFilter",
+    "BooleanFilter",
+    "And",
+    "Or",
+    "Not",
+    "normalize_filters",
+    "FilterPlan",
+    "compile_filters"
 ]
@@ -0,0 +1,153 @@
+"""
+Boolean filters module
+"""
+from typing import Any, List, Sequence, Tuple
+
+from news_service_lib.storage.filter.filter import Filter, FilterShape
+from news_service_lib.storage.filter.parsers.filter_parser import FilterParser
+
+
+def unique_filters(filters: Sequence[Filter]) -> List[Filter]:
+    """
+    Remove the repeated filters keeping the order of the first occurrences. The filters are compared by equality
+    because their values could be not hashable.
+
+    Args:
+        filters: filters to deduplicate
+
+    Returns: filters without repetitions
+
+    """
+    unique = list()
+    for filter_instance in filters:
+        if filter_instance not in unique:
+            unique.append(filter_instance)
+    return unique
+
+
+class BooleanFilter(Filter):
+    """
+    Base boolean filter, combining other filters. The boolean filters have no key.
+    """
+
+    def __init__(self, *filters: Filter):
+        """
+        Initialize the boolean filter
+
+        Args:
+            *filters: combined filters
+        """
+        if not filters:
+            raise ValueError(f'{self.__class__.__name__} needs at least one filter')
+        super().__init__(None, filters=tuple(filters))
+
+    @property
+    def shape(self) -> FilterShape:
+        """
+        Get the filter shape, made of the shapes of the combined filters
+
+        Returns: filter type and combined filters shapes
+
+        """
+        return self.__class__, None, tuple(filter_instance.shape for filter_instance in self.filters), ()
+
+    def __repr__(self) -> str:
+        """
+        Represent the filter
+
+        Returns: filter representation
+
+        """
+        return f'{self.__class__.__name__}({", ".join(repr(filter_instance) for filter_instance in self.filters)})'
+
+    def parse_filter(self, cls: type(FilterParser), key: Any = None) -> Any:
+        """
+        Parse the combined filters and the current filter with the provided parser
+
+        Args:
+            cls: filter parser implementation
+            key: not used, the boolean filters have no key
+
+        Returns: parsed filter
+
+        """
+        return getattr(cls, self.parser_name)([filter_instance.parse_filter(cls) for filter_instance in self.filters])
+
+
+class _AssociativeFilter(BooleanFilter):
+    """
+    Boolean filter whose nested filters of the same type can be merged into it
+    """
+
+    def simplify(self) -> Filter:
+        """
+        Get the equivalent filter with the nested filters of the same type merged and the repeated filters removed
+
+        Returns: simplified filter, the only combined filter if there is only one
+
+        """
+        filters = list()
+        for filter_instance in self.filters:
+            filter_instance = filter_instance.simplify()
+            filters.extend(filter_instance.filters if isinstance(filter_instance, self.__class__)
+                           else (filter_instance,))
+        filters = unique_filters(filters)
+        return filters[0] if len(filters) == 1 else self.__class__(*filters)
+
+
+class And(_AssociativeFilter):
+    """
+    Filter matching the items which match all the combined filters
+    """
+    parser_name = 'parse_and'
+
+
+class Or(_AssociativeFilter):
+    """
+    Filter matching the items which match any of the combined filters
+    """
+    parser_name = 'parse_or'
+
+
+class Not(BooleanFilter):
+    """
+    Filter matching the items which do not match the negated filter
+    """
+    parser_name = 'parse_not'
+
+    def __init__(self, filter_instance: Filter):
+        """
+        Initialize the not filter
+
+        Args:
+            filter_instance: negated filter
+        """
+        super().__init__(filter_instance)
+
+    def simplify(self) -> Filter:
+        """
+        Get the equivalent filter with the double negations removed
+
+        Returns: simplified filter
+
+        """
+        negated = self.filters[0].simplify()
+        return negated.filters[0] if isinstance(negated, Not) else Not(negated)
+
+
+def normalize_filters(filters: Sequence[Filter] = None) -> Tuple[Filter, ...]:
+    """
+    Simplify the filters, merging the and filters into the filters list, which is an implicit conjunction, and
+    removing the repeated filters, so the storages receive flat queries which can use their indexes
+
+    Args:
+        filters: filters to normalize
+
+    Returns: normalized filters
+
+    """
+    normalized = list()
+    for filter_instance in filters or ():
+        filter_instance = filter_instance.simplify()
+        normalized.extend(filter_instance.filters if isinstance(filter_instance, And) else (filter_instance,))
+    return tuple(unique_filters(normalized))
@@ -0,0 +1,119 @@
+"""
+Storage filters compiler module
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from .boolean_filter import BooleanFilter, normalize_filters
+from .filter import Filter, FilterShape
+from .parsers.filter_parser import FilterParser
+
+PLANS_CACHE_SIZE = 1024
+
+ParameterPath = Tuple[int, ...]
+
+
+class FilterPlan:
+    """
+    Filters parsed once for a parser and model, with placeholders in place of the filter values
+    """
+    __slots__ = ('query', 'parameters')
+
+    def __init__(self, query: Any, parameters: Tuple[Tuple[ParameterPath, str, str], ...]):
+        """
+        Initialize the filter plan
+
+        Args:
+            query: combined parsed filters with parameter placeholders
+            parameters: path of the filter in the normalized filters tree, value key and parameter name of each
+            placeholder
+        """
+        self.query = query
+        self.parameters = parameters
+
+    def values(self, filters: List[Filter]) -> Dict[str, Any]:
+        """
+        Get the values of the plan parameters from the specified filters
+
+        Args:
+            filters: filters with the same shape as the compiled ones
+
+        Returns: values of the parameters by parameter name
+
+        """
+        filters = normalize_filters(filters)
+        values = dict()
+        for path, value_key, name in self.parameters:
+            filter_instance = filters[path[0]]
+            for index in path[1:]:
+                filter_instance = filter_instance.filters[index]
+            values[name] = getattr(filter_instance, value_key)
+        return values
+
+
+def _compile_shape(shape: FilterShape, path: ParameterPath, parser: type(FilterParser), model: Any,
+                   parameters: list) -> Any:
+    """
+    Parse the specified filter shape, parsing first the combined filters of the boolean filters
+
+    Args:
+        shape: shape of the filter to parse
+        path: path of the filter in the filters tree
+        parser: parser used to compile the filter
+        model: model the filter applies to
+        parameters: list where the placeholders of the filter values are added
+
+    Returns: parsed filter with parameter placeholders
+
+    """
+    filter_class, key, value_keys, null_value_keys = shape
+    if issubclass(filter_class, BooleanFilter):
+        return getattr(parser, filter_class.parser_name)([
+            _compile_shape(child_shape, path + (index,), parser, model, parameters)
+            for index, child_shape in enumerate(value_keys)])
+
+    values = dict()
+    for value_key in value_keys:
+        if value_key in null_value_keys:
+            values[value_key] = None
+        else:
+            name = f'filter_{"_".join(map(str, path))}_{value_key}'
+            values[value_key] = parser.parameter(name)
+            parameters.append((path, value_key, name))
+    return getattr(parser, filter_class.parser_name)(parser.resolve_key(key, model), **values)
+
+
+@lru_cache(maxsize=PLANS_CACHE_SIZE)
+def _compile_shapes(shapes: Tuple[FilterShape, ...], parser: type(FilterParser), model: Any) -> FilterPlan:
+    """
+    Compile the specified filter shapes
+
+    Args:
+        shapes: shapes of the filters to compile
+        parser: parser used to compile the filters
+        model: model the filters apply to
+
+    Returns: filter plan
+
+    """
+    parameters = list()
+    parsed_filters = [_compile_shape(shape, (index,), parser, model, parameters) for index, shape in enumerate(shapes)]
+    return FilterPlan(parser.combine(parsed_filters), tuple(parameters))
+
+
+def compile_filters(filters: List[Filter], parser: type(FilterParser), model: Any = None) -> FilterPlan:
+    """
+    Get the plan of the specified filters for the parser and model. The filters are normalized, flattening the
+    nested and filters and removing the repeated ones, and the plans are memoized by normalized filters shape, so
+    filters with the same types, keys and null values share the same plan.
+
+    Args:
+        filters: filters to compile
+        parser: parser used to compile the filters
+        model: model the filters apply to
+
+    Returns: filter plan
+
+    """
+    return _compile_shapes(tuple(filter_instance.shape for filter_instance in normalize_filters(filters)),
+                           parser, model)
@@ -1,14 +1,17 @@
 """
 Base storage filter module
 """
-from typing import Any
+from typing import Any, Tuple
 
 from news_service_lib.storage.filter.parsers.filter_parser import FilterParser
 
+FilterShape = Tuple[type, Any, Tuple[str, ...], Tuple[str, ...]]
+
 
 class Filter:
     """
-    Storage filter base implementation
+    Storage filter base implementation. Filters are immutable and hashable, so they can be reused and used as
+    cache keys.
     """
     parser_name: str = None
 
@@ -20,34 +23,89 @@ class Filter:
             key: filter key
             **values: filter values
         """
-        self.key = key
-        self.accepted_values = values.keys()
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'accepted_values', tuple(values.keys()))
         for value_key, value in values.items():
-            setattr(self, value_key, value)
+            object.__setattr__(self, value_key, value)
+
+    def __setattr__(self, key: str, value: Any):
+        """
+        Avoid altering the filter
+
+        Args:
+            key: key of the attribute to set
+            value: value to set for the key
+
+        """
+        raise AttributeError(f'{self.__class__.__name__} is immutable')
 
     def __setitem__(self, key: str, value: Any):
         """
-        Avoid setting values not allowed for the filter
+        Avoid altering the filter
 
         Args:
             key: key of the item to set
             value: value to set for the key
 
         """
-        if not hasattr(self, key):
-            raise KeyError(f'Parameter {key} not allowed for {self.__class__.__name__}')
-
-        setattr(self, key, value)
+        raise TypeError(f'{self.__class__.__name__} is immutable')
 
     def __delitem__(self, key: str):
         """
-        Delete the key value
+        Avoid altering the filter
 
         Args:
             key: key to delete value
 
         """
-        setattr(self, key, None)
+        raise TypeError(f'{self.__class__.__name__} is immutable')
+
+    @property
+    def values(self) -> Tuple[Tuple[str, Any], ...]:
+        """
+        Get the filter values
+
+        Returns: tuple of the filter value keys and values
+
+        """
+        return tuple((value_key, getattr(self, value_key)) for value_key in self.accepted_values)
+
+    @property
+    def shape(self) -> FilterShape:
+        """
+        Get the filter shape, which identifies the filters parsed the same way regardless of their not null values
+
+        Returns: filter type, key, value keys and null value keys
+
+        """
+        return (self.__class__, self.key, self.accepted_values,
+                tuple(value_key for value_key, value in self.values if value is None))
+
+    def simplify(self) -> 'Filter':
+        """
+        Get the simplest filter equivalent to the current one
+
+        Returns: simplified filter
+
+        """
+        return self
+
+    def with_values(self, **values) -> 'Filter':
+        """
+        Get a copy of the filter with the specified values replaced
+
+        Args:
+            **values: filter values to replace
+
+        Returns: filter with the replaced values
+
+        """
+        for value_key in values:
+            if value_key not in self.accepted_values:
+                raise KeyError(f'Parameter {value_key} not allowed for {self.__class__.__name__}')
+        filter_instance = object.__new__(self.__class__)
+        Filter.__init__(filter_instance, self.key, **{**dict(self.values), **values})
+        return filter_instance
 
     def __eq__(self, other):
         """
@@ -59,23 +117,39 @@ class Filter:
         Returns: True if the filters are equal, False otherwise
 
         """
-        if self.key == other.key and self.accepted_values == other.accepted_values:
-            for value_key in self.accepted_values:
-                if not hasattr(other, value_key) or getattr(self, value_key) != getattr(other, value_key):
-                    return False
-            return True
-        else:
+        if not isinstance(other, Filter):
             return False
+        return self.__class__ == other.__class__ and self.key == other.key and self.values == other.values
+
+    def __hash__(self) -> int:
+        """
+        Hash the filter
+
+        Returns: hash of the filter type, key and values
+
+        """
+        return hash((self.__class__, self.key, self.values))
+
+    def __repr__(self) -> str:
+        """
+        Represent the filter
+
+        Returns: filter representation
+
+        """
+        values = ', '.join(f'{value_key}={value!r}' for value_key, value in self.values)
+        return f'{self.__class__.__name__}({self.key!r}, {values})'
 
-    def parse_filter(self, cls: type(FilterParser)) -> Any:
+    def parse_filter(self, cls: type(FilterParser), key: Any = None) -> Any:
         """
         Parse the current filter with the provided parser
 
         Args:
             cls: filter parser implementation
+            key: key to parse the filter with instead of the filter key
 
         Returns: parsed filter
 
         """
-        return getattr(cls, self.parser_name)(self.key,
+        return getattr(cls, self.parser_name)(self.key if key is None else key,
                                               **{value: getattr(self, value) for value in self.accepted_values})
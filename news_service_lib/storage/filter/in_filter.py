@@ -0,0 +1,40 @@
+"""
+In filter module
+"""
+from typing import Any, Iterable, Iterator
+
+from news_service_lib.storage.filter.filter import Filter
+
+
+class InFilter(Filter):
+    """
+    In filter implementation, matching any of the specified values
+    """
+    parser_name = 'parse_in'
+
+    def __init__(self, key: Any, values: Iterable[Any]):
+        """
+        Initialize the in filter
+
+        Args:
+            key: key to match values
+            values: values to match, stored as a tuple to keep the filter hashable
+        """
+        super().__init__(key, members=tuple(values))
+
+    @classmethod
+    def chunks(cls, key: Any, values: Iterable[Any], chunk_size: int) -> Iterator['InFilter']:
+        """
+        Split the lookup of the specified values in filters of bounded size, without repeated values
+
+        Args:
+            key: key to match values
+            values: values to match
+            chunk_size: maximum number of values of each filter
+
+        Returns: iterator to the in filters of each chunk of values
+
+        """
+        unique_values = list(dict.fromkeys(values))
+        for start in range(0, len(unique_values), chunk_size):
+            yield cls(key, unique_values[start:start + chunk_size])
@@ -1,12 +1,16 @@
 """
 Storage filter parsers module
 """
+from .filter_parameter import FilterParameter
 from .filter_parser import FilterParser
 from .mongo_filter_parser import MongoFilterParser
 from .sql_filter_parser import SQLFilterParser
+from .memory_filter_parser import MemoryFilterParser
 
 __all__ = [
+    "FilterParameter",
     "FilterParser",
     "MongoFilterParser",
-    "SQLFilterParser"
+    "SQLFilterParser",
+    "MemoryFilterParser"
 ]
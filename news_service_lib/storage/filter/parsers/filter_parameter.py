@@ -0,0 +1,49 @@
+"""
+Filter parameter placeholder module
+"""
+
+
+class FilterParameter:
+    """
+    Placeholder of a filter value in a compiled filter, replaced by the actual value when the filter is bound
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name: str):
+        """
+        Initialize the filter parameter
+
+        Args:
+            name: name of the parameter
+        """
+        self.name = name
+
+    def __eq__(self, other) -> bool:
+        """
+        Compare two filter parameters
+
+        Args:
+            other: filter parameter to compare the current one
+
+        Returns: True if the parameters have the same name, False otherwise
+
+        """
+        return isinstance(other, FilterParameter) and self.name == other.name
+
+    def __hash__(self) -> int:
+        """
+        Hash the filter parameter
+
+        Returns: hash of the parameter name
+
+        """
+        return hash(self.name)
+
+    def __repr__(self) -> str:
+        """
+        Represent the filter parameter
+
+        Returns: filter parameter representation
+
+        """
+        return f'FilterParameter({self.name!r})'
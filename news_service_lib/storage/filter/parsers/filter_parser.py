@@ -2,13 +2,53 @@
 Abstract filter parser module
 """
 from abc import abstractmethod, ABCMeta
-from typing import Any
+from typing import Any, List
 
 
 class FilterParser(metaclass=ABCMeta):
     """
     Abstract filter parser interface
     """
+    @staticmethod
+    @abstractmethod
+    def parameter(name: str) -> Any:
+        """
+        Get the placeholder of a filter value, used to parse filters once and bind their values later
+
+        Args:
+            name: name of the parameter
+
+        Returns: parameter placeholder
+
+        """
+
+    @staticmethod
+    @abstractmethod
+    def combine(parsed_filters: List[Any]) -> Any:
+        """
+        Combine the parsed filters into a single parsed query
+
+        Args:
+            parsed_filters: filters parsed by this parser
+
+        Returns: combined query
+
+        """
+
+    @staticmethod
+    def resolve_key(key: Any, model: Any = None) -> Any:
+        """
+        Resolve the filter key for the specified model
+
+        Args:
+            key: key of the filter
+            model: model the filters apply to
+
+        Returns: resolved filter key
+
+        """
+        return key
+
     @staticmethod
     @abstractmethod
     def parse_range(key: Any, upper: Any = None, lower: Any = None) -> dict:
@@ -37,3 +77,56 @@ class FilterParser(metaclass=ABCMeta):
         Returns: parsed filter
 
         """
+
+    @staticmethod
+    @abstractmethod
+    def parse_in(key: Any, members: Any) -> Any:
+        """
+        Parse the in filter
+
+        Args:
+            key: key of the field used to filter
+            members: values to match for filtering
+
+        Returns: parsed filter
+
+        """
+
+    @staticmethod
+    @abstractmethod
+    def parse_and(parsed_filters: List[Any]) -> Any:
+        """
+        Parse the and filter
+
+        Args:
+            parsed_filters: combined filters parsed by this parser
+
+        Returns: parsed filter matching all the combined filters
+
+        """
+
+    @staticmethod
+    @abstractmethod
+    def parse_or(parsed_filters: List[Any]) -> Any:
+        """
+        Parse the or filter
+
+        Args:
+            parsed_filters: combined filters parsed by this parser
+
+        Returns: parsed filter matching any of the combined filters
+
+        """
+
+    @staticmethod
+    @abstractmethod
+    def parse_not(parsed_filters: List[Any]) -> Any:
+        """
+        Parse the not filter
+
+        Args:
+            parsed_filters: negated filter parsed by this parser, in a single element list
+
+        Returns: parsed filter not matching the negated filter
+
+        """
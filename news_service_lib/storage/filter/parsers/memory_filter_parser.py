@@ -0,0 +1,189 @@
+"""
+In memory filter module
+"""
+from typing import Any, Callable, List
+
+from .filter_parameter import FilterParameter
+from .filter_parser import FilterParser
+
+MemoryPredicate = Callable[[dict, dict], bool]
+MISSING = object()
+
+
+def item_value(item: dict, key: str) -> Any:
+    """
+    Get the value of the specified key of the item, following the dotted keys into the nested dictionaries
+
+    Args:
+        item: item to get the value from
+        key: key of the value, with the nested keys separated by dots
+
+    Returns: value of the key, MISSING if the item does not have the key
+
+    """
+    value = item
+    for key_part in key.split('.'):
+        if not isinstance(value, dict) or key_part not in value:
+            return MISSING
+        value = value[key_part]
+    return value
+
+
+def bound_value(value: Any, values: dict) -> Any:
+    """
+    Get the value bound to the parameter placeholder
+
+    Args:
+        value: filter value or parameter placeholder
+        values: values of the parameters by parameter name
+
+    Returns: bound value of the placeholder, the same value if it is not a placeholder
+
+    """
+    return values[value.name] if isinstance(value, FilterParameter) else value
+
+
+class MemoryFilterParser(FilterParser):
+    """
+    In memory filter implementation, parsing the filters to predicates over the stored dictionaries
+    """
+    @staticmethod
+    def parameter(name: str) -> FilterParameter:
+        """
+        Get the placeholder of a filter value
+
+        Args:
+            name: name of the parameter
+
+        Returns: parameter placeholder
+
+        """
+        return FilterParameter(name)
+
+    @staticmethod
+    def combine(parsed_filters: List[MemoryPredicate]) -> MemoryPredicate:
+        """
+        Combine the parsed filters into a single predicate matching the items which match all of them
+
+        Args:
+            parsed_filters: predicates to combine
+
+        Returns: combined predicate
+
+        """
+        return lambda item, values: all(predicate(item, values) for predicate in parsed_filters)
+
+    @staticmethod
+    def bind(query: MemoryPredicate, values: dict) -> Callable[[dict], bool]:
+        """
+        Bind the values of the parameter placeholders to the predicate
+
+        Args:
+            query: predicate with parameter placeholders
+            values: values of the parameters by parameter name
+
+        Returns: predicate receiving only the item to check
+
+        """
+        return lambda item: query(item, values)
+
+    @staticmethod
+    def parse_match(key: str, value: Any) -> MemoryPredicate:
+        """
+        Get the predicate matching the items with the specified value
+
+        Args:
+            key: key of the item value to match
+            value: value to match
+
+        Returns: item predicate
+
+        """
+        def match(item: dict, values: dict) -> bool:
+            item_key_value = item_value(item, key)
+            return (None if item_key_value is MISSING else item_key_value) == bound_value(value, values)
+        return match
+
+    @staticmethod
+    def parse_range(key: str, upper: Any = None, lower: Any = None) -> MemoryPredicate:
+        """
+        Get the predicate matching the items with a value between the specified limits, not included
+
+        Args:
+            key: key of the item value to check
+            upper: upper limit of the range
+            lower: lower limit of the range
+
+        Returns: item predicate
+
+        """
+        def in_range(item: dict, values: dict) -> bool:
+            item_key_value = item_value(item, key)
+            if item_key_value is MISSING or item_key_value is None:
+                return False
+            lower_value = bound_value(lower, values)
+            upper_value = bound_value(upper, values)
+            try:
+                return (lower_value is None or item_key_value > lower_value) and \
+                       (upper_value is None or item_key_value < upper_value)
+            except TypeError:
+                return False
+        return in_range
+
+    @staticmethod
+    def parse_in(key: str, members: Any) -> MemoryPredicate:
+        """
+        Get the predicate matching the items with any of the specified values
+
+        Args:
+            key: key of the item value to match
+            members: values to match
+
+        Returns: item predicate
+
+        """
+        def match_any(item: dict, values: dict) -> bool:
+            item_key_value = item_value(item, key)
+            return (None if item_key_value is MISSING else item_key_value) in bound_value(members, values)
+        return match_any
+
+    @staticmethod
+    def parse_and(parsed_filters: List[MemoryPredicate]) -> MemoryPredicate:
+        """
+        Get the predicate matching the items which match all the parsed filters
+
+        Args:
+            parsed_filters: predicates to match
+
+        Returns: item predicate
+
+        """
+        return MemoryFilterParser.combine(parsed_filters)
+
+    @staticmethod
+    def parse_or(parsed_filters: List[MemoryPredicate]) -> MemoryPredicate:
+        """
+        Get the predicate matching the items which match any of the parsed filters
+
+        Args:
+            parsed_filters: predicates to match
+
+        Returns: item predicate
+
+        """
+        return lambda item, values: any(predicate(item, values) for predicate in parsed_filters)
+
+    @staticmethod
+    def parse_not(parsed_filters: List[MemoryPredicate]) -> MemoryPredicate:
+        """
+        Get the predicate matching the items which do not match the parsed filter, including the items without the
+        filter key like MongoDB does
+
+        Args:
+            parsed_filters: predicate to negate, in a single element list
+
+        Returns: item predicate
+
+        """
+        predicate = MemoryFilterParser.combine(parsed_filters)
+        return lambda item, values: not predicate(item, values)
@@ -1,8 +1,9 @@
 """
 MongoDB filter module
 """
-from typing import Any
+from typing import Any, List
 
+from .filter_parameter import FilterParameter
 from .filter_parser import FilterParser
 
 
@@ -10,6 +11,83 @@ class MongoFilterParser(FilterParser):
     """
     MongoDB filter implementation
     """
+    @staticmethod
+    def parameter(name: str) -> FilterParameter:
+        """
+        Get the placeholder of a filter value
+
+        Args:
+            name: name of the parameter
+
+        Returns: parameter placeholder
+
+        """
+        return FilterParameter(name)
+
+    @staticmethod
+    def combine(parsed_filters: List[dict]) -> dict:
+        """
+        Combine the parsed filters into a single mongodb query. The operators of the same key are merged if they
+        do not overlap, the rest of conditions over an already used key are kept in an $and clause instead of
+        replacing the previous ones.
+
+        Args:
+            parsed_filters: mongodb queries to combine
+
+        Returns: mongodb query
+
+        """
+        aggregated_query = {}
+        conflicting_queries = []
+        for query in parsed_filters:
+            for key, value in query.items():
+                if key == '$and':
+                    conflicting_queries.extend(value)
+                elif key not in aggregated_query:
+                    aggregated_query[key] = value
+                elif MongoFilterParser._is_operators(aggregated_query[key]) and MongoFilterParser._is_operators(value) \
+                        and not set(aggregated_query[key]) & set(value):
+                    aggregated_query[key] = {**aggregated_query[key], **value}
+                else:
+                    conflicting_queries.append({key: value})
+        if conflicting_queries:
+            aggregated_query['$and'] = conflicting_queries
+        return aggregated_query
+
+    @staticmethod
+    def _is_operators(value: Any) -> bool:
+        """
+        Check if the query value is a dictionary of query operators
+
+        Args:
+            value: value of a query key
+
+        Returns: True if all the dictionary keys are operators, False otherwise
+
+        """
+        return isinstance(value, dict) and all(str(key).startswith('$') for key in value)
+
+    @staticmethod
+    def bind(query: Any, values: dict) -> Any:
+        """
+        Replace the parameter placeholders of the query with the specified values, the tuples as lists
+
+        Args:
+            query: mongodb query with parameter placeholders
+            values: values of the parameters by parameter name
+
+        Returns: mongodb query with the values bound
+
+        """
+        if isinstance(query, FilterParameter):
+            value = values[query.name]
+            return list(value) if isinstance(value, tuple) else value
+        if isinstance(query, dict):
+            return {key: MongoFilterParser.bind(value, values) for key, value in query.items()}
+        if isinstance(query, list):
+            return [MongoFilterParser.bind(value, values) for value in query]
+        return query
+
     @staticmethod
     def parse_match(key: str, value: Any) -> dict:
         """
@@ -43,3 +121,56 @@ class MongoFilterParser(FilterParser):
         if upper is not None:
             range_query['$lt'] = upper
         return {key: range_query}
+
+    @staticmethod
+    def parse_in(key: str, members: Any) -> dict:
+        """
+        Get the filter query matching any of the specified values
+
+        Args:
+            key: filter query field key
+            members: values to match in the query
+
+        Returns: mongodb query
+
+        """
+        return {key: {'$in': list(members) if isinstance(members, tuple) else members}}
+
+    @staticmethod
+    def parse_and(parsed_filters: List[dict]) -> dict:
+        """
+        Get the query matching all the parsed filters, merged into a single query
+
+        Args:
+            parsed_filters: mongodb queries to match
+
+        Returns: mongodb query
+
+        """
+        return MongoFilterParser.combine(parsed_filters)
+
+    @staticmethod
+    def parse_or(parsed_filters: List[dict]) -> dict:
+        """
+        Get the $or query matching any of the parsed filters
+
+        Args:
+            parsed_filters: mongodb queries to match
+
+        Returns: mongodb query
+
+        """
+        return {'$or': parsed_filters}
+
+    @staticmethod
+    def parse_not(parsed_filters: List[dict]) -> dict:
+        """
+        Get the $nor query not matching the parsed filter
+
+        Args:
+            parsed_filters: mongodb query to negate, in a single element list
+
+        Returns: mongodb query
+
+        """
+        return {'$nor': [MongoFilterParser.combine(parsed_filters)]}
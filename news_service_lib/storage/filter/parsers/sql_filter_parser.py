@@ -3,8 +3,9 @@ SQL filter module
 """
 from typing import List, Any
 
-from sqlalchemy import Column
-from sqlalchemy.sql.elements import BinaryExpression
+from sqlalchemy import Column, bindparam, and_, or_, not_, true, false
+from sqlalchemy.ext.declarative import DeclarativeMeta
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter
 
 from .filter_parser import FilterParser
 
@@ -13,6 +14,49 @@ class SQLFilterParser(FilterParser):
     """
     SQL filter implementation
     """
+    @staticmethod
+    def parameter(name: str) -> BindParameter:
+        """
+        Get the placeholder of a filter value
+
+        Args:
+            name: name of the parameter
+
+        Returns: SQL bind parameter
+
+        """
+        return bindparam(name)
+
+    @staticmethod
+    def combine(parsed_filters: List[List[BinaryExpression]]) -> List[BinaryExpression]:
+        """
+        Combine the parsed filters into a single list of SQL expressions
+
+        Args:
+            parsed_filters: SQL expressions lists to combine
+
+        Returns: SQL expressions
+
+        """
+        return [expression for expressions in parsed_filters for expression in expressions]
+
+    @staticmethod
+    def resolve_key(key: Any, model: DeclarativeMeta = None) -> Any:
+        """
+        Resolve the filter key to the model column
+
+        Args:
+            key: name of the model field
+            model: model the filters apply to
+
+        Returns: model column
+
+        """
+        if model is None or not isinstance(key, str):
+            return key
+        if not hasattr(model, key):
+            raise AttributeError(f'{model.__name__} has not the {key} property')
+        return getattr(model, key)
 
     @staticmethod
     def parse_match(key: Column, value: Any) -> List[BinaryExpression]:
@@ -47,3 +91,61 @@ class SQLFilterParser(FilterParser):
         if upper is not None:
             expressions.append(key < upper)
         return expressions
+
+    @staticmethod
+    def parse_in(key: Column, members: Any) -> List[BinaryExpression]:
+        """
+        Get the filter query matching any of the specified values. The values placeholder is expanded to one bound
+        parameter per value when the statement is executed.
+
+        Args:
+            key: filter query field key
+            members: values to match in the query
+
+        Returns: SQL query
+
+        """
+        if isinstance(members, BindParameter):
+            members = bindparam(members.key, expanding=True)
+        return [key.in_(members)]
+
+    @staticmethod
+    def parse_and(parsed_filters: List[List[BinaryExpression]]) -> List[BinaryExpression]:
+        """
+        Get the SQL expressions matching all the parsed filters, which are implicitly joined by AND
+
+        Args:
+            parsed_filters: SQL expressions lists to match
+
+        Returns: SQL expressions
+
+        """
+        return SQLFilterParser.combine(parsed_filters)
+
+    @staticmethod
+    def parse_or(parsed_filters: List[List[BinaryExpression]]) -> List[BinaryExpression]:
+        """
+        Get the OR expression matching any of the parsed filters
+
+        Args:
+            parsed_filters: SQL expressions lists to match
+
+        Returns: SQL expression
+
+        """
+        return [or_(*(and_(*expressions) if expressions else true() for expressions in parsed_filters))]
+
+    @staticmethod
+    def parse_not(parsed_filters: List[List[BinaryExpression]]) -> List[BinaryExpression]:
+        """
+        Get the NOT expression not matching the parsed filter. Unlike in MongoDB, the NULL values do not match the
+        negated comparisons.
+
+        Args:
+            parsed_filters: SQL expressions list to negate, in a single element list
+
+        Returns: SQL expression
+
+        """
+        expressions = SQLFilterParser.combine(parsed_filters)
+        return [not_(and_(*expressions))] if expressions else [false()]
@@ -4,9 +4,21 @@ Storage interfaces implementations module
 from .storage import Storage
 from .mongo_storage import MongoStorage
 from .sql_storage import SqlStorage
+from .async_storage import AsyncStorage
+from .async_mongo_storage import AsyncMongoStorage
+from .async_sql_storage import AsyncSqlStorage
+from .cached_storage import CachedStorage
+from .memory_storage import MemoryStorage
+from .partitioned_storage import PartitionedStorage
 
 __all__ = [
     "Storage",
     "MongoStorage",
-    "SqlStorage"
+    "SqlStorage",
+    "AsyncStorage",
+    "AsyncMongoStorage",
+    "AsyncSqlStorage",
+    "CachedStorage",
+    "MemoryStorage",
+    "PartitionedStorage"
 ]
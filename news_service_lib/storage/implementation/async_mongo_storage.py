@@ -0,0 +1,285 @@
+"""
+Asynchronous MongoDB storage implementation module
+"""
+import asyncio
+from copy import copy
+from logging import Logger
+from typing import Any, AsyncIterator, Dict, Iterable, List, Union
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+
+from ..bulk_save_result import BulkSaveResult
+from ..filter.filter import Filter
+from ..filter.in_filter import InFilter
+from ..mongo_utils import bulk_save_result, read_preference as parse_read_preference, \
+    write_concern as parse_write_concern
+from ..async_storage_watcher import AsyncStorageWatcher
+from ..page_cursor import encode_cursor
+from ..resume_token_store import ResumeTokenStore
+from ..sort_direction import SortDirection
+from ..storage_watcher import DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+from .async_storage import AsyncStorage
+from .storage import KEYS_CHUNK_SIZE
+from .mongo_storage import MongoStorage, check_collection
+
+
+class AsyncMongoStorage(AsyncStorage, AsyncStorageWatcher):
+    """
+    Asynchronous MongoDB storage implementation using the motor asyncio driver
+    """
+
+    def __init__(self, members: str, rsname: str, database: str, logger: Logger, read_preference: str = None,
+                 max_staleness: int = None, w: Union[int, str] = None, j: bool = None, wtimeout: int = None):
+        """
+        Initialize an asynchronous mongo storage client. The replicaset should be already initialized.
+
+        Args:
+            members: mongodb replicaset members address
+            rsname: mongodb replicaset name
+            database: mongodb database name
+            read_preference: read preference mode name, primary if not specified
+            max_staleness: maximum replication lag in seconds of the secondaries to read from
+            w: number of members or tag which should acknowledge the writes
+            j: True to wait for the writes to be journaled
+            wtimeout: maximum milliseconds to wait for the writes acknowledgment
+        """
+        members = members.split(',')
+        self._logger = logger
+        self._mongo_client = AsyncIOMotorClient(members[0], replicaset=rsname)
+        self._database = self._mongo_client[database]
+        self._read_preference = parse_read_preference(read_preference, max_staleness)
+        self._write_concern = parse_write_concern(w, j, wtimeout)
+        self.collection = None
+
+    @check_collection
+    async def save(self, item: dict):
+        """
+        Persist the specified item
+
+        Args:
+            item: item to persist
+
+        """
+        await self.collection.insert_one(item)
+
+    @check_collection
+    async def save_many(self, items: List[dict], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items with a single bulk insert
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        if not items:
+            return BulkSaveResult()
+
+        try:
+            await self.collection.insert_many(items, ordered=ordered)
+            return bulk_save_result(items, ordered)
+        except BulkWriteError as bwex:
+            return bulk_save_result(items, ordered, bwex)
+
+    @check_collection
+    async def get(self, filters: List[Filter] = None,
+                  sort_key: str = None,
+                  sort_direction: SortDirection = None,
+                  limit: int = None,
+                  offset: int = None,
+                  after: str = None,
+                  fields: List[str] = None) -> AsyncIterator[dict]:
+        """
+        Get items which match the specified filters
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: asynchronous iterator to the matching items
+
+        """
+        query, sort = MongoStorage._parse_page(filters, sort_key, sort_direction, limit, after)
+        cursor = self.collection.find(query, MongoStorage._parse_projection(fields, sort_key))
+
+        if sort:
+            cursor = cursor.sort(sort)
+        if offset:
+            cursor = cursor.skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        async for item in cursor:
+            yield item
+
+    def page_cursor(self, item: dict, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, used to get the items after it
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+        if sort_key:
+            return encode_cursor(item[sort_key], item['_id'])
+        return encode_cursor(item['_id'])
+
+    @check_collection
+    async def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> dict:
+        """
+        Get first queried item
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: persisted item matching filters
+
+        """
+        return await self.collection.find_one(MongoStorage._parse_filters(filters),
+                                              MongoStorage._parse_projection(fields))
+
+    @check_collection
+    async def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                              chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, dict]:
+        """
+        Get the items with any of the specified key values, with one $in query per chunk of values
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+        fields = list(fields) + [key] if fields and key not in fields else fields
+        items = dict()
+        for in_filter in InFilter.chunks(key, values, chunk_size):
+            async for item in self.collection.find(MongoStorage._parse_filters([in_filter]),
+                                                   MongoStorage._parse_projection(fields)):
+                items.setdefault(item.get(key), item)
+        return items
+
+    @check_collection
+    async def delete(self, identifier: str):
+        """
+        Delete the identified item
+
+        Args:
+            identifier: identifier of the item
+
+        """
+        await self.collection.delete_one({'_id': identifier})
+
+    @check_collection
+    async def consume_inserts(self, fields: List[str] = None,
+                              resume_store: ResumeTokenStore = None,
+                              consumer: str = None) -> AsyncIterator[dict]:
+        """
+        Consume the insert operations, checkpointing the resume token of each consumed insert if a resume store
+        is specified. The resume store is accessed in the default executor.
+
+        Args:
+            fields: fields of the inserted documents to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed inserts and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the collection name if not specified
+
+        Returns: asynchronous iterator to the inserted documents
+
+        """
+        loop = asyncio.get_event_loop()
+        consumer = consumer or self.collection.full_name
+        resume_token = await loop.run_in_executor(None, resume_store.load, consumer) \
+            if resume_store is not None else None
+        async with self.collection.watch(MongoStorage._inserts_pipeline(fields),
+                                         resume_after=resume_token) as insert_consumer:
+            async for insert_change in insert_consumer:
+                yield insert_change['fullDocument']
+                if resume_store is not None:
+                    await loop.run_in_executor(None, resume_store.save, consumer, insert_change['_id'])
+
+    @check_collection
+    async def consume_insert_batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                                     batch_window: float = DEFAULT_BATCH_WINDOW,
+                                     fields: List[str] = None,
+                                     resume_store: ResumeTokenStore = None,
+                                     consumer: str = None) -> AsyncIterator[List[dict]]:
+        """
+        Consume the insert operations in batches, bounded by size and by time window. The resume token of the
+        last insert of each batch is checkpointed once the batch is processed, when the next batch is requested.
+
+        Args:
+            batch_size: maximum number of inserted documents of a batch
+            batch_window: maximum seconds to wait for the inserted documents of a batch
+            fields: fields of the inserted documents to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed batches and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the collection name if not specified
+
+        Returns: asynchronous iterator to the not empty batches of inserted documents
+
+        """
+        loop = asyncio.get_event_loop()
+        consumer = consumer or self.collection.full_name
+        resume_token = await loop.run_in_executor(None, resume_store.load, consumer) \
+            if resume_store is not None else None
+        async with self.collection.watch(MongoStorage._inserts_pipeline(fields), resume_after=resume_token,
+                                         max_await_time_ms=max(1, int(batch_window * 250))) as insert_consumer:
+            while insert_consumer.alive:
+                batch = list()
+                deadline = loop.time() + batch_window
+                while len(batch) < batch_size and loop.time() < deadline:
+                    insert_change = await insert_consumer.try_next()
+                    if insert_change is not None:
+                        batch.append(insert_change['fullDocument'])
+                        resume_token = insert_change['_id']
+                if batch:
+                    yield batch
+                    if resume_store is not None:
+                        await loop.run_in_executor(None, resume_store.save, consumer, resume_token)
+
+    @check_collection
+    def with_options(self, read_preference: str = None, max_staleness: int = None, w: Union[int, str] = None,
+                     j: bool = None, wtimeout: int = None) -> 'AsyncMongoStorage':
+        """
+        Get a view of the storage with the specified read preference and write concern options, sharing the client
+        and the collection. The write concern options not specified are kept.
+
+        Args:
+            read_preference: read preference mode name, the storage read preference if not specified
+            max_staleness: maximum replication lag in seconds of the secondaries to read from
+            w: number of members or tag which should acknowledge the writes
+            j: True to wait for the writes to be journaled
+            wtimeout: maximum milliseconds to wait for the writes acknowledgment
+
+        Returns: storage view using the specified options
+
+        """
+        storage_view = copy(self)
+        storage_view.collection = self.collection.with_options(
+            read_preference=parse_read_preference(read_preference, max_staleness),
+            write_concern=parse_write_concern(w, j, wtimeout, base=self.collection.write_concern))
+        return storage_view
+
+    def set_collection(self, collection: str):
+        """
+        Set collection used by the implementation
+
+        Args:
+            collection: collection to use
+
+        """
+        self.collection = self._database.get_collection(collection, read_preference=self._read_preference,
+                                                        write_concern=self._write_concern)
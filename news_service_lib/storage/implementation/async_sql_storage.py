@@ -0,0 +1,198 @@
+"""
+Asynchronous SQL storage implementation module
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import Logger
+from typing import AsyncIterator, Dict, Iterable, List, Any, Callable
+
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from ..bulk_save_result import BulkSaveResult
+from ..filter.filter import Filter
+from ..sort_direction import SortDirection
+from ..sql import SqlSessionProvider
+from .async_storage import AsyncStorage
+from .storage import KEYS_CHUNK_SIZE
+from .sql_storage import SqlStorage, DEFAULT_CHUNK_SIZE
+
+DEFAULT_MAX_WORKERS = 5
+
+
+class AsyncSqlStorage(AsyncStorage):
+    """
+    Asynchronous SQL storage implementation. The blocking SQL operations run in a thread pool bounded by the
+    engine connection pool size, and each operation releases its connection before returning, so the running
+    operations do not wait for the connections of the iterations in progress.
+    """
+
+    def __init__(self, session_provider: SqlSessionProvider, model: DeclarativeMeta, logger: Logger,
+                 max_workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the asynchronous SQL storage
+
+        Args:
+            session_provider: SQLAlchemy sessions manager
+            model: model managed by the storage
+            logger: logger instance to use
+            max_workers: maximum number of concurrent SQL operations, by default the engine pool size
+            chunk_size: number of entities fetched from the database at once while iterating the queried entities
+        """
+        self._logger = logger
+        self._chunk_size = chunk_size
+        self._storage = SqlStorage(session_provider, model, logger, chunk_size=chunk_size)
+        if max_workers is None:
+            max_workers = self._pool_size(session_provider)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async_sql_storage')
+
+    @staticmethod
+    def _pool_size(session_provider: SqlSessionProvider) -> int:
+        """
+        Get the connection pool size of the session provider engine
+
+        Args:
+            session_provider: SQLAlchemy sessions manager
+
+        Returns: engine connection pool size
+
+        """
+        pool_size = getattr(session_provider.engine.pool, 'size', None)
+        if callable(pool_size):
+            return pool_size()
+        return DEFAULT_MAX_WORKERS
+
+    async def _run(self, function: Callable, *args, **kwargs) -> Any:
+        """
+        Run the specified blocking function in the storage thread pool
+
+        Args:
+            function: blocking function to run
+            *args: function positional arguments
+            **kwargs: function keyword arguments
+
+        Returns: function execution result
+
+        """
+        return await asyncio.get_event_loop().run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    async def save(self, model_instance: DeclarativeMeta) -> Any:
+        """
+        Save the specified model to the database
+
+        Args:
+            model_instance: instance to save
+
+        Returns: persisted instance
+
+        """
+        return await self._run(self._storage.save, model_instance)
+
+    async def save_many(self, model_instances: List[DeclarativeMeta], ordered: bool = False) -> BulkSaveResult:
+        """
+        Save the specified models to the database within a single session
+
+        Args:
+            model_instances: instances to save
+            ordered: True to stop saving at the first failing instance, False otherwise
+
+        Returns: result with the persisted instances and the per instance errors
+
+        """
+        return await self._run(self._storage.save_many, model_instances, ordered=ordered)
+
+    async def get(self, filters: List[Filter] = None,
+                  sort_key: str = None,
+                  sort_direction: SortDirection = None,
+                  limit: int = None,
+                  offset: int = None,
+                  after: str = None,
+                  fields: List[str] = None) -> AsyncIterator[DeclarativeMeta]:
+        """
+        Get the entities which matches the given filters. Each chunk of entities is fetched by its own query in a
+        single call to the storage thread pool, seeking after the page cursor of the last entity of the previous
+        chunk, so no connection is held while the entities are iterated.
+
+        Args:
+            filters: filters to be applied
+            sort_key: key to sort the results
+            sort_direction: sorting direction
+            limit: maximum number of entities to get
+            offset: number of entities to skip
+            after: page cursor of the last entity of the previous page, get the entities after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: asynchronous iterator to the entities which matches the given filters
+
+        """
+        remaining = limit
+        while remaining is None or remaining > 0:
+            chunk_limit = self._chunk_size if remaining is None else min(remaining, self._chunk_size)
+            chunk = await self._run(lambda: list(self._storage.get(filters, sort_key, sort_direction,
+                                                                   limit=chunk_limit, offset=offset, after=after,
+                                                                   fields=fields)))
+            for entity in chunk:
+                yield entity
+            if len(chunk) < chunk_limit:
+                break
+            offset = None
+            after = self._storage.page_cursor(chunk[-1], sort_key)
+            remaining = None if remaining is None else remaining - len(chunk)
+
+    def page_cursor(self, model_instance: DeclarativeMeta, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified entity, used to get the entities after it
+
+        Args:
+            model_instance: last entity of a page
+            sort_key: key used to sort the page entities
+
+        Returns: opaque page cursor
+
+        """
+        return self._storage.page_cursor(model_instance, sort_key)
+
+    async def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
+        """
+        Get one entity which matches the given filter
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: entity which matches the given filters
+
+        """
+        return await self._run(self._storage.get_one, filters, fields=fields)
+
+    async def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                              chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the entities with any of the specified key values, with one IN query per chunk of values
+
+        Args:
+            key: name of the model field of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: entities by key value, the values without entity are not included
+
+        """
+        return await self._run(self._storage.get_many_by_key, key, list(values), fields=fields, chunk_size=chunk_size)
+
+    async def delete(self, identifier: Any):
+        """
+        Delete the entity identified by the given identifier
+
+        Args:
+            identifier: identifier of the entity to delete
+
+        """
+        await self._run(self._storage.delete, identifier)
+
+    def close(self):
+        """
+        Shutdown the storage thread pool waiting for the running operations
+        """
+        self._executor.shutdown(wait=True)
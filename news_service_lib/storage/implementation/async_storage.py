@@ -0,0 +1,116 @@
+"""
+Abstract asynchronous storage module
+"""
+from abc import ABCMeta, abstractmethod
+from typing import AsyncIterator, Dict, Iterable, List, Any
+
+from ..bulk_save_result import BulkSaveResult
+from ..filter.filter import Filter
+from ..sort_direction import SortDirection
+from .storage import KEYS_CHUNK_SIZE
+
+
+class AsyncStorage(metaclass=ABCMeta):
+    """
+    Asynchronous storage interface
+    """
+
+    @abstractmethod
+    async def save(self, item: Any):
+        """
+        Persist the specified item
+
+        Args:
+            item: item to persist
+
+        """
+
+    @abstractmethod
+    async def save_many(self, items: List[Any], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items in bulk
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+
+    @abstractmethod
+    def get(self, filters: List[Filter] = None,
+            sort_key: str = None,
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> AsyncIterator[Any]:
+        """
+        Get items from the storage. If filters are provided filter results.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: asynchronous iterator to the items
+
+        """
+
+    @abstractmethod
+    def page_cursor(self, item: Any, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, used to get the items after it
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+
+    @abstractmethod
+    async def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
+        """
+        Get a unique storage item which matches the filters if provided
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: persisted item matching filters
+
+        """
+
+    @abstractmethod
+    async def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                              chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the items with any of the specified key values, with one query per chunk of values instead of one
+        query per value. The key should identify the items, only the first item found for each value is returned.
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+
+    @abstractmethod
+    async def delete(self, identifier: Any):
+        """
+        Delete the specified stored item
+
+        Args:
+            identifier: identifier of the item to delete
+
+        """
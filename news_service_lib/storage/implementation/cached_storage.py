@@ -0,0 +1,555 @@
+"""
+Read through cached storage implementation module
+"""
+from copy import deepcopy
+from logging import Logger
+from threading import Event, Thread, Lock
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional, Callable, Union
+
+from ..aggregation import Aggregation, GroupKey
+from ..bulk_save_result import BulkSaveResult
+from ..filter import Filter, MatchFilter, RangeFilter, InFilter, BooleanFilter
+from ..index_spec import IndexSpec
+from ..resume_token_store import MemoryResumeTokenStore
+from ..sort_direction import SortDirection
+from ..storage_watcher import StorageWatcher
+from ..ttl_lru_cache import TTLLRUCache, CacheStats
+from ..watcher_hub import WatcherHub, DEFAULT_RETRY_DELAY, MAX_RETRY_DELAY
+from .storage import Storage, KEYS_CHUNK_SIZE
+
+DEFAULT_MAX_SIZE = 1024
+DEFAULT_TTL = 60.0
+NOT_CACHED = object()
+WATCHER_CONSUMER = 'cached_storage'
+
+
+class CachedStorage(Storage):
+    """
+    Storage wrapper caching the results of the single item and the limited pages lookups, keyed on their set of
+    filters. The cached entries are evicted by LRU and TTL and invalidated by the writes done through the wrapper.
+    If the wrapped storage is a storage watcher, the entries are also invalidated by the inserts consumed from its
+    change stream. The cached results are copied, so the callers can not alter the cached items.
+    """
+
+    def __init__(self, storage: Storage, logger: Logger, max_size: int = DEFAULT_MAX_SIZE, ttl: float = DEFAULT_TTL):
+        """
+        Initialize the cached storage
+
+        Args:
+            storage: wrapped storage
+            logger: logger instance to use
+            max_size: maximum number of cached lookups
+            ttl: cached lookups time to live in seconds
+        """
+        self._storage = storage
+        self._logger = logger
+        self._cache = TTLLRUCache(max_size, ttl)
+        self._generation = 0
+        self._generation_lock = Lock()
+        self._watcher_thread: Optional[Thread] = None
+        self._watcher_stopped = Event()
+        self._resume_store = MemoryResumeTokenStore()
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Get the cache usage counters
+
+        Returns: cache hits, misses, evictions, expirations and invalidations
+
+        """
+        return self._cache.stats
+
+    @staticmethod
+    def _item_value(item: Any, key: str) -> Any:
+        """
+        Get the value of the specified key of the item
+
+        Args:
+            item: dictionary or object item
+            key: key of the value
+
+        Returns: item value for the key, None if not present
+
+        """
+        if isinstance(item, dict):
+            return item.get(key)
+        return getattr(item, key, None)
+
+    @classmethod
+    def _filters_match(cls, filters: Tuple[Filter, ...], item: Any) -> bool:
+        """
+        Check if the item could match the filters. The not evaluable filters are considered matching.
+
+        Args:
+            filters: filters to check
+            item: item to check
+
+        Returns: True if the item could match the filters, False otherwise
+
+        """
+        for filter_instance in filters:
+            if isinstance(filter_instance, BooleanFilter):
+                continue
+            try:
+                item_value = cls._item_value(item, filter_instance.key)
+                if isinstance(filter_instance, MatchFilter) and item_value != filter_instance.value:
+                    return False
+                if isinstance(filter_instance, InFilter) and item_value not in filter_instance.members:
+                    return False
+                if isinstance(filter_instance, RangeFilter):
+                    if filter_instance.lower is not None and not item_value > filter_instance.lower:
+                        return False
+                    if filter_instance.upper is not None and not item_value < filter_instance.upper:
+                        return False
+            except TypeError:
+                return False
+        return True
+
+    def _lookup(self, cache_key: Tuple, filters: List[Filter], loader: Callable[[], Any]) -> Any:
+        """
+        Get the cached result of the lookup, loading and caching it from the wrapped storage if not cached. The
+        lookups with not hashable filter values are not cached.
+
+        Args:
+            cache_key: key of the lookup, without the filters
+            filters: filters of the lookup
+            loader: function loading the lookup result from the wrapped storage
+
+        Returns: lookup result
+
+        """
+        filters = tuple(filters or ())
+        try:
+            cache_key = (frozenset(filters),) + cache_key
+            cached = self._cache.get(cache_key, NOT_CACHED)
+        except TypeError:
+            return loader()
+        if cached is not NOT_CACHED:
+            return deepcopy(cached[1])
+
+        generation = self._generation
+        result = loader()
+        with self._generation_lock:
+            if generation == self._generation:
+                self._cache.set(cache_key, (filters, deepcopy(result)))
+        return result
+
+    def invalidate(self, item: Any = None):
+        """
+        Invalidate the cached lookups which could include the specified item
+
+        Args:
+            item: new or updated item, all the lookups are invalidated if not specified
+
+        """
+        with self._generation_lock:
+            self._generation += 1
+            if item is None:
+                self._cache.invalidate()
+            else:
+                self._cache.invalidate(lambda _, value: self._filters_match(value[0], item))
+
+    def save(self, item: Any) -> Any:
+        """
+        Persist the specified item in the wrapped storage invalidating the lookups which could include it
+
+        Args:
+            item: item to persist
+
+        Returns: wrapped storage save result
+
+        """
+        result = self._storage.save(item)
+        self.invalidate(item)
+        return result
+
+    def save_many(self, items: List[Any], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items in the wrapped storage invalidating the lookups which could include them
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        result = self._storage.save_many(items, ordered=ordered)
+        for item in result.saved:
+            self.invalidate(item)
+        return result
+
+    def upsert(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Upsert the specified item in the wrapped storage. The lookups which could include the item are invalidated
+        if it is inserted, all the cached lookups are invalidated if an existing item is updated.
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if an existing item was updated
+
+        """
+        inserted = self._storage.upsert(item, key_fields)
+        self.invalidate(item if inserted else None)
+        return inserted
+
+    def upsert_many(self, items: List[Any], key_fields: List[str], ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified items in the wrapped storage invalidating all the cached lookups
+
+        Args:
+            items: items to persist
+            key_fields: fields identifying the items
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        result = self._storage.upsert_many(items, key_fields, ordered=ordered)
+        self.invalidate()
+        return result
+
+    def save_if_absent(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Persist the specified item in the wrapped storage if absent, invalidating the lookups which could include it
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if it was already stored
+
+        """
+        inserted = self._storage.save_if_absent(item, key_fields)
+        if inserted:
+            self.invalidate(item)
+        return inserted
+
+    def get(self, filters: List[Filter] = None,
+            sort_key: str = None,
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[Any]:
+        """
+        Get items from the storage. Only the lookups with limit are cached, the rest are read from the
+        wrapped storage.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: iterator to the items
+
+        """
+        if not limit:
+            return self._storage.get(filters, sort_key, sort_direction, limit=limit, offset=offset, after=after,
+                                     fields=fields)
+
+        cache_key = ('get', sort_key, sort_direction, limit, offset, after, tuple(fields) if fields else None)
+        return iter(self._lookup(cache_key, filters,
+                                 lambda: list(self._storage.get(filters, sort_key, sort_direction, limit=limit,
+                                                                offset=offset, after=after, fields=fields))))
+
+    def page_cursor(self, item: Any, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item from the wrapped storage
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+        return self._storage.page_cursor(item, sort_key)
+
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
+        """
+        Get a unique item which matches the filters, from the cache if the lookup is cached
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: persisted item matching filters
+
+        """
+        cache_key = ('get_one', tuple(fields) if fields else None)
+        return self._lookup(cache_key, filters, lambda: self._storage.get_one(filters, fields=fields))
+
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the items with any of the specified key values. Each value is looked up in the cache as a single item
+        lookup matching the value, and the not cached values are loaded from the wrapped storage at once and cached.
+        The lookups of not hashable values are not cached.
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each wrapped storage query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+        cache_key = ('get_one', tuple(fields) if fields else None)
+        items = dict()
+        not_cached = list()
+        values = list(values)
+        try:
+            unique_values = list(dict.fromkeys(values))
+        except TypeError:
+            return self._storage.get_many_by_key(key, values, fields=fields, chunk_size=chunk_size)
+        for value in unique_values:
+            filters = (MatchFilter(key, value),)
+            cached = self._cache.get((frozenset(filters),) + cache_key, NOT_CACHED)
+            if cached is NOT_CACHED:
+                not_cached.append(value)
+            elif cached[1] is not None:
+                items[value] = deepcopy(cached[1])
+        if not not_cached:
+            return items
+
+        generation = self._generation
+        loaded_items = self._storage.get_many_by_key(key, not_cached, fields=fields, chunk_size=chunk_size)
+        with self._generation_lock:
+            if generation == self._generation:
+                for value in not_cached:
+                    filters = (MatchFilter(key, value),)
+                    self._cache.set((frozenset(filters),) + cache_key, (filters, deepcopy(loaded_items.get(value))))
+        items.update(loaded_items)
+        return items
+
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> Any:
+        """
+        Get the wrapped storage plan of the query built from the specified parameters
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: wrapped storage query plan
+
+        """
+        return self._storage.explain(filters, sort_key, sort_direction, limit=limit, offset=offset, after=after)
+
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the items of the wrapped storage which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching items
+
+        """
+        return self._storage.count(filters)
+
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any item of the wrapped storage matches the filters, from the cache if a single item lookup with
+        the same filters is cached
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any item matches, False otherwise
+
+        """
+        try:
+            cached = self._cache.get((frozenset(filters or ()), 'get_one', None), NOT_CACHED)
+        except TypeError:
+            cached = NOT_CACHED
+        if cached is not NOT_CACHED:
+            return cached[1] is not None
+        return self._storage.exists(filters)
+
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the items of the wrapped storage
+
+        Args:
+            group_by: keys used to group the items
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+        return self._storage.aggregate(group_by, aggregations, filters)
+
+    def delete(self, identifier: Any):
+        """
+        Delete the specified item from the wrapped storage invalidating all the cached lookups
+
+        Args:
+            identifier: identifier of the item to delete
+
+        """
+        self._storage.delete(identifier)
+        self.invalidate()
+
+    def delete_many(self, filters: List[Filter]) -> int:
+        """
+        Delete the items which match the filters from the wrapped storage invalidating all the cached lookups
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted items
+
+        """
+        deleted = self._storage.delete_many(filters)
+        self.invalidate()
+        return deleted
+
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the first item which matches the filters in the wrapped storage invalidating all the cached lookups
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        updated = self._storage.update(filters, changes)
+        self.invalidate()
+        return updated
+
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the items which match the filters in the wrapped storage invalidating all the cached lookups
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        updated = self._storage.update_many(filters, changes)
+        self.invalidate()
+        return updated
+
+    def drop(self):
+        """
+        Drop the wrapped storage items invalidating all the cached lookups
+        """
+        self._storage.drop()
+        self.invalidate()
+
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the indexes existing in the wrapped storage
+
+        Returns: existing indexes specifications
+
+        """
+        return self._storage.existing_indexes()
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared indexes of the wrapped storage
+
+        Returns: names of the ensured indexes
+
+        """
+        return self._storage.ensure_indexes()
+
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the missing indexes advised by the wrapped storage. The lookups served from the cache are not
+        recorded by the wrapped storage advisor.
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
+        return self._storage.advise_indexes(create=create, min_usages=min_usages)
+
+    def _watch_inserts(self, hub: WatcherHub = None, retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Invalidate the cached lookups which could include the inserts consumed from the wrapped storage until the
+        watching is stopped. The inserts consumed directly are reopened with backoff when their stream fails,
+        resuming after the last consumed insert, and all the cached lookups are invalidated on each failure because
+        the inserts done meanwhile may not be resumed. The hub reopens its own stream, so the watching ends when the
+        hub is closed.
+
+        Args:
+            hub: hub fanning out the wrapped storage inserts, the inserts are consumed directly if not specified
+            retry_delay: seconds to wait before reopening the failed stream, doubled after each consecutive failure
+
+        """
+        current_delay = retry_delay
+        while not self._watcher_stopped.is_set():
+            try:
+                if hub is not None:
+                    inserts = hub.subscribe()
+                else:
+                    inserts = self._storage.consume_inserts(resume_store=self._resume_store, consumer=WATCHER_CONSUMER)
+                for inserted_item in inserts:
+                    current_delay = retry_delay
+                    self.invalidate(inserted_item)
+                    if self._watcher_stopped.is_set():
+                        return
+                if hub is not None:
+                    return
+                self._logger.warning('Inserts stream of the cached storage ended, reopening it')
+            except Exception as ex:
+                self._logger.error(f'Error consuming the inserts to invalidate the cache, retrying in {current_delay} '
+                                   f'seconds: {ex}')
+                self.invalidate()
+            self._watcher_stopped.wait(current_delay)
+            current_delay = min(current_delay * 2, MAX_RETRY_DELAY)
+
+    def start_watching(self, hub: WatcherHub = None, retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Start invalidating the cached lookups with the inserts consumed from the wrapped storage in a
+        background thread
+
+        Args:
+            hub: hub fanning out the wrapped storage inserts, to share its stream with other consumers
+            retry_delay: seconds to wait before reopening the failed stream, doubled after each consecutive failure
+
+        """
+        if hub is None and not isinstance(self._storage, StorageWatcher):
+            raise TypeError(f'{self._storage.__class__.__name__} is not a storage watcher')
+        if self._watcher_thread is None or not self._watcher_thread.is_alive():
+            self._watcher_stopped.clear()
+            self._watcher_thread = Thread(target=self._watch_inserts, args=(hub, retry_delay),
+                                          name='cached_storage_watcher', daemon=True)
+            self._watcher_thread.start()
+
+    def stop_watching(self):
+        """
+        Stop invalidating the cached lookups with the consumed inserts. The blocking streams are stopped when they
+        deliver their next insert.
+        """
+        self._watcher_stopped.set()
@@ -0,0 +1,1019 @@
+"""
+In memory storage implementation module
+"""
+from collections import deque
+from copy import deepcopy
+from itertools import chain, islice
+from logging import Logger
+from threading import RLock, Condition
+from time import monotonic
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from bson import ObjectId
+
+from ..aggregation import Aggregation, AggregationOperation, GroupKey, group_key
+from ..bulk_save_result import BulkSaveResult, BulkSaveError
+from ..exceptions import StorageError, StorageIntegrityError
+from ..filter import Filter, MatchFilter, RangeFilter, InFilter, compile_filters, normalize_filters
+from ..filter.parsers.memory_filter_parser import MemoryFilterParser, item_value, MISSING
+from ..index_advisor import IndexAdvisor
+from ..index_spec import IndexSpec
+from ..memory_index import HashIndex, SortedIndex, sort_value
+from ..page_cursor import encode_cursor, decode_cursor
+from ..resume_token_store import ResumeTokenStore
+from ..sort_direction import SortDirection
+from ..storage_watcher import StorageWatcher, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+from .storage import Storage, KEYS_CHUNK_SIZE
+
+DEFAULT_INSERT_LOG_SIZE = 10000
+IDENTIFIER_KEY = '_id'
+
+
+class MemoryStorage(Storage, StorageWatcher):
+    """
+    Thread safe in process storage of dictionary items identified by their _id key, with the same semantics as
+    the MongoDB storage. The equality filters are served by hash indexes and the range filters and sort keys by
+    sorted indexes, created for the declared indexes keys and, if auto indexing is enabled, for the keys of the
+    queries. The stored items are copies of the saved ones and they are never modified in place, the updates
+    replace them.
+    """
+
+    def __init__(self, logger: Logger, name: str = 'memory', indexes: List[IndexSpec] = None,
+                 auto_index: bool = True, index_advisor: bool = False,
+                 insert_log_size: int = DEFAULT_INSERT_LOG_SIZE):
+        """
+        Initialize the in memory storage
+
+        Args:
+            logger: logger instance to use
+            name: name of the storage, used as default inserts consumer name
+            indexes: indexes declared for the storage, created with ensure_indexes
+            auto_index: True to index the keys of the queries not indexed, False to scan the items instead
+            index_advisor: True to record the queries keys in order to advise the missing indexes
+            insert_log_size: number of inserts kept to resume consuming the inserts
+        """
+        self._logger = logger
+        self._name = name
+        self._indexes = list(indexes or list())
+        self._auto_index = auto_index
+        self.index_advisor: Optional[IndexAdvisor] = IndexAdvisor() if IndexAdvisor.enabled(index_advisor) else None
+
+        self._lock = RLock()
+        self._inserts_condition = Condition(self._lock)
+        self._items: Dict[Any, dict] = dict()
+        self._positions: Dict[Any, int] = dict()
+        self._next_position = 0
+        self._hash_indexes: Dict[str, HashIndex] = dict()
+        self._sorted_indexes: Dict[str, SortedIndex] = {IDENTIFIER_KEY: SortedIndex(IDENTIFIER_KEY)}
+        self._ensured_indexes: List[IndexSpec] = list()
+        self._unique_values: Dict[IndexSpec, Dict[Tuple, Any]] = dict()
+        self._insert_log = deque(maxlen=insert_log_size)
+        self._insert_count = 0
+
+    def __len__(self) -> int:
+        """
+        Get the number of stored items
+
+        Returns: number of stored items
+
+        """
+        return len(self._items)
+
+    def _hash_index(self, key: str) -> Optional[HashIndex]:
+        """
+        Get the hash index of the key, creating it if auto indexing is enabled
+
+        Args:
+            key: indexed key
+
+        Returns: hash index of the key, None if it is not indexed
+
+        """
+        if key not in self._hash_indexes and self._auto_index:
+            hash_index = HashIndex(key)
+            for identifier, item in self._items.items():
+                hash_index.add(identifier, item)
+            self._hash_indexes[key] = hash_index
+        return self._hash_indexes.get(key)
+
+    def _sorted_index(self, key: str) -> Optional[SortedIndex]:
+        """
+        Get the sorted index of the key, creating it if auto indexing is enabled
+
+        Args:
+            key: indexed key
+
+        Returns: sorted index of the key, None if it is not indexed
+
+        """
+        if key not in self._sorted_indexes and self._auto_index:
+            sorted_index = SortedIndex(key)
+            for identifier, item in self._items.items():
+                sorted_index.add(identifier, item)
+            self._sorted_indexes[key] = sorted_index
+        return self._sorted_indexes.get(key)
+
+    @staticmethod
+    def _unique_key(index: IndexSpec, item: dict) -> Tuple:
+        """
+        Get the values of the unique index keys of the item
+
+        Args:
+            index: unique index
+            item: indexed item
+
+        Returns: tuple with the item values of the index keys
+
+        """
+        return tuple(None if value is MISSING else value for value in (item_value(item, key) for key in index.fields))
+
+    def _check_unique(self, item: dict, identifier: Any = MISSING):
+        """
+        Check the item does not duplicate the unique keys of another stored item
+
+        Args:
+            item: item to check
+            identifier: identifier of the stored item replaced by the checked one, if any
+
+        """
+        if identifier is MISSING and item[IDENTIFIER_KEY] in self._items:
+            raise StorageIntegrityError(f'Duplicated identifier {item[IDENTIFIER_KEY]}')
+        for index, unique_values in self._unique_values.items():
+            duplicated = unique_values.get(self._unique_key(index, item), identifier)
+            if duplicated != identifier:
+                raise StorageIntegrityError(f'Duplicated key {index.fields} of the item {item[IDENTIFIER_KEY]}')
+
+    def _index(self, identifier: Any, item: dict):
+        """
+        Add the item to the storage indexes. If the item can not be indexed, because its values can not be sorted
+        with the values of the indexed items, it is removed from the indexes it was already added to.
+
+        Args:
+            identifier: item identifier
+            item: item to index
+
+        """
+        indexed = list()
+        try:
+            for key_index in chain(self._hash_indexes.values(), self._sorted_indexes.values()):
+                key_index.add(identifier, item)
+                indexed.append(key_index)
+        except TypeError as ex:
+            for key_index in indexed:
+                key_index.remove(identifier, item)
+            raise StorageError(f'Item {identifier} values can not be indexed with the stored items values: {ex}')
+        for index, unique_values in self._unique_values.items():
+            unique_values[self._unique_key(index, item)] = identifier
+
+    def _unindex(self, identifier: Any, item: dict):
+        """
+        Remove the item from the storage indexes
+
+        Args:
+            identifier: item identifier
+            item: indexed item
+
+        """
+        for hash_index in self._hash_indexes.values():
+            hash_index.remove(identifier, item)
+        for sorted_index in self._sorted_indexes.values():
+            sorted_index.remove(identifier, item)
+        for index, unique_values in self._unique_values.items():
+            unique_values.pop(self._unique_key(index, item), None)
+
+    def _insert(self, item: dict) -> dict:
+        """
+        Store a copy of the item, assigning it an identifier if it does not have one
+
+        Args:
+            item: item to store
+
+        Returns: stored item
+
+        """
+        if IDENTIFIER_KEY not in item:
+            item[IDENTIFIER_KEY] = ObjectId()
+        stored_item = deepcopy(item)
+        self._check_unique(stored_item)
+        identifier = stored_item[IDENTIFIER_KEY]
+        self._index(identifier, stored_item)
+        self._items[identifier] = stored_item
+        self._positions[identifier] = self._next_position
+        self._next_position += 1
+        self._insert_log.append(stored_item)
+        self._insert_count += 1
+        self._inserts_condition.notify_all()
+        return stored_item
+
+    def _replace(self, identifier: Any, changes: dict):
+        """
+        Replace the stored item with a copy updated with the specified changes
+
+        Args:
+            identifier: identifier of the stored item
+            changes: new values of the item fields
+
+        """
+        stored_item = self._items[identifier]
+        updated_item = {**stored_item, **deepcopy(changes), IDENTIFIER_KEY: identifier}
+        self._check_unique(updated_item, identifier)
+        self._unindex(identifier, stored_item)
+        try:
+            self._index(identifier, updated_item)
+        except StorageError:
+            self._index(identifier, stored_item)
+            raise
+        self._items[identifier] = updated_item
+
+    def _remove(self, identifier: Any) -> bool:
+        """
+        Remove the identified item
+
+        Args:
+            identifier: identifier of the item
+
+        Returns: True if the item was stored, False otherwise
+
+        """
+        stored_item = self._items.pop(identifier, None)
+        if stored_item is None:
+            return False
+        del self._positions[identifier]
+        self._unindex(identifier, stored_item)
+        return True
+
+    def save(self, item: dict):
+        """
+        Store a copy of the specified item, setting its _id if not present
+
+        Args:
+            item: item to persist
+
+        """
+        with self._lock:
+            self._insert(item)
+
+    def _bulk_write(self, items: List[dict], ordered: bool, write: Callable[[dict], Any]) -> BulkSaveResult:
+        """
+        Write the specified items one by one collecting the per item errors
+
+        Args:
+            items: items to write
+            ordered: True to stop writing at the first failing item, False otherwise
+            write: function writing a single item
+
+        Returns: result with the written items and the per item errors
+
+        """
+        result = BulkSaveResult()
+        with self._lock:
+            for index, item in enumerate(items):
+                if ordered and result.errors:
+                    result.errors.append(BulkSaveError(index, item, StorageError(
+                        'Item not processed because a previous item failed')))
+                    continue
+                try:
+                    write(item)
+                    result.saved.append(item)
+                except StorageError as serr:
+                    result.errors.append(BulkSaveError(index, item, serr))
+        return result
+
+    def save_many(self, items: List[dict], ordered: bool = False) -> BulkSaveResult:
+        """
+        Store copies of the specified items
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        return self._bulk_write(items, ordered, self._insert)
+
+    def _first_match(self, key_fields: List[str], item: dict) -> Optional[Any]:
+        """
+        Get the identifier of the first stored item with the same key fields values as the specified item
+
+        Args:
+            key_fields: fields identifying the item
+            item: item to look up
+
+        Returns: identifier of the stored item, None if there is no one
+
+        """
+        key_filters = [MatchFilter(key, item.get(key)) for key in key_fields]
+        return next(iter(self._find(key_filters)), None)
+
+    def _upsert(self, keyed_item: Tuple[dict, List[str]], update: bool = True) -> bool:
+        """
+        Insert the item or update the stored item with the same key fields values
+
+        Args:
+            keyed_item: item to upsert and fields identifying it
+            update: True to update the stored item, False to leave it unchanged
+
+        Returns: True if the item was inserted, False otherwise
+
+        """
+        item, key_fields = keyed_item
+        identifier = self._first_match(key_fields, item)
+        if identifier is None:
+            self._insert(dict(item))
+            return True
+        if update:
+            self._replace(identifier, {key: value for key, value in item.items() if key != IDENTIFIER_KEY})
+        return False
+
+    def upsert(self, item: dict, key_fields: List[str]) -> bool:
+        """
+        Store a copy of the item, updating the fields of the stored item with the same key fields values if any
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if an existing item was updated
+
+        """
+        with self._lock:
+            return self._upsert((item, key_fields))
+
+    def upsert_many(self, items: List[dict], key_fields: List[str], ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified items
+
+        Args:
+            items: items to persist
+            key_fields: fields identifying the items
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        result = self._bulk_write([(item, key_fields) for item in items], ordered, self._upsert)
+        result.saved = [item for item, _ in result.saved]
+        for bulk_error in result.errors:
+            bulk_error.item = bulk_error.item[0]
+        return result
+
+    def save_if_absent(self, item: dict, key_fields: List[str]) -> bool:
+        """
+        Store a copy of the item only if there is no stored item with the same key fields values
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if it was already stored
+
+        """
+        with self._lock:
+            return self._upsert((item, key_fields), update=False)
+
+    @staticmethod
+    def _predicate(filters: List[Filter] = None) -> Optional[Callable[[dict], bool]]:
+        """
+        Get the predicate of the filters, binding the filter values to the memoized filters plan
+
+        Args:
+            filters: filters to parse
+
+        Returns: predicate matching the items which match the filters, None if there are no filters
+
+        """
+        if not filters:
+            return None
+        plan = compile_filters(filters, MemoryFilterParser)
+        return MemoryFilterParser.bind(plan.query, plan.values(filters))
+
+    def _candidates(self, filters: List[Filter] = None) -> Optional[List[Any]]:
+        """
+        Get the identifiers of the items which could match the filters using the indexes. The equality and in
+        filters lookups are intersected, if there is none the first range filter with index is used.
+
+        Args:
+            filters: filters to look up
+
+        Returns: identifiers of the candidate items, None if no filter can be served by an index
+
+        """
+        filters = normalize_filters(filters)
+        candidates = None
+        for filter_instance in filters:
+            if isinstance(filter_instance, MatchFilter):
+                hash_index = self._hash_index(filter_instance.key)
+                if hash_index is not None:
+                    identifiers = hash_index.lookup(filter_instance.value)
+                    candidates = identifiers if candidates is None else candidates & identifiers
+            elif isinstance(filter_instance, InFilter):
+                hash_index = self._hash_index(filter_instance.key)
+                if hash_index is not None:
+                    identifiers = set().union(*(hash_index.lookup(value) for value in filter_instance.members))
+                    candidates = identifiers if candidates is None else candidates & identifiers
+        if candidates is not None:
+            return sorted(candidates, key=self._positions.get)
+
+        for filter_instance in filters:
+            if isinstance(filter_instance, RangeFilter):
+                sorted_index = self._sorted_index(filter_instance.key)
+                if sorted_index is not None:
+                    return sorted(sorted_index.range(filter_instance.lower, filter_instance.upper),
+                                  key=self._positions.get)
+        return None
+
+    def _find(self, filters: List[Filter] = None) -> Iterator[Any]:
+        """
+        Find the identifiers of the items which match the filters, in insertion order
+
+        Args:
+            filters: filters to apply
+
+        Returns: iterator to the matching items identifiers
+
+        """
+        predicate = self._predicate(filters)
+        candidates = self._candidates(filters)
+        identifiers = list(self._items) if candidates is None else candidates
+        if predicate is None:
+            return iter(identifiers)
+        return (identifier for identifier in identifiers if predicate(self._items[identifier]))
+
+    def _sorted_identifiers(self, filters: List[Filter], sort_key: str, reverse: bool) -> Iterator[Any]:
+        """
+        Get the identifiers of the candidate items of the filters sorted by the sort key and by identifier
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the items
+            reverse: True to sort descending, False otherwise
+
+        Returns: iterator to the sorted identifiers
+
+        """
+        candidates = self._candidates(filters)
+        if candidates is None:
+            sorted_index = self._sorted_index(sort_key)
+            if sorted_index is not None:
+                return sorted_index.iterate(reverse)
+            candidates = self._items
+        return iter(sorted(candidates, key=lambda identifier: self._sort_entry(identifier, sort_key),
+                           reverse=reverse))
+
+    def _sort_entry(self, identifier: Any, sort_key: str) -> Tuple:
+        """
+        Get the sorting entry of the identified item
+
+        Args:
+            identifier: item identifier
+            sort_key: key used to sort the items
+
+        Returns: sortable sort key value and identifier
+
+        """
+        return sort_value(item_value(self._items[identifier], sort_key)), identifier
+
+    @staticmethod
+    def _project(item: dict, fields: List[str] = None, sort_key: str = None) -> dict:
+        """
+        Get a copy of the item with only the specified fields, the identifier and the sort key
+
+        Args:
+            item: stored item
+            fields: fields to include, all the fields if not specified
+            sort_key: key used to sort the results
+
+        Returns: projected copy of the item
+
+        """
+        if not fields:
+            return dict(item)
+        keys = {IDENTIFIER_KEY, *(field.split('.')[0] for field in fields)}
+        if sort_key:
+            keys.add(sort_key.split('.')[0])
+        return {key: value for key, value in item.items() if key in keys}
+
+    def get(self, filters: List[Filter] = None,
+            sort_key: str = None,
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[dict]:
+        """
+        Get copies of the items which match the specified filters. The results are sorted by identifier after the
+        sort key when sorted or paginated, in insertion order otherwise.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: iterator to the matching items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters, sort_key, sort_direction)
+        reverse = sort_direction == SortDirection.DESC
+
+        with self._lock:
+            predicate = self._predicate(filters)
+            if sort_key:
+                identifiers = self._sorted_identifiers(filters, sort_key, reverse)
+            elif limit or after:
+                identifiers = self._sorted_identifiers(filters, IDENTIFIER_KEY, reverse)
+            else:
+                identifiers = self._find(filters)
+                predicate = None
+
+            if after is not None:
+                after_values = decode_cursor(after)
+                if sort_key and len(after_values) != 2:
+                    raise ValueError(f'Page cursor {after} not valid for sorting by {sort_key}')
+                after_entry = (sort_value(after_values[0]), after_values[1]) if sort_key \
+                    else (sort_value(after_values[-1]), after_values[-1])
+                entry_key = sort_key or IDENTIFIER_KEY
+
+                def after_cursor(identifier: Any) -> bool:
+                    """
+                    Check if the identified item is after the page cursor
+                    """
+                    entry = self._sort_entry(identifier, entry_key)
+                    return entry < after_entry if reverse else entry > after_entry
+                identifiers = filter(after_cursor, identifiers)
+
+            if predicate is not None:
+                identifiers = (identifier for identifier in identifiers if predicate(self._items[identifier]))
+            identifiers = islice(identifiers, offset or 0, (offset or 0) + limit if limit else None)
+            items = [self._project(self._items[identifier], fields, sort_key) for identifier in identifiers]
+
+        for item in items:
+            yield item
+
+    def page_cursor(self, item: dict, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, used to get the items after it
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+        if sort_key:
+            return encode_cursor(item[sort_key], item[IDENTIFIER_KEY])
+        return encode_cursor(item[IDENTIFIER_KEY])
+
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Optional[dict]:
+        """
+        Get a copy of the first stored item which matches the filters
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: persisted item matching filters, None if there is no one
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            identifier = next(self._find(filters), None)
+            return self._project(self._items[identifier], fields) if identifier is not None else None
+
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, dict]:
+        """
+        Get copies of the items with any of the specified key values, served by the key hash index
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each lookup
+
+        Returns: items by key value, the values without item are not included
+
+        """
+        fields = list(fields) + [key] if fields and key not in fields else fields
+        items = dict()
+        for in_filter in InFilter.chunks(key, values, chunk_size):
+            for item in self.get([in_filter], fields=fields):
+                item_key_value = item_value(item, key)
+                items.setdefault(None if item_key_value is MISSING else item_key_value, item)
+        return items
+
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> dict:
+        """
+        Get the lookup plan of the query built from the specified parameters: the indexes used to find the
+        candidate items, the number of examined and matching items and how the items are sorted. The indexes are
+        selected as when getting the items, so the auto indexes of the query keys are created.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: lookup plan description
+
+        """
+        with self._lock:
+            normalized_filters = normalize_filters(filters)
+            candidates = self._candidates(normalized_filters)
+            hash_keys = [filter_instance.key for filter_instance in normalized_filters
+                         if isinstance(filter_instance, (MatchFilter, InFilter)) and filter_instance.key in
+                         self._hash_indexes]
+            range_keys = [filter_instance.key for filter_instance in normalized_filters
+                          if isinstance(filter_instance, RangeFilter) and filter_instance.key in self._sorted_indexes]
+            if hash_keys:
+                index = dict(type='hash', keys=list(dict.fromkeys(hash_keys)))
+            elif candidates is not None:
+                index = dict(type='sorted', keys=range_keys[:1])
+            else:
+                index = None
+            sort_key = sort_key or (IDENTIFIER_KEY if limit or after else None)
+            if sort_key is None:
+                sort = None
+            elif candidates is None and self._sorted_index(sort_key) is not None:
+                sort = 'index'
+            else:
+                sort = 'memory'
+            return dict(index=index, examined=len(self._items) if candidates is None else len(candidates),
+                        matched=sum(1 for _ in self._find(normalized_filters)), sort=sort,
+                        sort_direction=(sort_direction or SortDirection.ASC).name if sort else None,
+                        offset=offset, limit=limit)
+
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the items which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            if not filters:
+                return len(self._items)
+            return sum(1 for _ in self._find(filters))
+
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any item matches the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any item matches, False otherwise
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            return next(self._find(filters), None) is not None
+
+    @staticmethod
+    def _group_value(group: GroupKey, item: dict) -> Any:
+        """
+        Get the group key value of the item
+
+        Args:
+            group: group key
+            item: grouped item
+
+        Returns: item value of the group key, rounded down to its bucket if the bucket size is specified
+
+        """
+        value = item_value(item, group.key)
+        if value is MISSING or value is None:
+            return None
+        if group.bucket_size:
+            return value - value % group.bucket_size
+        return value
+
+    @staticmethod
+    def _aggregate_values(aggregation: Aggregation, items: List[dict]) -> Any:
+        """
+        Compute the aggregation of the items, ignoring the null and not numeric values like MongoDB does
+
+        Args:
+            aggregation: aggregation to compute
+            items: items of the group
+
+        Returns: aggregated value
+
+        """
+        if aggregation.operation == AggregationOperation.COUNT:
+            return len(items)
+        values = [value for value in (item_value(item, aggregation.key) for item in items)
+                  if value is not MISSING and value is not None]
+        if aggregation.operation == AggregationOperation.SUM:
+            return sum(value for value in values if isinstance(value, (int, float)))
+        if not values:
+            return None
+        if aggregation.operation == AggregationOperation.AVG:
+            numbers = [value for value in values if isinstance(value, (int, float))]
+            return sum(numbers) / len(numbers) if numbers else None
+        if aggregation.operation == AggregationOperation.MIN:
+            return min(values)
+        return max(values)
+
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the items which match the filters grouped by the specified keys
+
+        Args:
+            group_by: keys used to group the items
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+        groups = [group_key(group) for group in group_by]
+        grouped_items: Dict[Tuple, List[dict]] = dict()
+        with self._lock:
+            for identifier in self._find(filters):
+                item = self._items[identifier]
+                group_values = tuple(self._group_value(group, item) for group in groups)
+                grouped_items.setdefault(group_values, list()).append(item)
+
+        results = list()
+        for group_values in sorted(grouped_items, key=lambda values: tuple(sort_value(value) for value in values)):
+            result = {group.key: value for group, value in zip(groups, group_values)}
+            for aggregation in aggregations:
+                result[aggregation.alias] = self._aggregate_values(aggregation, grouped_items[group_values])
+            results.append(result)
+        return results
+
+    def delete(self, identifier: Any):
+        """
+        Delete the identified item
+
+        Args:
+            identifier: identifier of the item
+
+        """
+        with self._lock:
+            self._remove(identifier)
+
+    def delete_many(self, filters: List[Filter]) -> int:
+        """
+        Delete the items which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            identifiers = list(self._find(filters))
+            for identifier in identifiers:
+                self._remove(identifier)
+            return len(identifiers)
+
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Set the specified fields of the first item which matches the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            identifier = next(self._find(filters), None)
+            if identifier is None:
+                return 0
+            self._replace(identifier, changes)
+            return 1
+
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Set the specified fields of all the items which match the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._lock:
+            identifiers = list(self._find(filters))
+            for identifier in identifiers:
+                self._replace(identifier, changes)
+            return len(identifiers)
+
+    def drop(self):
+        """
+        Remove all the items, keeping the indexes and the unique constraints empty
+        """
+        with self._lock:
+            self._items.clear()
+            self._positions.clear()
+            self._hash_indexes = {key: HashIndex(key) for key in self._hash_indexes}
+            self._sorted_indexes = {key: SortedIndex(key) for key in self._sorted_indexes}
+            self._unique_values = {index: dict() for index in self._unique_values}
+
+    def _inserts_after(self, position: int, limit: int = None) -> Tuple[List[dict], int]:
+        """
+        Get the logged inserts after the specified position
+
+        Args:
+            position: number of inserts already consumed
+            limit: maximum number of inserts to get
+
+        Returns: inserted items and position of the last one
+
+        """
+        oldest_position = self._insert_count - len(self._insert_log)
+        if position < oldest_position:
+            self._logger.warning(f'{oldest_position - position} inserts of {self._name} not available to resume')
+            position = oldest_position
+        start = position - oldest_position
+        inserted_items = list(islice(self._insert_log, start, start + limit if limit else None))
+        return inserted_items, position + len(inserted_items)
+
+    def _resume_position(self, resume_store: Optional[ResumeTokenStore], consumer: str) -> int:
+        """
+        Get the position to resume consuming the inserts from
+
+        Args:
+            resume_store: store of the consumers checkpoints
+            consumer: name of the consumer
+
+        Returns: checkpointed position of the consumer, the current position if it has no checkpoint
+
+        """
+        resume_token = resume_store.load(consumer) if resume_store is not None else None
+        return self._insert_count if resume_token is None else resume_token
+
+    def consume_inserts(self, fields: List[str] = None,
+                        resume_store: ResumeTokenStore = None,
+                        consumer: str = None) -> Iterator[dict]:
+        """
+        Consume the inserts, blocking until new items are inserted. The resume token of each insert is its
+        position in the inserts log.
+
+        Args:
+            fields: fields of the inserted items to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed inserts and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the storage name if not specified
+
+        Returns: iterator to the inserted items
+
+        """
+        consumer = consumer or self._name
+        with self._lock:
+            position = self._resume_position(resume_store, consumer)
+        while True:
+            with self._inserts_condition:
+                self._inserts_condition.wait_for(lambda: self._insert_count > position)
+                inserted_items, last_position = self._inserts_after(position)
+            position = last_position - len(inserted_items)
+            for inserted_item in inserted_items:
+                yield self._project(inserted_item, fields)
+                position += 1
+                if resume_store is not None:
+                    resume_store.save(consumer, position)
+
+    def consume_insert_batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                               batch_window: float = DEFAULT_BATCH_WINDOW,
+                               fields: List[str] = None,
+                               resume_store: ResumeTokenStore = None,
+                               consumer: str = None) -> Iterator[List[dict]]:
+        """
+        Consume the inserts in batches, bounded by size and by time window. The position of the last insert of
+        each batch is checkpointed once the batch is processed, when the next batch is requested.
+
+        Args:
+            batch_size: maximum number of inserted items of a batch
+            batch_window: maximum seconds to wait for the inserted items of a batch
+            fields: fields of the inserted items to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed batches and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the storage name if not specified
+
+        Returns: iterator to the not empty batches of inserted items
+
+        """
+        consumer = consumer or self._name
+        with self._lock:
+            position = self._resume_position(resume_store, consumer)
+        while True:
+            batch = list()
+            deadline = monotonic() + batch_window
+            with self._inserts_condition:
+                while len(batch) < batch_size:
+                    if self._insert_count > position:
+                        inserted_items, position = self._inserts_after(position, batch_size - len(batch))
+                        batch.extend(self._project(inserted_item, fields) for inserted_item in inserted_items)
+                        continue
+                    remaining = deadline - monotonic()
+                    if remaining <= 0:
+                        break
+                    self._inserts_condition.wait(remaining)
+            if batch:
+                yield batch
+                if resume_store is not None:
+                    resume_store.save(consumer, position)
+
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the existing indexes, including the identifier index and the keys indexed automatically
+
+        Returns: existing indexes specifications
+
+        """
+        with self._lock:
+            existing_indexes = [IndexSpec.of(IDENTIFIER_KEY, unique=True, name='_id_')] + list(self._ensured_indexes)
+            indexed_keys = set(self._hash_indexes) | set(self._sorted_indexes)
+            declared_keys = {index.fields[0] for index in existing_indexes}
+            existing_indexes.extend(IndexSpec.of(key) for key in sorted(indexed_keys - declared_keys))
+            return existing_indexes
+
+    def _ensure_index(self, index: IndexSpec):
+        """
+        Create the hash and sorted indexes of the index keys and the uniqueness constraint of the unique index
+
+        Args:
+            index: index to create
+
+        """
+        if index.unique:
+            unique_values = dict()
+            for identifier, item in self._items.items():
+                unique_key = self._unique_key(index, item)
+                if unique_key in unique_values:
+                    raise StorageIntegrityError(f'Duplicated key {index.fields} of the item {identifier}')
+                unique_values[unique_key] = identifier
+            self._unique_values[index] = unique_values
+        for key in index.fields:
+            for indexes, index_class in ((self._hash_indexes, HashIndex), (self._sorted_indexes, SortedIndex)):
+                if key not in indexes:
+                    key_index = index_class(key)
+                    for identifier, item in self._items.items():
+                        key_index.add(identifier, item)
+                    indexes[key] = key_index
+        self._ensured_indexes.append(index)
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared indexes not created yet
+
+        Returns: names of the ensured indexes
+
+        """
+        with self._lock:
+            for index in self._indexes:
+                if index not in self._ensured_indexes:
+                    self._ensure_index(index)
+            return [index.name or '_'.join(index.fields) for index in self._indexes]
+
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the indexes needed by the queries recorded by the index advisor which do not exist
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
+        if self.index_advisor is None:
+            raise ValueError('Index advisor not enabled')
+        missing_indexes = self.index_advisor.advise(self.existing_indexes(), self._logger, self._name,
+                                                    min_usages=min_usages)
+        if create and missing_indexes:
+            self._indexes.extend(missing_indexes)
+            self.ensure_indexes()
+        return missing_indexes
@@ -2,17 +2,35 @@
 MongoDB storage implementation module
 """
 import functools
+from copy import copy
 from logging import Logger
-from typing import Callable, Any, Iterator, List
+from time import monotonic
+from typing import Callable, Any, Dict, Iterable, Iterator, List, Tuple, Optional, Union
 
 import pymongo
-from pymongo.errors import ServerSelectionTimeoutError
-
+from bson import SON
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from ...config import config_bool
+from ..aggregation import Aggregation, AggregationOperation, GroupKey, group_key
+from ..bulk_save_result import BulkSaveResult
+from ..filter.compiler import compile_filters
 from ..filter.filter import Filter
+from ..filter.in_filter import InFilter
 from ..filter.parsers.mongo_filter_parser import MongoFilterParser
+from ..index_advisor import IndexAdvisor
+from ..index_spec import IndexSpec
+from ..mongo_utils import bulk_save_result, read_preference as parse_read_preference, \
+    write_concern as parse_write_concern, shared_mongo_client, init_replicaset as initiate_replicaset
+from ..page_cursor import encode_cursor, decode_cursor
+from ..resume_token_store import ResumeTokenStore
+from ..slow_operation import SlowOperationHook, instrumented, slow_operation_hook
 from ..sort_direction import SortDirection
-from .storage import Storage
-from ..storage_watcher import StorageWatcher
+from .storage import Storage, KEYS_CHUNK_SIZE
+from ..storage_watcher import StorageWatcher, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+
+EXPLAIN_VERBOSITY = 'executionStats'
 
 
 def check_collection(function: Callable) -> Any:
@@ -51,56 +69,160 @@ class MongoStorage(Storage, StorageWatcher):
     MongoDB storage implementation
     """
 
-    def __init__(self, members: str, rsname: str, database: str, logger: Logger):
+    def __init__(self, members: str, rsname: str, database: str, logger: Logger, index_advisor: bool = False,
+                 read_preference: str = None, max_staleness: int = None, w: Union[int, str] = None, j: bool = None,
+                 wtimeout: int = None, slow_operation_threshold: float = None, explain_slow_operations: bool = False,
+                 init_replicaset: bool = False):
         """
-        Initialize a mongo storage client
+        Initialize a mongo storage client over the process wide client of the replicaset, which connects lazily
 
         Args:
             members: mongodb replicaset members address
             rsname: mongodb replicaset name
             database: mongodb database name
+            index_advisor: True to record the queries keys in order to advise the missing indexes
+            read_preference: read preference mode name, primary if not specified
+            max_staleness: maximum replication lag in seconds of the secondaries to read from
+            w: number of members or tag which should acknowledge the writes
+            j: True to wait for the writes to be journaled
+            wtimeout: maximum milliseconds to wait for the writes acknowledgment
+            slow_operation_threshold: seconds above which the operations are reported as slow, not reported if not
+            specified
+            explain_slow_operations: True to explain the slow queries to report the number of examined documents
+            init_replicaset: True to initiate the replicaset before using it, for the development deployments
         """
         members = members.split(',')
         self._logger = logger
-        self._init_replicaset(members, rsname)
-        self._mongo_client = pymongo.MongoClient(members[0], replicaset=rsname, connect=True)
+        if config_bool(init_replicaset):
+            initiate_replicaset(members, rsname, logger)
+        self._mongo_client = shared_mongo_client(members, rsname)
         self._database = self._mongo_client[database]
+        self._read_preference = parse_read_preference(read_preference, max_staleness)
+        self._write_concern = parse_write_concern(w, j, wtimeout)
+        self._index_advisor_enabled = IndexAdvisor.enabled(index_advisor)
+        self.index_advisor: Optional[IndexAdvisor] = None
+        self._indexes: List[IndexSpec] = list()
+        self.slow_operation_hook: Optional[SlowOperationHook] = slow_operation_hook(logger, slow_operation_threshold,
+                                                                                     explain_slow_operations)
         self.collection = None
 
-    def _init_replicaset(self, members: List[str], rsname: str):
+    @check_collection
+    @instrumented
+    def save(self, item: dict):
         """
-        Initialize the mongodb replicaset
+        Persist the specified item
 
         Args:
-            members: replicaset members addresses
-            rsname: replicaset name
+            item: item to persist
 
         """
+        self.collection.insert_one(item)
+
+    @check_collection
+    @instrumented
+    def save_many(self, items: List[dict], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items with a single bulk insert
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        if not items:
+            return BulkSaveResult()
+
         try:
-            first_host = members[0].split(':')[0]
-            first_port = int(members[0].split(':')[1])
-            mongo_admin_client = pymongo.MongoClient(first_host, first_port, connect=True)
-            rs_config = {'_id': rsname, 'members': [{'_id': 0, 'host': members[0]}, {'_id': 1, 'host': members[1]}]}
-            mongo_admin_client.admin.command("replSetInitiate", rs_config)
-            mongo_admin_client.close()
-        except Exception as ex:
-            self._logger.info('Replicaset already initialized %s', str(ex))
+            self.collection.insert_many(items, ordered=ordered)
+            return bulk_save_result(items, ordered)
+        except BulkWriteError as bwex:
+            return bulk_save_result(items, ordered, bwex)
+
+    @staticmethod
+    def _upsert_operation(item: dict, key_fields: List[str], update: bool = True) -> Tuple[dict, dict]:
+        """
+        Get the upsert query and update document of the specified item
+
+        Args:
+            item: item to upsert
+            key_fields: fields identifying the item
+            update: True to update the fields of the existing item, False to only set them on insert
+
+        Returns: query matching the item by its key fields and update document
+
+        """
+        query = {key: item.get(key) for key in key_fields}
+        if not update:
+            return query, {'$setOnInsert': item}
+        changes = {key: value for key, value in item.items() if key != '_id'}
+        update_document = {'$set': changes}
+        if '_id' in item:
+            update_document['$setOnInsert'] = {'_id': item['_id']}
+        return query, update_document
 
     @check_collection
-    def save(self, item: dict):
+    @instrumented
+    def upsert(self, item: dict, key_fields: List[str]) -> bool:
         """
-        Persist the specified item if filters do not match
+        Persist the specified item with a single upsert, setting its fields on the existing item with the same key
+        fields values if any
 
         Args:
             item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if an existing item was updated
 
         """
-        self.collection.insert_one(item)
+        query, update_document = self._upsert_operation(item, key_fields)
+        return self.collection.update_one(query, update_document, upsert=True).upserted_id is not None
+
+    @check_collection
+    @instrumented
+    def upsert_many(self, items: List[dict], key_fields: List[str], ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified items with a single bulk write
+
+        Args:
+            items: items to persist
+            key_fields: fields identifying the items
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+        if not items:
+            return BulkSaveResult()
+
+        operations = [UpdateOne(*self._upsert_operation(item, key_fields), upsert=True) for item in items]
+        try:
+            self.collection.bulk_write(operations, ordered=ordered)
+            return bulk_save_result(items, ordered)
+        except BulkWriteError as bwex:
+            return bulk_save_result(items, ordered, bwex)
+
+    @check_collection
+    @instrumented
+    def save_if_absent(self, item: dict, key_fields: List[str]) -> bool:
+        """
+        Persist the specified item with a single upsert which only sets its fields if it is inserted
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if it was already stored
+
+        """
+        query, update_document = self._upsert_operation(item, key_fields, update=False)
+        return self.collection.update_one(query, update_document, upsert=True).upserted_id is not None
 
     @staticmethod
     def _parse_filters(filters: List[Filter]) -> dict:
         """
-        Parse the given filters to a dictionary query
+        Parse the given filters to a dictionary query, binding the filter values to the memoized filters plan
 
         Args:
             filters: filters to be parsed
@@ -108,17 +230,85 @@ class MongoStorage(Storage, StorageWatcher):
         Returns: query resulting of parsing the filters
 
         """
-        aggregated_query = {}
-        if filters is not None and len(filters) > 0:
-            for filter_instance in filters:
-                query = filter_instance.parse_filter(MongoFilterParser)
-                aggregated_query = {**aggregated_query, **query}
-        return aggregated_query
+        if not filters:
+            return {}
+        plan = compile_filters(filters, MongoFilterParser)
+        return MongoFilterParser.bind(plan.query, plan.values(filters))
+
+    @staticmethod
+    def _parse_projection(fields: List[str] = None, sort_key: str = None) -> Optional[dict]:
+        """
+        Parse the given fields to a projection dictionary. The sort key is always included to allow building
+        the page cursors of the loaded items.
+
+        Args:
+            fields: fields to load
+            sort_key: key used to sort the results
+
+        Returns: projection including only the specified fields, None to include all the fields
+
+        """
+        if not fields:
+            return None
+        projection = {field: True for field in fields}
+        if sort_key:
+            projection[sort_key] = True
+        return projection
+
+    @staticmethod
+    def _parse_page(filters: List[Filter] = None,
+                    sort_key: str = None,
+                    sort_direction: SortDirection = None,
+                    limit: int = None,
+                    after: str = None) -> Tuple[dict, List[tuple]]:
+        """
+        Parse the given filters and page parameters to a dictionary query and its sorting specification. The
+        results are sorted by the document identifier after the sort key to keep a deterministic order between
+        pages, and the page cursor is translated to a range seek over the sort key and the document identifier.
+
+        Args:
+            filters: filters to be parsed
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items of the page
+            after: page cursor of the last item of the previous page
+
+        Returns: query and sorting specification resulting of parsing the parameters
+
+        """
+        query = MongoStorage._parse_filters(filters)
+        direction = (sort_direction or SortDirection.ASC).value[0]
+
+        sort = list()
+        if sort_key:
+            sort.append((sort_key, direction))
+        if sort_key or limit or after:
+            sort.append(('_id', direction))
+
+        if after is not None:
+            operator = '$gt' if direction == pymongo.ASCENDING else '$lt'
+            after_values = decode_cursor(after)
+            if sort_key:
+                if len(after_values) != 2:
+                    raise ValueError(f'Page cursor {after} not valid for sorting by {sort_key}')
+                sort_value, identifier = after_values
+                after_query = {'$or': [{sort_key: {operator: sort_value}},
+                                       {sort_key: sort_value, '_id': {operator: identifier}}]}
+            else:
+                after_query = {'_id': {operator: after_values[-1]}}
+            query = {'$and': [query, after_query]} if query else after_query
+
+        return query, sort
 
     @check_collection
+    @instrumented
     def get(self, filters: List[Filter] = None,
             sort_key: str = None,
-            sort_direction: SortDirection = None) -> Iterator[dict]:
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[dict]:
         """
         Get items which match the specified filters
 
@@ -126,32 +316,235 @@ class MongoStorage(Storage, StorageWatcher):
             filters: filters to apply
             sort_key: key to sort the results
             sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
 
         Returns: iterator to the matching items
 
         """
-        cursor = self.collection.find(self._parse_filters(filters))
-
-        if sort_key:
-            cursor = cursor.sort(sort_key, sort_direction.value[0])
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters, sort_key, sort_direction)
+        query, sort = self._parse_page(filters, sort_key, sort_direction, limit, after)
+        cursor = self.collection.find(query, self._parse_projection(fields, sort_key))
+
+        if sort:
+            cursor = cursor.sort(sort)
+        if offset:
+            cursor = cursor.skip(offset)
+        if limit:
+            cursor = cursor.limit(limit)
 
         for item in cursor:
             yield item
 
+    def page_cursor(self, item: dict, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, used to get the items after it
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+        if sort_key:
+            return encode_cursor(item[sort_key], item['_id'])
+        return encode_cursor(item['_id'])
+
     @check_collection
-    def get_one(self, filters: List[Filter] = None) -> dict:
+    @instrumented
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> dict:
         """
         Get first queried item
 
         Args:
             filters: filters to apply
+            fields: fields to load, all the fields if not specified
 
         Returns: persisted item matching filters
 
         """
-        return self.collection.find_one(self._parse_filters(filters))
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.find_one(self._parse_filters(filters), self._parse_projection(fields))
+
+    @check_collection
+    @instrumented
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, dict]:
+        """
+        Get the items with any of the specified key values, with one $in query per chunk of values
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+        fields = list(fields) + [key] if fields and key not in fields else fields
+        items = dict()
+        for in_filter in InFilter.chunks(key, values, chunk_size):
+            if self.index_advisor is not None:
+                self.index_advisor.record([in_filter])
+            for item in self.collection.find(self._parse_filters([in_filter]), self._parse_projection(fields)):
+                items.setdefault(item.get(key), item)
+        return items
 
     @check_collection
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> dict:
+        """
+        Get the query plan and execution statistics of the query built from the specified parameters. Only the
+        winning plan is executed, with the executionStats verbosity.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: mongodb explain output
+
+        """
+        query, sort = self._parse_page(filters, sort_key, sort_direction, limit, after)
+        find_command = SON([('find', self.collection.name), ('filter', query)])
+        if sort:
+            find_command['sort'] = SON(sort)
+        if offset:
+            find_command['skip'] = offset
+        if limit:
+            find_command['limit'] = limit
+        return self.collection.database.command(SON([('explain', find_command), ('verbosity', EXPLAIN_VERBOSITY)]))
+
+    @property
+    def operation_target(self) -> str:
+        """
+        Get the name of the collection the operations run on
+
+        Returns: collection name
+
+        """
+        return self.collection.name
+
+    def examined(self, filters: List[Filter] = None,
+                 sort_key: str = None,
+                 sort_direction: SortDirection = None,
+                 limit: int = None,
+                 offset: int = None,
+                 after: str = None) -> Optional[int]:
+        """
+        Get the number of documents examined by the query built from the specified parameters
+
+        Args:
+            filters: filters of the query
+            sort_key: key used to sort the query results
+            sort_direction: direction of the result sorting
+            limit: maximum number of documents of the query
+            offset: number of documents skipped by the query
+            after: page cursor of the query
+
+        Returns: number of examined documents, None if the explain output does not report it
+
+        """
+        return self.explain(filters, sort_key, sort_direction, limit, offset, after).get('executionStats', dict()) \
+            .get('totalDocsExamined')
+
+    @check_collection
+    @instrumented
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the items which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.count_documents(self._parse_filters(filters))
+
+    @check_collection
+    @instrumented
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any item matches the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any item matches, False otherwise
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.find_one(self._parse_filters(filters), {'_id': True}) is not None
+
+    @staticmethod
+    def _group_expression(group: GroupKey) -> Any:
+        """
+        Get the mongodb aggregation expression of the group key
+
+        Args:
+            group: group key
+
+        Returns: mongodb expression of the group key values
+
+        """
+        key_expression = f'${group.key}'
+        if group.bucket_size:
+            return {'$multiply': [{'$floor': {'$divide': [key_expression, group.bucket_size]}}, group.bucket_size]}
+        return key_expression
+
+    @check_collection
+    @instrumented
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the items which match the filters with a $group stage
+
+        Args:
+            group_by: keys used to group the items
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+        groups = [group_key(group) for group in group_by]
+        group_stage = {'_id': {group.key: self._group_expression(group) for group in groups} if groups else None}
+        for aggregation in aggregations:
+            operand = 1 if aggregation.operation == AggregationOperation.COUNT else f'${aggregation.key}'
+            group_stage[aggregation.alias] = {aggregation.operation.value[0]: operand}
+
+        pipeline = [{'$group': group_stage}]
+        if groups:
+            pipeline.append({'$sort': {f'_id.{group.key}': pymongo.ASCENDING for group in groups}})
+        if filters:
+            pipeline.insert(0, {'$match': self._parse_filters(filters)})
+
+        results = list()
+        for group_result in self.collection.aggregate(pipeline):
+            group_values = group_result.pop('_id') or dict()
+            results.append({**group_values, **group_result})
+        return results
+
+    @check_collection
+    @instrumented
     def delete(self, identifier: str):
         """
         Delete the identified item
@@ -160,31 +553,238 @@ class MongoStorage(Storage, StorageWatcher):
             identifier: identifier of the item
 
         """
-        self.collection.remove(identifier)
+        self.collection.delete_one({'_id': identifier})
 
     @check_collection
-    def consume_inserts(self) -> Iterator[dict]:
+    @instrumented
+    def delete_many(self, filters: List[Filter]) -> int:
         """
-        Consume the insert operations
+        Delete the items which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted items
 
         """
-        insert_consumer = self.collection.watch([{'$match': {'operationType': 'insert'}}])
-        try:
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.delete_many(self._parse_filters(filters)).deleted_count
+
+    @check_collection
+    @instrumented
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Set the specified fields of the first item which matches the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.update_one(self._parse_filters(filters), {'$set': changes}).matched_count
+
+    @check_collection
+    @instrumented
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Set the specified fields of all the items which match the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        return self.collection.update_many(self._parse_filters(filters), {'$set': changes}).matched_count
+
+    @check_collection
+    def drop(self):
+        """
+        Drop the collection with its documents and indexes
+        """
+        self.collection.drop()
+
+    @staticmethod
+    def _inserts_pipeline(fields: List[str] = None) -> List[dict]:
+        """
+        Get the change stream pipeline of the insert operations
+
+        Args:
+            fields: fields of the inserted documents to include, all the fields if not specified
+
+        Returns: change stream aggregation pipeline
+
+        """
+        pipeline = [{'$match': {'operationType': 'insert'}}]
+        projection = MongoStorage._parse_projection(fields)
+        if projection:
+            pipeline.append({'$project': {'operationType': True, 'fullDocument._id': True,
+                                          **{f'fullDocument.{field}': True for field in projection}}})
+        return pipeline
+
+    @check_collection
+    def consume_inserts(self, fields: List[str] = None,
+                        resume_store: ResumeTokenStore = None,
+                        consumer: str = None) -> Iterator[dict]:
+        """
+        Consume the insert operations, checkpointing the resume token of each consumed insert if a resume store
+        is specified
+
+        Args:
+            fields: fields of the inserted documents to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed inserts and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the collection name if not specified
+
+        Returns: iterator to the inserted documents
+
+        """
+        consumer = consumer or self.collection.full_name
+        resume_token = resume_store.load(consumer) if resume_store is not None else None
+        with self.collection.watch(self._inserts_pipeline(fields), resume_after=resume_token) as insert_consumer:
             for insert_change in insert_consumer:
                 yield insert_change['fullDocument']
-        except Exception as ex:
-            insert_consumer.close()
-            raise ex
-        except KeyboardInterrupt as kex:
-            insert_consumer.close()
-            raise kex
+                if resume_store is not None:
+                    resume_store.save(consumer, insert_change['_id'])
+
+    @check_collection
+    def consume_insert_batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                               batch_window: float = DEFAULT_BATCH_WINDOW,
+                               fields: List[str] = None,
+                               resume_store: ResumeTokenStore = None,
+                               consumer: str = None) -> Iterator[List[dict]]:
+        """
+        Consume the insert operations in batches, bounded by size and by time window. The resume token of the
+        last insert of each batch is checkpointed once the batch is processed, when the next batch is requested.
+
+        Args:
+            batch_size: maximum number of inserted documents of a batch
+            batch_window: maximum seconds to wait for the inserted documents of a batch
+            fields: fields of the inserted documents to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed batches and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the collection name if not specified
+
+        Returns: iterator to the not empty batches of inserted documents
+
+        """
+        consumer = consumer or self.collection.full_name
+        resume_token = resume_store.load(consumer) if resume_store is not None else None
+        with self.collection.watch(self._inserts_pipeline(fields), resume_after=resume_token,
+                                   max_await_time_ms=max(1, int(batch_window * 250))) as insert_consumer:
+            while insert_consumer.alive:
+                batch = list()
+                deadline = monotonic() + batch_window
+                while len(batch) < batch_size and monotonic() < deadline:
+                    insert_change = insert_consumer.try_next()
+                    if insert_change is not None:
+                        batch.append(insert_change['fullDocument'])
+                        resume_token = insert_change['_id']
+                if batch:
+                    yield batch
+                    if resume_store is not None:
+                        resume_store.save(consumer, resume_token)
+
+    @check_collection
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the indexes existing in the collection
+
+        Returns: existing indexes specifications
+
+        """
+        return [IndexSpec(tuple((key, SortDirection.DESC if direction == pymongo.DESCENDING else SortDirection.ASC)
+                                for key, direction in index_info['key']),
+                          unique=index_info.get('unique', False), name=index_name)
+                for index_name, index_info in self.collection.index_information().items()]
+
+    @staticmethod
+    def _index_model(index: IndexSpec) -> pymongo.IndexModel:
+        """
+        Get the mongodb index model of the index specification
+
+        Args:
+            index: index specification
+
+        Returns: mongodb index model
+
+        """
+        index_options = dict(unique=index.unique)
+        if index.name:
+            index_options['name'] = index.name
+        return pymongo.IndexModel([(key, direction.value[0]) for key, direction in index.keys], **index_options)
+
+    @check_collection
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared collection indexes which do not exist
+
+        Returns: names of the ensured indexes
+
+        """
+        if not self._indexes:
+            return list()
+        return self.collection.create_indexes([self._index_model(index) for index in self._indexes])
+
+    @check_collection
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the indexes needed by the queries recorded by the index advisor which do not exist in the collection
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
+        if self.index_advisor is None:
+            raise ValueError('Index advisor not enabled')
+        missing_indexes = self.index_advisor.advise(self.existing_indexes(), self._logger, self.collection.name,
+                                                    min_usages=min_usages)
+        if create and missing_indexes:
+            self.collection.create_indexes([self._index_model(index) for index in missing_indexes])
+        return missing_indexes
+
+    @check_collection
+    def with_options(self, read_preference: str = None, max_staleness: int = None, w: Union[int, str] = None,
+                     j: bool = None, wtimeout: int = None) -> 'MongoStorage':
+        """
+        Get a view of the storage with the specified read preference and write concern options, sharing the client,
+        the collection and the index advisor. The write concern options not specified are kept.
+
+        Args:
+            read_preference: read preference mode name, the storage read preference if not specified
+            max_staleness: maximum replication lag in seconds of the secondaries to read from
+            w: number of members or tag which should acknowledge the writes
+            j: True to wait for the writes to be journaled
+            wtimeout: maximum milliseconds to wait for the writes acknowledgment
+
+        Returns: storage view using the specified options
+
+        """
+        storage_view = copy(self)
+        storage_view.collection = self.collection.with_options(
+            read_preference=parse_read_preference(read_preference, max_staleness),
+            write_concern=parse_write_concern(w, j, wtimeout, base=self.collection.write_concern))
+        return storage_view
 
-    def set_collection(self, collection: str):
+    def set_collection(self, collection: str, indexes: List[IndexSpec] = None):
         """
         Set collection used by the implementation
 
         Args:
             collection: collection to use
+            indexes: indexes declared for the collection, created with ensure_indexes
 
         """
-        self.collection = self._database[collection]
+        self.collection = self._database.get_collection(collection, read_preference=self._read_preference,
+                                                        write_concern=self._write_concern)
+        self._indexes = list(indexes or list())
+        self.index_advisor = IndexAdvisor() if self._index_advisor_enabled else None
@@ -0,0 +1,683 @@
+"""
+Time partitioned storage implementation module
+"""
+import heapq
+from datetime import date, datetime
+from itertools import chain, islice
+from logging import Logger
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..aggregation import Aggregation, AggregationOperation, GroupKey, group_key
+from ..bulk_save_result import BulkSaveResult, BulkSaveError
+from ..exceptions import StorageError
+from ..filter import Filter, MatchFilter, RangeFilter, InFilter, normalize_filters
+from ..index_spec import IndexSpec
+from ..memory_index import sort_value
+from ..partition_granularity import PartitionGranularity, partition_datetime
+from ..sort_direction import SortDirection
+from .storage import Storage, KEYS_CHUNK_SIZE
+
+MERGEABLE_OPERATIONS = (AggregationOperation.COUNT, AggregationOperation.SUM, AggregationOperation.MIN,
+                        AggregationOperation.MAX)
+
+
+class PartitionedStorage(Storage):
+    """
+    Storage wrapper splitting the items in time partitions by the date of their partition key, each partition kept
+    in its own storage, like a collection or a table per month. The items are saved in the partition of their date,
+    the queries only run in the partitions which can contain the items matching the partition key filters and their
+    results are merged. The retention is applied dropping the whole partitions older than a date instead of deleting
+    their items one by one.
+    """
+
+    def __init__(self, partition_storage: Callable[[str], Storage], logger: Logger, name: str,
+                 granularity: PartitionGranularity = PartitionGranularity.MONTH,
+                 partition_key: str = 'date',
+                 identifier_key: str = '_id',
+                 partitions: Iterable[str] = None):
+        """
+        Initialize the partitioned storage
+
+        Args:
+            partition_storage: function getting the storage of the partition with the specified name, creating its
+                collection or table if it does not exist
+            logger: logger instance to use
+            name: name of the storage, prefix of its partitions names
+            granularity: time span of each partition
+            partition_key: key of the item dates used to partition them
+            identifier_key: key of the items identifiers, used to sort the items with the same sort key value
+            partitions: names of the existing partitions, like the names of the existing collections or tables. The
+                names which are not partitions of this storage are ignored.
+        """
+        self._partition_storage = partition_storage
+        self._logger = logger
+        self._name = name
+        self._granularity = granularity
+        self._partition_key = partition_key
+        self._identifier_key = identifier_key
+        self._partitions: Dict[datetime, Storage] = dict()
+        self._lock = Lock()
+        for partition_name in partitions or list():
+            start = self._partition_start(partition_name)
+            if start is not None:
+                self._partitions[start] = partition_storage(partition_name)
+
+    @property
+    def partitions(self) -> List[str]:
+        """
+        Get the names of the existing partitions in chronological order
+
+        Returns: partitions names
+
+        """
+        with self._lock:
+            return [self.partition_name(start) for start in sorted(self._partitions)]
+
+    def partition_name(self, start: datetime) -> str:
+        """
+        Get the name of the partition with the specified start
+
+        Args:
+            start: partition start datetime
+
+        Returns: partition name
+
+        """
+        return f'{self._name}_{self._granularity.suffix(start)}'
+
+    def _partition_start(self, partition_name: str) -> Optional[datetime]:
+        """
+        Get the start of the partition with the specified name
+
+        Args:
+            partition_name: name of the partition
+
+        Returns: partition start datetime, None if the name is not a partition of this storage
+
+        """
+        prefix = f'{self._name}_'
+        if not partition_name.startswith(prefix):
+            return None
+        return self._granularity.parse(partition_name[len(prefix):])
+
+    @staticmethod
+    def _item_value(item: Any, key: str) -> Any:
+        """
+        Get the value of the specified key of the item
+
+        Args:
+            item: dictionary or object item
+            key: key of the value
+
+        Returns: item value for the key, None if not present
+
+        """
+        if isinstance(item, dict):
+            return item.get(key)
+        return getattr(item, key, None)
+
+    def _item_partition_start(self, item: Any) -> datetime:
+        """
+        Get the start of the partition of the specified item
+
+        Args:
+            item: item to partition
+
+        Returns: partition start datetime
+
+        """
+        value = self._item_value(item, self._partition_key)
+        if not isinstance(value, date):
+            raise StorageError(f'Item without {self._partition_key} date to select its partition: {value!r}')
+        return self._granularity.start(value)
+
+    def _partition(self, start: datetime) -> Storage:
+        """
+        Get the storage of the partition with the specified start, creating the partition if it does not exist
+
+        Args:
+            start: partition start datetime
+
+        Returns: partition storage
+
+        """
+        with self._lock:
+            if start not in self._partitions:
+                partition_name = self.partition_name(start)
+                self._logger.info(f'Creating partition {partition_name}')
+                self._partitions[start] = self._partition_storage(partition_name)
+            return self._partitions[start]
+
+    def _key_starts(self, filter_instance: Filter, starts: List[datetime]) -> List[datetime]:
+        """
+        Get the partitions which can contain the items matching the specified partition key filter
+
+        Args:
+            filter_instance: filter of the partition key
+            starts: starts of the candidate partitions
+
+        Returns: starts of the partitions which can contain matching items
+
+        """
+        if isinstance(filter_instance, MatchFilter):
+            values = (filter_instance.value,)
+        elif isinstance(filter_instance, InFilter):
+            values = filter_instance.members
+        else:
+            lower = partition_datetime(filter_instance.lower) if filter_instance.lower is not None else None
+            upper = partition_datetime(filter_instance.upper) if filter_instance.upper is not None else None
+            return [start for start in starts
+                    if (lower is None or self._granularity.end(start) > lower) and (upper is None or start < upper)]
+        if not all(value is None or isinstance(value, date) for value in values):
+            return starts
+        value_starts = {self._granularity.start(value) for value in values if value is not None}
+        return [start for start in starts if start in value_starts]
+
+    def _pruned(self, filters: List[Filter] = None) -> List[Tuple[datetime, Storage]]:
+        """
+        Get the partitions which can contain the items matching the filters, discarding the partitions out of the
+        partition key filters. The filters with values which are not dates do not discard partitions.
+
+        Args:
+            filters: filters to apply
+
+        Returns: start and storage of the candidate partitions in chronological order
+
+        """
+        with self._lock:
+            partitions = dict(self._partitions)
+        starts = sorted(partitions)
+        for filter_instance in normalize_filters(filters):
+            if not isinstance(filter_instance, (MatchFilter, RangeFilter, InFilter)) \
+                    or filter_instance.key != self._partition_key:
+                continue
+            try:
+                starts = self._key_starts(filter_instance, starts)
+            except TypeError:
+                continue
+        return [(start, partitions[start]) for start in starts]
+
+    def _bulk_write(self, items: List[Any], ordered: bool,
+                    write: Callable[[Storage, List[Any]], BulkSaveResult]) -> BulkSaveResult:
+        """
+        Write the items in bulk in their partitions, with one bulk write per partition, or per run of consecutive
+        items of the same partition if ordered
+
+        Args:
+            items: items to write
+            ordered: True to stop writing at the first failing item, False otherwise
+            write: function writing in bulk the specified items in the specified partition storage
+
+        Returns: bulk write result, with the errors indexed by the position of the items in the written items
+
+        """
+        result = BulkSaveResult()
+        runs: List[Tuple[datetime, List[int]]] = list()
+        not_processed = list()
+        for index, item in enumerate(items):
+            if ordered and result.errors:
+                not_processed.append(index)
+                continue
+            try:
+                start = self._item_partition_start(item)
+            except StorageError as serr:
+                result.errors.append(BulkSaveError(index, item, serr))
+                continue
+            run = next((run for run in (runs[-1:] if ordered else runs) if run[0] == start), None)
+            if run is None:
+                runs.append((start, [index]))
+            else:
+                run[1].append(index)
+
+        for position, (start, indexes) in enumerate(runs):
+            run_result = write(self._partition(start), [items[index] for index in indexes])
+            result.saved.extend(run_result.saved)
+            result.errors.extend(BulkSaveError(indexes[bulk_error.index], bulk_error.item, bulk_error.error)
+                                 for bulk_error in run_result.errors)
+            if ordered and run_result.errors:
+                not_processed.extend(index for _, later_indexes in runs[position + 1:] for index in later_indexes)
+                break
+        result.errors.extend(BulkSaveError(index, items[index], StorageError(
+            'Item not processed because a previous item failed')) for index in not_processed)
+        result.errors.sort(key=lambda bulk_error: bulk_error.index)
+        return result
+
+    def save(self, item: Any):
+        """
+        Persist the specified item in the partition of its date
+
+        Args:
+            item: item to persist
+
+        """
+        self._partition(self._item_partition_start(item)).save(item)
+
+    def save_many(self, items: List[Any], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items in bulk in the partitions of their dates
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: saved items and errors of the items which could not be saved, indexed by their position
+
+        """
+        return self._bulk_write(items, ordered,
+                                lambda storage, partition_items: storage.save_many(partition_items, ordered))
+
+    def upsert(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Upsert the specified item in the partition of its date, the key fields are unique within each partition
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the stored item to update
+
+        Returns: True if the item was inserted, False if an existing item was updated
+
+        """
+        return self._partition(self._item_partition_start(item)).upsert(item, key_fields)
+
+    def upsert_many(self, items: List[Any], key_fields: List[str], ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified items in bulk in the partitions of their dates
+
+        Args:
+            items: items to persist
+            key_fields: fields identifying the stored items to update
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: upserted items and errors of the items which could not be upserted, indexed by their position
+
+        """
+        return self._bulk_write(items, ordered,
+                                lambda storage, partition_items: storage.upsert_many(partition_items, key_fields,
+                                                                                     ordered))
+
+    def save_if_absent(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Persist the specified item in the partition of its date only if there is no item with the same key fields
+        values in that partition
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the stored item
+
+        Returns: True if the item was inserted, False if it already existed
+
+        """
+        return self._partition(self._item_partition_start(item)).save_if_absent(item, key_fields)
+
+    def _sort_entry(self, item: Any, sort_key: Optional[str]) -> Tuple:
+        """
+        Get the merge sorting entry of the item, its sort key value followed by its identifier
+
+        Args:
+            item: item to sort
+            sort_key: key used to sort the items, the identifier if not specified
+
+        Returns: sortable tuple of the item
+
+        """
+        sort_entry = (sort_value(self._item_value(item, self._identifier_key)),)
+        if sort_key is not None:
+            sort_entry = (sort_value(self._item_value(item, sort_key)),) + sort_entry
+        return sort_entry
+
+    def get(self, filters: List[Filter] = None,
+            sort_key: str = None,
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[Any]:
+        """
+        Get the items of the partitions which can match the filters. The items sorted by the partition key are read
+        one partition after another, the items sorted by other keys are merged from all the partitions, getting from
+        each one at most the number of items skipped and returned.
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
+
+        Returns: iterator to dictionary representation of the items
+
+        """
+        partitions = [storage for _, storage in self._pruned(filters)]
+        offset = offset or 0
+        stop = offset + limit if limit is not None else None
+        descending = sort_direction == SortDirection.DESC
+
+        if sort_key == self._partition_key or (sort_key is None and limit is None and after is None):
+            if descending:
+                partitions.reverse()
+            items = chain.from_iterable(storage.get(filters, sort_key, sort_direction, limit=stop, after=after,
+                                                    fields=fields)
+                                        for storage in partitions)
+        else:
+            items = heapq.merge(*(storage.get(filters, sort_key, sort_direction, limit=stop, after=after,
+                                              fields=fields)
+                                  for storage in partitions),
+                                key=lambda item: self._sort_entry(item, sort_key), reverse=descending)
+        yield from islice(items, offset, stop)
+
+    def page_cursor(self, item: Any, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, valid in all the partitions
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+        with self._lock:
+            storage = next(iter(self._partitions.values()), None)
+        if storage is None:
+            raise StorageError('No partitions to get the page cursor')
+        return storage.page_cursor(item, sort_key)
+
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
+        """
+        Get the first item which matches the filters, looking up the partitions in chronological order
+
+        Args:
+            filters: filters to apply
+            fields: fields to load, all the fields if not specified
+
+        Returns: persisted item matching filters
+
+        """
+        for _, storage in self._pruned(filters):
+            item = storage.get_one(filters, fields)
+            if item is not None:
+                return item
+        return None
+
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the items with any of the specified key values, looking up in each partition the values not found in
+        the previous ones
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+        pending = list(dict.fromkeys(values))
+        partitions = self._pruned([InFilter(key, pending)]) if key == self._partition_key else self._pruned()
+        items = dict()
+        for _, storage in partitions:
+            if not pending:
+                break
+            items.update(storage.get_many_by_key(key, pending, fields, chunk_size))
+            pending = [value for value in pending if value not in items]
+        return items
+
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> Dict[str, Any]:
+        """
+        Get the plans of the query in each partition which can match the filters
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: query plans by partition name
+
+        """
+        stop = (offset or 0) + limit if limit is not None else None
+        return {self.partition_name(start): storage.explain(filters, sort_key, sort_direction, limit=stop, after=after)
+                for start, storage in self._pruned(filters)}
+
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the items which match the filters in all the partitions which can contain them
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching items
+
+        """
+        return sum(storage.count(filters) for _, storage in self._pruned(filters))
+
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any item of the partitions which can contain them matches the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any item matches, False otherwise
+
+        """
+        return any(storage.exists(filters) for _, storage in self._pruned(filters))
+
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the items which match the filters grouped by the specified keys, merging the groups of each
+        partition. The averages can only be aggregated when the filters select a single partition.
+
+        Args:
+            group_by: keys used to group the items
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+        partitions = self._pruned(filters)
+        if len(partitions) == 1:
+            return partitions[0][1].aggregate(group_by, aggregations, filters)
+        not_mergeable = [aggregation.alias for aggregation in aggregations
+                         if aggregation.operation not in MERGEABLE_OPERATIONS]
+        if not_mergeable:
+            raise NotImplementedError(f'Aggregations {not_mergeable} can not be merged across partitions')
+
+        keys = [group_key(group).key for group in group_by]
+        groups: Dict[Tuple, dict] = dict()
+        for _, storage in partitions:
+            for result in storage.aggregate(group_by, aggregations, filters):
+                group_values = tuple(result[key] for key in keys)
+                if group_values not in groups:
+                    groups[group_values] = result
+                    continue
+                merged = groups[group_values]
+                for aggregation in aggregations:
+                    merged[aggregation.alias] = self._merge_aggregation(aggregation.operation,
+                                                                        merged[aggregation.alias],
+                                                                        result[aggregation.alias])
+        return [groups[group_values] for group_values in
+                sorted(groups, key=lambda values: tuple(sort_value(value) for value in values))]
+
+    @staticmethod
+    def _merge_aggregation(operation: AggregationOperation, value: Any, other: Any) -> Any:
+        """
+        Merge the values of an aggregation of the same group in two partitions
+
+        Args:
+            operation: aggregation operation
+            value: aggregated value of the first partition
+            other: aggregated value of the second partition
+
+        Returns: aggregated value of both partitions
+
+        """
+        if value is None or other is None:
+            return other if value is None else value
+        if operation == AggregationOperation.MIN:
+            return min(value, other)
+        if operation == AggregationOperation.MAX:
+            return max(value, other)
+        return value + other
+
+    def delete(self, identifier: Any):
+        """
+        Delete the identified item from the partition which contains it
+
+        Args:
+            identifier: identifier of the item to delete
+
+        """
+        for _, storage in self._pruned():
+            storage.delete(identifier)
+
+    def delete_many(self, filters: List[Filter]) -> int:
+        """
+        Delete the items which match the filters from the partitions which can contain them
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted items
+
+        """
+        return sum(storage.delete_many(filters) for _, storage in self._pruned(filters))
+
+    def _check_changes(self, changes: dict):
+        """
+        Check that the changes do not move the items to other partitions
+
+        Args:
+            changes: new values of the fields to update
+
+        """
+        if self._partition_key in changes:
+            raise StorageError(f'Partition key {self._partition_key} can not be updated')
+
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of the first item which matches the filters, looking up the partitions in
+        chronological order
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        self._check_changes(changes)
+        for _, storage in self._pruned(filters):
+            if storage.update(filters, changes):
+                return 1
+        return 0
+
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of all the items which match the filters in the partitions which can contain
+        them
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+        self._check_changes(changes)
+        return sum(storage.update_many(filters, changes) for _, storage in self._pruned(filters))
+
+    def drop_partitions(self, before: Union[date, datetime]) -> List[str]:
+        """
+        Drop the partitions whose items are all older than the specified date, applying the storage retention
+
+        Args:
+            before: date of the oldest item to keep
+
+        Returns: names of the dropped partitions
+
+        """
+        before = partition_datetime(before)
+        with self._lock:
+            expired = sorted(start for start in self._partitions if self._granularity.end(start) <= before)
+        dropped = list()
+        for start in expired:
+            partition_name = self.partition_name(start)
+            with self._lock:
+                storage = self._partitions[start]
+            storage.drop()
+            with self._lock:
+                del self._partitions[start]
+            self._logger.info(f'Dropped partition {partition_name}')
+            dropped.append(partition_name)
+        return dropped
+
+    def drop(self):
+        """
+        Drop all the partitions
+        """
+        with self._lock:
+            partitions = dict(self._partitions)
+        for start, storage in partitions.items():
+            storage.drop()
+            with self._lock:
+                del self._partitions[start]
+
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the indexes existing in all the partitions
+
+        Returns: existing indexes specifications
+
+        """
+        partitions = self._pruned()
+        if not partitions:
+            return list()
+        indexes = partitions[-1][1].existing_indexes()
+        for _, storage in partitions[:-1]:
+            partition_indexes = storage.existing_indexes()
+            indexes = [index for index in indexes if index in partition_indexes]
+        return indexes
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared indexes which do not exist in each partition
+
+        Returns: names of the ensured indexes
+
+        """
+        names = dict()
+        for _, storage in self._pruned():
+            names.update(dict.fromkeys(storage.ensure_indexes()))
+        return list(names)
+
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the indexes needed by the queries recorded in the partitions which do not exist in them
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
+        indexes = dict()
+        for _, storage in self._pruned():
+            indexes.update(dict.fromkeys(storage.advise_indexes(create, min_usages)))
+        return list(indexes)
@@ -3,38 +3,83 @@ SQL database client module
 """
 from logging import Logger
 from sqlite3 import IntegrityError
-from typing import List, Iterator, Any
+from time import monotonic, sleep
+from typing import Dict, Iterable, List, Iterator, Any, Optional, Union
 
-from sqlalchemy import inspect
+from sqlalchemy import inspect, tuple_, Index, func, and_, case
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import IntegrityError as SQLAlchemyIntegrityError
 from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import Query, Session
-from sqlalchemy.sql.elements import BinaryExpression
+from sqlalchemy.orm import Query, Session, load_only
 
-from ..sql import SqlSessionProvider
+from ..aggregation import Aggregation, AggregationOperation, GroupKey, group_key
+from ..bulk_save_result import BulkSaveResult, BulkSaveError
+from ..slow_operation import SlowOperationHook, instrumented, slow_operation_hook
+from ..sql import SqlSessionProvider, explain_query
 from ..exceptions import StorageIntegrityError, StorageError
 from ..sort_direction import SortDirection
-from ..filter import Filter, MatchFilter
+from ..filter import Filter, MatchFilter, InFilter, RangeFilter, compile_filters
 from ..filter.parsers import SQLFilterParser
-from . import Storage
+from ..index_advisor import IndexAdvisor
+from ..index_spec import IndexSpec
+from ..page_cursor import encode_cursor, decode_cursor
+from ..resume_token_store import ResumeTokenStore
+from ..storage_watcher import StorageWatcher, DEFAULT_BATCH_SIZE, DEFAULT_BATCH_WINDOW
+from .storage import Storage, KEYS_CHUNK_SIZE
 
 
-class SqlStorage(Storage):
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_POLL_INTERVAL = 0.1
+DEFAULT_MAX_POLL_INTERVAL = 5.0
+UPSERT_UPDATE_MARKER = 2 ** 64 - 1
+
+
+class SqlStorage(Storage, StorageWatcher):
     """
-    SQL storage client implementation
+    SQL storage client implementation. The inserts are consumed by polling the rows after the last consumed value
+    of a monotonic column, the primary key by default.
     """
 
-    def __init__(self, session_provider: SqlSessionProvider, model: DeclarativeMeta, logger: Logger):
+    def __init__(self, session_provider: SqlSessionProvider, model: DeclarativeMeta, logger: Logger,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, indexes: List[IndexSpec] = None, index_advisor: bool = False,
+                 slow_operation_threshold: float = None, explain_slow_operations: bool = False,
+                 insert_column: str = None, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 max_poll_interval: float = DEFAULT_MAX_POLL_INTERVAL):
         """
         Database client initializer
 
         Args:
             session_provider: SQLAlchemy sessions manager
             logger: logger instance to use
+            chunk_size: number of entities fetched from the database at once while iterating the queried entities
+            indexes: indexes declared for the model table, created with ensure_indexes
+            index_advisor: True to record the queries keys in order to advise the missing indexes
+            slow_operation_threshold: seconds above which the operations are reported as slow, not reported if not
+            specified
+            explain_slow_operations: True to explain the slow queries to report the number of examined rows
+            insert_column: column increasing with each insert, like an autoincrement identifier or an insertion
+            timestamp, used to consume the inserts. The primary key if not specified, an index is declared for it
+            otherwise.
+            poll_interval: seconds between the inserts polls while there are new inserts
+            max_poll_interval: maximum seconds between the inserts polls, the interval doubles on each empty poll
         """
         self._logger = logger
         self._model = model
         self._session_provider = session_provider
-
+        self._chunk_size = chunk_size
+        self._indexes = list(indexes or list())
+        self.index_advisor: Optional[IndexAdvisor] = IndexAdvisor() if IndexAdvisor.enabled(index_advisor) else None
+        self.slow_operation_hook: Optional[SlowOperationHook] = slow_operation_hook(logger, slow_operation_threshold,
+                                                                                     explain_slow_operations)
+        self._insert_column = insert_column or inspect(model).primary_key[0].name
+        if not hasattr(model, self._insert_column):
+            raise AttributeError(f'{model.__name__} has not the {self._insert_column} property')
+        if insert_column and not any(index.fields[0] == insert_column for index in self._indexes):
+            self._indexes.append(IndexSpec.of(insert_column))
+        self._poll_interval = float(poll_interval)
+        self._max_poll_interval = float(max_poll_interval)
+
+    @instrumented
     def save(self, model_instance: DeclarativeMeta) -> Any:
         """
         Save the specified model to the database
@@ -56,89 +101,525 @@ class SqlStorage(Storage):
             self._logger.error(f'Error trying to save {model_instance}')
             raise StorageError(str(ex))
 
-    @staticmethod
-    def _parse_keys(model: type(DeclarativeMeta), filters: List[Filter]) -> List[BinaryExpression]:
+    @instrumented
+    def save_many(self, model_instances: List[DeclarativeMeta], ordered: bool = False) -> BulkSaveResult:
+        """
+        Save the specified models to the database within a single session. The whole batch is flushed at once,
+        if it fails each instance is flushed in its own savepoint to isolate the failing ones.
+
+        Args:
+            model_instances: instances to save
+            ordered: True to stop saving at the first failing instance, False otherwise
+
+        Returns: result with the persisted instances and the per instance errors
+
+        """
+        result = BulkSaveResult()
+        if not model_instances:
+            return result
+
+        try:
+            with self._session_provider(read_only=False) as session:
+                try:
+                    with session.begin_nested():
+                        session.add_all(model_instances)
+                    result.saved.extend(model_instances)
+                    return result
+                except Exception:
+                    self._logger.warning('Bulk save failed, saving instances one by one')
+
+                for index, model_instance in enumerate(model_instances):
+                    if ordered and result.errors:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageError(
+                            'Instance not processed because a previous instance failed')))
+                        continue
+                    try:
+                        with session.begin_nested():
+                            session.add(model_instance)
+                        result.saved.append(model_instance)
+                    except SQLAlchemyIntegrityError as interr:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageIntegrityError(str(interr))))
+                    except Exception as ex:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageError(str(ex))))
+                return result
+        except Exception as ex:
+            self._logger.error(f'Error trying to save {len(model_instances)} instances')
+            raise StorageError(str(ex))
+
+    def _instance_row(self, model_instance: DeclarativeMeta) -> dict:
         """
-        Parse the input filter keys to its SQL alchemy representation
+        Get the column values set in the specified instance, including the ones set to null, leaving out the not set
+        columns and the null primary keys
 
         Args:
-            model: model to parse the filters for
-            filters: filters to parse
+            model_instance: instance to get the values from
+
+        Returns: column values of the instance by column key
+
+        """
+        instance_state = inspect(model_instance)
+        primary_keys = [column.key for column in inspect(self._model).primary_key]
+        row = dict()
+        for column_property in inspect(self._model).column_attrs:
+            column_key = column_property.columns[0].key
+            value = getattr(model_instance, column_property.key)
+            if column_property.key not in instance_state.dict or (value is None and column_key in primary_keys):
+                continue
+            row[column_key] = value
+        return row
+
+    def _upsert_row(self, session: Session, model_instance: DeclarativeMeta, key_fields: List[str],
+                    update: bool) -> bool:
+        """
+        Insert the instance row, or update the row with the same key fields values if it already exists and update
+        is specified. MySQL uses a single INSERT ... ON DUPLICATE KEY UPDATE statement, whose affected rows can not
+        tell an insert from an update which does not change the row because the MySQL connections report the found
+        rows, so the update also sets LAST_INSERT_ID to a marker which is never an auto increment value. SQLite
+        inserts with ON CONFLICT DO NOTHING, or INSERT OR IGNORE if SQLAlchemy has no SQLite insert, and updates the
+        existing row with a second statement because the affected rows of ON CONFLICT DO UPDATE are always 1.
+
+        Args:
+            session: session to execute the statements with
+            model_instance: instance to upsert
+            key_fields: fields identifying the instance
+            update: True to update the existing row, False to leave it unchanged
+
+        Returns: True if the row was inserted, False otherwise
 
         """
-        for filter_instance in filters:
-            filter_key = filter_instance.key
-            if hasattr(model, filter_key):
-                filter_instance.key = getattr(model, filter_key)
+        table = self._model.__table__
+        row = self._instance_row(model_instance)
+        primary_keys = [column.key for column in inspect(self._model).primary_key]
+        changes = [column for column in row if column not in key_fields and column not in primary_keys] if update \
+            else list()
+        dialect = self._session_provider.engine.dialect.name
+
+        if dialect == 'mysql':
+            statement = mysql.insert(table).values(**row)
+            marker_key = table.c[key_fields[0]]
+            assignments = {column: statement.inserted[column] for column in changes}
+            assignments[marker_key.key] = case([(func.last_insert_id(UPSERT_UPDATE_MARKER) > 0, marker_key)],
+                                               else_=marker_key)
+            statement = statement.on_duplicate_key_update(assignments)
+            return session.execute(statement).lastrowid != UPSERT_UPDATE_MARKER
+        if dialect == 'sqlite':
+            if hasattr(sqlite, 'insert'):
+                statement = sqlite.insert(table).values(**row).on_conflict_do_nothing(index_elements=key_fields)
             else:
-                raise AttributeError(
-                    f'{model.__name__} has not the {filter_key} property')
+                statement = table.insert().prefix_with('OR IGNORE').values(**row)
+            inserted = session.execute(statement).rowcount == 1
+            if not inserted and changes:
+                session.execute(table.update().where(and_(*(table.c[key] == row.get(key) for key in key_fields)))
+                                .values(**{column: row[column] for column in changes}))
+            return inserted
+        raise StorageError(f'Upsert not supported for the {dialect} SQL dialect')
+
+    @instrumented
+    def upsert(self, model_instance: DeclarativeMeta, key_fields: List[str]) -> bool:
+        """
+        Insert the specified instance or update the columns of the row with the same key fields values, without
+        loading the existing row
+
+        Args:
+            model_instance: instance to persist
+            key_fields: fields identifying the instance, covered by a unique constraint
+
+        Returns: True if the instance was inserted, False if an existing row was updated
+
+        """
+        try:
+            with self._session_provider(read_only=False) as session:
+                return self._upsert_row(session, model_instance, key_fields, update=True)
+        except StorageError:
+            raise
+        except Exception as ex:
+            self._logger.error(f'Error trying to upsert {model_instance}')
+            raise StorageError(str(ex))
+
+    @instrumented
+    def upsert_many(self, model_instances: List[DeclarativeMeta], key_fields: List[str],
+                    ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified instances within a single session, each one in its own savepoint to isolate the
+        failing ones
+
+        Args:
+            model_instances: instances to persist
+            key_fields: fields identifying the instances, covered by a unique constraint
+            ordered: True to stop persisting at the first failing instance, False otherwise
+
+        Returns: result with the persisted instances and the per instance errors
+
+        """
+        result = BulkSaveResult()
+        if not model_instances:
+            return result
+
+        try:
+            with self._session_provider(read_only=False) as session:
+                for index, model_instance in enumerate(model_instances):
+                    if ordered and result.errors:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageError(
+                            'Instance not processed because a previous instance failed')))
+                        continue
+                    try:
+                        with session.begin_nested():
+                            self._upsert_row(session, model_instance, key_fields, update=True)
+                        result.saved.append(model_instance)
+                    except SQLAlchemyIntegrityError as interr:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageIntegrityError(str(interr))))
+                    except Exception as ex:
+                        result.errors.append(BulkSaveError(index, model_instance, StorageError(str(ex))))
+                return result
+        except Exception as ex:
+            self._logger.error(f'Error trying to upsert {len(model_instances)} instances')
+            raise StorageError(str(ex))
+
+    @instrumented
+    def save_if_absent(self, model_instance: DeclarativeMeta, key_fields: List[str]) -> bool:
+        """
+        Insert the specified instance only if there is no row with the same key fields values, with a single
+        statement
+
+        Args:
+            model_instance: instance to persist
+            key_fields: fields identifying the instance, covered by a unique constraint
+
+        Returns: True if the instance was inserted, False if it was already stored
+
+        """
+        try:
+            with self._session_provider(read_only=False) as session:
+                return self._upsert_row(session, model_instance, key_fields, update=False)
+        except StorageError:
+            raise
+        except Exception as ex:
+            self._logger.error(f'Error trying to save {model_instance}')
+            raise StorageError(str(ex))
+
+    def _filter_query(self, query: Query, filters: List[Filter] = None) -> Query:
+        """
+        Apply the filters to the query, binding the filter values to the memoized filters plan
+
+        Args:
+            query: query to filter
+            filters: filters to apply
+
+        Returns: filtered query
+
+        """
+        if not filters:
+            return query
+        plan = compile_filters(filters, SQLFilterParser, self._model)
+        return query.filter(*plan.query).params(**plan.values(filters))
 
     def _get_all(self, session: Session,
                  filters: List[Filter] = None,
                  sort_key: str = None,
-                 sort_direction: SortDirection = None) -> Query:
+                 sort_direction: SortDirection = None,
+                 limit: int = None,
+                 offset: int = None,
+                 after: str = None,
+                 fields: List[str] = None) -> Query:
         """
-        Get all the entities which matches the input parameters
+        Get all the entities which matches the input parameters. The results are sorted by the primary key after
+        the sort key to keep a deterministic order between pages, and the page cursor is translated to a range seek
+        over the sort key and the primary key.
 
         Args:
             session: session used to query the entities
             filters: filters to apply
             sort_key: key used to sort the results
             sort_direction: sorting direction
+            limit: maximum number of entities to get
+            offset: number of entities to skip
+            after: page cursor of the last entity of the previous page
+            fields: fields to load, all the fields if not specified. The primary key and the sort key are always
+            loaded, the rest of not loaded fields can not be accessed.
 
         Returns: filtered entities
 
         """
-        if not filters:
-            filters = list()
-
         query = session.query(self._model)
 
-        if filters:
-            self._parse_keys(self._model, filters)
-
-        filters_list = list()
-        for filter_instance in filters:
-            filters_list.append(*filter_instance.parse_filter(SQLFilterParser))
+        if fields:
+            fields = list(fields) + [sort_key] if sort_key and sort_key not in fields else fields
+            for field in fields:
+                if not hasattr(self._model, field):
+                    raise AttributeError(f'{self._model.__name__} has not the {field} property')
+            query = query.options(load_only(*fields))
 
-        filtered_query = query.filter(*filters_list)
+        filtered_query = self._filter_query(query, filters)
 
+        sort_direction = sort_direction or SortDirection.ASC
+        primary_key = inspect(self._model).primary_key[0]
+        sort_columns = list()
         if sort_key:
-            return filtered_query.order_by(sort_direction.value[1](getattr(self._model, sort_key)))
-        else:
-            return filtered_query
-
+            sort_columns.append(getattr(self._model, sort_key))
+        if sort_key or limit or after:
+            sort_columns.append(primary_key)
+
+        if after is not None:
+            after_values = decode_cursor(after)
+            if len(after_values) != len(sort_columns):
+                raise ValueError(f'Page cursor {after} not valid for sorting by {sort_key}')
+            sort_tuple = tuple_(*sort_columns)
+            after_tuple = tuple_(*after_values)
+            filtered_query = filtered_query.filter(
+                sort_tuple > after_tuple if sort_direction == SortDirection.ASC else sort_tuple < after_tuple)
+
+        if sort_columns:
+            filtered_query = filtered_query.order_by(*[sort_direction.value[1](column) for column in sort_columns])
+        if offset:
+            filtered_query = filtered_query.offset(offset)
+        if limit:
+            filtered_query = filtered_query.limit(limit)
+        return filtered_query
+
+    @instrumented
     def get(self, filters: List[Filter] = None,
             sort_key: str = None,
-            sort_direction: SortDirection = None) -> Iterator[DeclarativeMeta]:
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[DeclarativeMeta]:
         """
-        Get the entities which matches the given filters
+        Get the entities which matches the given filters. If a session provider context is open when the iteration
+        starts, its session is used, so the entities written in it are read, and the entities are buffered because
+        the connection is still used by the context. Otherwise the entities are streamed from a server side cursor
+        in chunks of an independent session, kept open until the iteration finishes.
 
         Args:
             filters: filters to be applied
             sort_key: key to sort the results
             sort_direction: sorting direction
+            limit: maximum number of entities to get
+            offset: number of entities to skip
+            after: page cursor of the last entity of the previous page, get the entities after it
+            fields: fields to load, all the fields if not specified
 
         Returns: entities which matches the given filters
 
         """
-        with self._session_provider() as session:
-            return self._get_all(session, filters=filters)
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters, sort_key, sort_direction)
+        current_session = self._session_provider.current_session
+        if current_session is not None:
+            query = self._get_all(current_session, filters=filters, sort_key=sort_key, sort_direction=sort_direction,
+                                  limit=limit, offset=offset, after=after, fields=fields)
+            for entity in query.all():
+                yield entity
+            return
+        with self._session_provider.independent_session() as session:
+            query = self._get_all(session, filters=filters, sort_key=sort_key, sort_direction=sort_direction,
+                                  limit=limit, offset=offset, after=after, fields=fields)
+            for entity in query.yield_per(self._chunk_size).execution_options(stream_results=True):
+                yield entity
+
+    def page_cursor(self, model_instance: DeclarativeMeta, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified entity, used to get the entities after it
+
+        Args:
+            model_instance: last entity of a page
+            sort_key: key used to sort the page entities
+
+        Returns: opaque page cursor
+
+        """
+        primary_key = inspect(self._model).primary_key[0].name
+        if sort_key:
+            return encode_cursor(getattr(model_instance, sort_key), getattr(model_instance, primary_key))
+        return encode_cursor(getattr(model_instance, primary_key))
 
-    def get_one(self, filters: List[Filter] = None) -> Any:
+    @instrumented
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
         """
         Get one entity which matches the given filter
 
         Args:
             filters: filtes to apply
+            fields: fields to load, all the fields if not specified
 
         Returns: entity which matches the given filters
 
         """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._session_provider() as session:
+            return self._get_all(session, filters=filters, fields=fields).first()
+
+    @instrumented
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the entities with any of the specified key values, with one IN query per chunk of values
+
+        Args:
+            key: name of the model field of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: entities by key value, the values without entity are not included
+
+        """
+        fields = list(fields) + [key] if fields and key not in fields else fields
+        entities = dict()
+        with self._session_provider() as session:
+            for in_filter in InFilter.chunks(key, values, chunk_size):
+                if self.index_advisor is not None:
+                    self.index_advisor.record([in_filter])
+                for entity in self._get_all(session, filters=[in_filter], fields=fields):
+                    entities.setdefault(getattr(entity, key), entity)
+        return entities
+
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> List[dict]:
+        """
+        Get the database plan of the query built from the specified parameters, with the EXPLAIN statement of the
+        database dialect
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: sorting direction
+            limit: maximum number of entities to get
+            offset: number of entities to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: rows of the database explain output
+
+        """
+        with self._session_provider() as session:
+            return explain_query(session, self._get_all(session, filters=filters, sort_key=sort_key,
+                                                        sort_direction=sort_direction, limit=limit, offset=offset,
+                                                        after=after))
+
+    @property
+    def operation_target(self) -> str:
+        """
+        Get the name of the table the operations run on
+
+        Returns: model table name
+
+        """
+        return self._model.__tablename__
+
+    def examined(self, filters: List[Filter] = None,
+                 sort_key: str = None,
+                 sort_direction: SortDirection = None,
+                 limit: int = None,
+                 offset: int = None,
+                 after: str = None) -> Optional[int]:
+        """
+        Get the number of rows the database estimates to examine for the query built from the specified parameters
+
+        Args:
+            filters: filters of the query
+            sort_key: key used to sort the query results
+            sort_direction: sorting direction
+            limit: maximum number of entities of the query
+            offset: number of entities skipped by the query
+            after: page cursor of the query
+
+        Returns: estimated number of examined rows, None if the explain output does not report it, like in SQLite
+
+        """
+        plan_rows = [plan_row['rows'] for plan_row in self.explain(filters, sort_key, sort_direction, limit, offset,
+                                                                    after) if plan_row.get('rows')]
+        return sum(plan_rows) if plan_rows else None
+
+    @instrumented
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the entities which match the given filters with a COUNT query
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching entities
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        with self._session_provider() as session:
+            primary_key = inspect(self._model).primary_key[0]
+            return self._filter_query(session.query(func.count(primary_key)), filters).scalar()
+
+    @instrumented
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any entity matches the given filters fetching only the primary key of the first one
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any entity matches, False otherwise
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
         with self._session_provider() as session:
-            return self._get_all(session, filters=filters).first()
+            primary_key = inspect(self._model).primary_key[0]
+            return self._filter_query(session.query(primary_key), filters).limit(1).first() is not None
+
+    def _group_expression(self, group: GroupKey) -> Any:
+        """
+        Get the SQL expression of the group key. The bucketed values are floored, so the negative values fall in
+        the bucket below them like in the memory storage, with a float bucket size to avoid the integer division.
+
+        Args:
+            group: group key
+
+        Returns: SQL expression of the group key values labeled with the key name
+
+        """
+        column = SQLFilterParser.resolve_key(group.key, self._model)
+        if group.bucket_size:
+            return (func.floor(column / float(group.bucket_size)) * group.bucket_size).label(group.key)
+        return column.label(group.key)
+
+    @instrumented
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the entities which match the given filters with a GROUP BY query
 
+        Args:
+            group_by: keys used to group the entities
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+        group_expressions = [self._group_expression(group_key(group)) for group in group_by]
+        aggregation_expressions = list()
+        for aggregation in aggregations:
+            if aggregation.operation == AggregationOperation.COUNT:
+                aggregated = inspect(self._model).primary_key[0]
+            else:
+                aggregated = SQLFilterParser.resolve_key(aggregation.key, self._model)
+            aggregation_expressions.append(aggregation.operation.value[1](aggregated).label(aggregation.alias))
+
+        try:
+            with self._session_provider() as session:
+                query = self._filter_query(session.query(*group_expressions, *aggregation_expressions), filters)
+                if group_expressions:
+                    query = query.group_by(*group_expressions).order_by(*group_expressions)
+                return [row._asdict() for row in query]
+        except Exception as ex:
+            self._logger.error(f'Error trying to aggregate the {self._model.__name__} entities')
+            raise StorageError(str(ex))
+
+    @instrumented
     def delete(self, identifier: Any):
         """
         Delete the entity identified by the given identifier
@@ -154,3 +635,268 @@ class SqlStorage(Storage):
         except Exception as ex:
             self._logger.error(f'Error trying to delete the {self._model.__class__.__name__} with id {identifier}')
             raise StorageError(str(ex))
+
+    @instrumented
+    def delete_many(self, filters: List[Filter]) -> int:
+        """
+        Delete the entities which match the filters with a single DELETE statement
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted entities
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        try:
+            with self._session_provider(read_only=False) as session:
+                return self._filter_query(session.query(self._model), filters).delete(synchronize_session=False)
+        except Exception as ex:
+            self._logger.error(f'Error trying to delete the {self._model.__name__} entities')
+            raise StorageError(str(ex))
+
+    @instrumented
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of the first entity which matches the filters, selecting only its primary key
+        and updating it with an UPDATE statement
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated entities
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        try:
+            with self._session_provider(read_only=False) as session:
+                primary_key = inspect(self._model).primary_key[0]
+                first_match = self._filter_query(session.query(primary_key), filters).limit(1).first()
+                if first_match is None:
+                    return 0
+                return session.query(self._model).filter(primary_key == first_match[0]).update(
+                    changes, synchronize_session=False)
+        except Exception as ex:
+            self._logger.error(f'Error trying to update the {self._model.__name__} entity')
+            raise StorageError(str(ex))
+
+    @instrumented
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of all the entities which match the filters with a single UPDATE statement
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated entities
+
+        """
+        if self.index_advisor is not None:
+            self.index_advisor.record(filters)
+        try:
+            with self._session_provider(read_only=False) as session:
+                return self._filter_query(session.query(self._model), filters).update(changes,
+                                                                                      synchronize_session=False)
+        except Exception as ex:
+            self._logger.error(f'Error trying to update the {self._model.__name__} entities')
+            raise StorageError(str(ex))
+
+    def drop(self):
+        """
+        Drop the model table with its rows and indexes, the table has to be created again to use the storage
+        """
+        try:
+            self._model.__table__.drop(self._session_provider.engine, checkfirst=True)
+        except Exception as ex:
+            self._logger.error(f'Error trying to drop the {self._model.__name__} table')
+            raise StorageError(str(ex))
+
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the indexes existing in the model table, including the primary key and the unique constraints
+
+        Returns: existing indexes specifications
+
+        """
+        inspector = inspect(self._session_provider.engine)
+        table_name = self._model.__table__.name
+
+        primary_key = inspector.get_pk_constraint(table_name)
+        indexes = [IndexSpec.of(*primary_key['constrained_columns'], unique=True, name=primary_key.get('name'))]
+        indexes.extend(IndexSpec.of(*index['column_names'], unique=bool(index['unique']), name=index['name'])
+                       for index in inspector.get_indexes(table_name))
+        indexes.extend(IndexSpec.of(*constraint['column_names'], unique=True, name=constraint['name'])
+                       for constraint in inspector.get_unique_constraints(table_name))
+        return indexes
+
+    def _create_indexes(self, indexes: List[IndexSpec]) -> List[str]:
+        """
+        Create the specified indexes in the model table
+
+        Args:
+            indexes: specifications of the indexes to create
+
+        Returns: names of the created indexes
+
+        """
+        table_name = self._model.__table__.name
+        index_names = list()
+        for index in indexes:
+            index_name = index.name or f'ix_{table_name}_{"_".join(index.fields)}'
+            columns = [direction.value[1](SQLFilterParser.resolve_key(key, self._model))
+                       for key, direction in index.keys]
+            Index(index_name, *columns, unique=index.unique).create(bind=self._session_provider.engine)
+            index_names.append(index_name)
+        return index_names
+
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared model table indexes which do not exist
+
+        Returns: names of the ensured indexes
+
+        """
+        existing_indexes = self.existing_indexes()
+        missing_indexes = [index for index in self._indexes
+                           if not any(existing.fields == index.fields for existing in existing_indexes)]
+        try:
+            self._create_indexes(missing_indexes)
+        except Exception as ex:
+            self._logger.error(f'Error trying to create the {self._model.__name__} indexes')
+            raise StorageError(str(ex))
+        return [index.name or f'ix_{self._model.__table__.name}_{"_".join(index.fields)}' for index in self._indexes]
+
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the indexes needed by the queries recorded by the index advisor which do not exist in the table
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
+        if self.index_advisor is None:
+            raise ValueError('Index advisor not enabled')
+        missing_indexes = self.index_advisor.advise(self.existing_indexes(), self._logger,
+                                                    self._model.__table__.name, min_usages=min_usages)
+        if create and missing_indexes:
+            self._create_indexes(missing_indexes)
+        return missing_indexes
+
+    def _last_insert_position(self, resume_store: ResumeTokenStore = None, consumer: str = None) -> Any:
+        """
+        Get the insert column value after which the inserts are consumed, the checkpoint of the consumer if any
+
+        Args:
+            resume_store: store with the consumers checkpoints
+            consumer: name of the consumer checkpoints in the resume store
+
+        Returns: last consumed insert column value, the current maximum if the consumer has no checkpoint
+
+        """
+        position = resume_store.load(consumer) if resume_store is not None else None
+        if position is None:
+            with self._session_provider() as session:
+                position = session.query(func.max(getattr(self._model, self._insert_column))).scalar()
+        return position
+
+    def _inserts_after(self, position: Any, limit: int, fields: List[str] = None) -> List[DeclarativeMeta]:
+        """
+        Get the entities inserted after the specified insert column value, with a single range query over the
+        insert column index
+
+        Args:
+            position: insert column value of the last consumed insert, None to get the first inserts
+            limit: maximum number of entities to get
+            fields: fields to load, all the fields if not specified
+
+        Returns: inserted entities sorted by insert column
+
+        """
+        filters = [RangeFilter(self._insert_column, lower=position)] if position is not None else None
+        with self._session_provider() as session:
+            return self._get_all(session, filters=filters, sort_key=self._insert_column, limit=limit,
+                                 fields=fields).all()
+
+    def consume_inserts(self, fields: List[str] = None,
+                        resume_store: ResumeTokenStore = None,
+                        consumer: str = None) -> Iterator[DeclarativeMeta]:
+        """
+        Consume the inserts polling the entities after the last consumed value of the insert column, fetched in
+        chunks. The polls are spaced by the poll interval while there are new inserts, and the interval is doubled
+        on each empty poll up to the maximum poll interval. The insert column value of each consumed insert is
+        checkpointed if a resume store is specified. The inserts committed with an insert column value lower than
+        an already consumed one are not consumed.
+
+        Args:
+            fields: fields of the inserted entities to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed inserts and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the table name if not specified
+
+        Returns: iterator to the inserted entities
+
+        """
+        consumer = consumer or self._model.__tablename__
+        position = self._last_insert_position(resume_store, consumer)
+        interval = self._poll_interval
+        while True:
+            inserted_entities = self._inserts_after(position, self._chunk_size, fields)
+            for inserted_entity in inserted_entities:
+                yield inserted_entity
+                position = getattr(inserted_entity, self._insert_column)
+                if resume_store is not None:
+                    resume_store.save(consumer, position)
+            if len(inserted_entities) < self._chunk_size:
+                interval = self._poll_interval if inserted_entities else interval
+                sleep(interval)
+                if not inserted_entities:
+                    interval = min(interval * 2, self._max_poll_interval)
+
+    def consume_insert_batches(self, batch_size: int = DEFAULT_BATCH_SIZE,
+                               batch_window: float = DEFAULT_BATCH_WINDOW,
+                               fields: List[str] = None,
+                               resume_store: ResumeTokenStore = None,
+                               consumer: str = None) -> Iterator[List[DeclarativeMeta]]:
+        """
+        Consume the inserts in batches, bounded by size and by time window, polling the entities after the last
+        consumed value of the insert column with the adaptive poll interval. The insert column value of the last
+        insert of each batch is checkpointed once the batch is processed, when the next batch is requested.
+
+        Args:
+            batch_size: maximum number of inserted entities of a batch
+            batch_window: maximum seconds to wait for the inserted entities of a batch
+            fields: fields of the inserted entities to load, all the fields if not specified
+            resume_store: store used to checkpoint the consumed batches and to resume consuming after the last one
+            consumer: name of the consumer checkpoints in the resume store, the table name if not specified
+
+        Returns: iterator to the not empty batches of inserted entities
+
+        """
+        consumer = consumer or self._model.__tablename__
+        position = self._last_insert_position(resume_store, consumer)
+        interval = self._poll_interval
+        while True:
+            batch = list()
+            deadline = monotonic() + batch_window
+            while len(batch) < batch_size:
+                inserted_entities = self._inserts_after(position, batch_size - len(batch), fields)
+                if inserted_entities:
+                    batch.extend(inserted_entities)
+                    position = getattr(inserted_entities[-1], self._insert_column)
+                    interval = self._poll_interval
+                remaining = deadline - monotonic()
+                if len(batch) >= batch_size or remaining <= 0:
+                    break
+                sleep(min(interval, remaining))
+                if not inserted_entities:
+                    interval = min(interval * 2, self._max_poll_interval)
+            if batch:
+                yield batch
+                if resume_store is not None:
+                    resume_store.save(consumer, position)
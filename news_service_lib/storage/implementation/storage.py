@@ -2,11 +2,16 @@
 Abstract storage module
 """
 from abc import ABCMeta, abstractmethod
-from typing import Iterator, List, Any
+from typing import Dict, Iterable, Iterator, List, Any, Union
 
+from ..aggregation import Aggregation, GroupKey
+from ..bulk_save_result import BulkSaveResult
 from ..filter.filter import Filter
+from ..index_spec import IndexSpec
 from ..sort_direction import SortDirection
 
+KEYS_CHUNK_SIZE = 1000
+
 
 class Storage(metaclass=ABCMeta):
     """
@@ -23,10 +28,70 @@ class Storage(metaclass=ABCMeta):
 
         """
 
+    @abstractmethod
+    def save_many(self, items: List[Any], ordered: bool = False) -> BulkSaveResult:
+        """
+        Persist the specified items in bulk. A failing item does not abort the rest of the batch unless
+        ordered is specified, in which case the items after the first failing one are not persisted.
+
+        Args:
+            items: items to persist
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+
+    @abstractmethod
+    def upsert(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Persist the specified item, updating the stored item with the same key fields values if it exists. The key
+        fields should be covered by a unique index.
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if an existing item was updated
+
+        """
+
+    @abstractmethod
+    def upsert_many(self, items: List[Any], key_fields: List[str], ordered: bool = False) -> BulkSaveResult:
+        """
+        Upsert the specified items in bulk
+
+        Args:
+            items: items to persist
+            key_fields: fields identifying the items
+            ordered: True to stop persisting at the first failing item, False otherwise
+
+        Returns: result with the persisted items and the per item errors
+
+        """
+
+    @abstractmethod
+    def save_if_absent(self, item: Any, key_fields: List[str]) -> bool:
+        """
+        Persist the specified item only if there is no stored item with the same key fields values. The key
+        fields should be covered by a unique index.
+
+        Args:
+            item: item to persist
+            key_fields: fields identifying the item
+
+        Returns: True if the item was inserted, False if it was already stored
+
+        """
+
     @abstractmethod
     def get(self, filters: List[Filter] = None,
             sort_key: str = None,
-            sort_direction: SortDirection = None) -> Iterator[Any]:
+            sort_direction: SortDirection = None,
+            limit: int = None,
+            offset: int = None,
+            after: str = None,
+            fields: List[str] = None) -> Iterator[Any]:
         """
         Get items from the storage. If filters are provided filter results.
 
@@ -34,23 +99,120 @@ class Storage(metaclass=ABCMeta):
             filters: filters to apply
             sort_key: key to sort the results
             sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, get the items after it
+            fields: fields to load, all the fields if not specified
 
         Returns: iterator to dictionary representation of the items
 
         """
 
     @abstractmethod
-    def get_one(self, filters: List[Filter] = None) -> Any:
+    def page_cursor(self, item: Any, sort_key: str = None) -> str:
+        """
+        Get the page cursor of the specified item, used to get the items after it
+
+        Args:
+            item: last item of a page
+            sort_key: key used to sort the page items
+
+        Returns: opaque page cursor
+
+        """
+
+    @abstractmethod
+    def get_one(self, filters: List[Filter] = None, fields: List[str] = None) -> Any:
         """
         Get a unique storage item which matches the filters if provided
 
         Args:
             filters: filters to apply
+            fields: fields to load, all the fields if not specified
 
         Returns: persisted item matching filters
 
         """
 
+    @abstractmethod
+    def get_many_by_key(self, key: str, values: Iterable[Any], fields: List[str] = None,
+                        chunk_size: int = KEYS_CHUNK_SIZE) -> Dict[Any, Any]:
+        """
+        Get the items with any of the specified key values, with one query per chunk of values instead of one
+        query per value. The key should identify the items, only the first item found for each value is returned.
+
+        Args:
+            key: key of the values to look up
+            values: values to look up
+            fields: fields to load, all the fields if not specified
+            chunk_size: maximum number of values of each query
+
+        Returns: items by key value, the values without item are not included
+
+        """
+
+    @abstractmethod
+    def explain(self, filters: List[Filter] = None,
+                sort_key: str = None,
+                sort_direction: SortDirection = None,
+                limit: int = None,
+                offset: int = None,
+                after: str = None) -> Any:
+        """
+        Get the storage backend plan of the query built from the specified parameters
+
+        Args:
+            filters: filters to apply
+            sort_key: key to sort the results
+            sort_direction: direction of the result sorting
+            limit: maximum number of items to get
+            offset: number of items to skip
+            after: page cursor of the last item of the previous page, explain the query of the items after it
+
+        Returns: backend query plan
+
+        """
+
+    @abstractmethod
+    def count(self, filters: List[Filter] = None) -> int:
+        """
+        Count the storage items which match the filters if provided
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of matching items
+
+        """
+
+    @abstractmethod
+    def exists(self, filters: List[Filter] = None) -> bool:
+        """
+        Check if any storage item matches the filters if provided
+
+        Args:
+            filters: filters to apply
+
+        Returns: True if any item matches, False otherwise
+
+        """
+
+    @abstractmethod
+    def aggregate(self, group_by: List[Union[str, GroupKey]],
+                  aggregations: List[Aggregation],
+                  filters: List[Filter] = None) -> List[dict]:
+        """
+        Aggregate the storage items which match the filters if provided, grouped by the specified keys
+
+        Args:
+            group_by: keys used to group the items
+            aggregations: aggregations to compute for each group
+            filters: filters to apply
+
+        Returns: one dictionary per group with the group keys values and the aggregations values, sorted by group
+
+        """
+
     @abstractmethod
     def delete(self, identifier: Any):
         """
@@ -60,3 +222,78 @@ class Storage(metaclass=ABCMeta):
             identifier: identifier of the item to delete
 
         """
+
+    @abstractmethod
+    def delete_many(self, filters: List[Filter]) -> int:
+        """
+        Delete the stored items which match the filters
+
+        Args:
+            filters: filters to apply
+
+        Returns: number of deleted items
+
+        """
+
+    @abstractmethod
+    def update(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of the first stored item which matches the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+
+    @abstractmethod
+    def update_many(self, filters: List[Filter], changes: dict) -> int:
+        """
+        Update the specified fields of all the stored items which match the filters
+
+        Args:
+            filters: filters to apply
+            changes: new values of the fields to update
+
+        Returns: number of updated items
+
+        """
+
+    @abstractmethod
+    def drop(self):
+        """
+        Drop all the stored items with the underlying collection or table, without deleting them one by one
+        """
+
+    @abstractmethod
+    def existing_indexes(self) -> List[IndexSpec]:
+        """
+        Get the indexes existing in the storage
+
+        Returns: existing indexes specifications
+
+        """
+
+    @abstractmethod
+    def ensure_indexes(self) -> List[str]:
+        """
+        Create the declared indexes which do not exist in the storage
+
+        Returns: names of the ensured indexes
+
+        """
+
+    @abstractmethod
+    def advise_indexes(self, create: bool = False, min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the indexes needed by the queries recorded by the index advisor which do not exist in the storage
+
+        Args:
+            create: True to create the missing indexes, False to only report them
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes specifications
+
+        """
@@ -0,0 +1,125 @@
+"""
+Storage index advisor module
+"""
+from collections import Counter
+from logging import Logger
+from threading import Lock
+from typing import List, Optional, Tuple, Union
+
+from ..config import config_bool
+from .filter.boolean_filter import BooleanFilter, normalize_filters
+from .filter.filter import Filter
+from .filter.in_filter import InFilter
+from .filter.match_filter import MatchFilter
+from .index_spec import IndexSpec
+from .sort_direction import SortDirection
+
+
+class IndexAdvisor:
+    """
+    Record the filter and sort keys of the storage queries and report the compound indexes they would need
+    """
+
+    def __init__(self):
+        """
+        Initialize the index advisor
+        """
+        self._usages = Counter()
+        self._lock = Lock()
+
+    @staticmethod
+    def enabled(option: Union[bool, str, None]) -> bool:
+        """
+        Check if the index advisor storage option enables it. The option can be a configuration string.
+
+        Args:
+            option: index advisor option value
+
+        Returns: True if the index advisor is enabled, False otherwise
+
+        """
+        return config_bool(option)
+
+    @staticmethod
+    def suggest(filters: List[Filter] = None, sort_key: str = None,
+                sort_direction: SortDirection = None) -> Optional[IndexSpec]:
+        """
+        Get the index which best serves the query, with the equality and in keys first, then the sort key and then
+        the range keys. The or and not filters are not considered.
+
+        Args:
+            filters: filters of the query
+            sort_key: key used to sort the query results
+            sort_direction: direction of the query results sorting
+
+        Returns: suggested index specification, None if the query does not need an index
+
+        """
+        filters = [filter_instance for filter_instance in normalize_filters(filters)
+                   if not isinstance(filter_instance, BooleanFilter)]
+        equality_keys = sorted({filter_instance.key for filter_instance in filters
+                                if isinstance(filter_instance, (MatchFilter, InFilter))})
+        range_keys = sorted({filter_instance.key for filter_instance in filters} - set(equality_keys) - {sort_key})
+
+        keys = [(key, SortDirection.ASC) for key in equality_keys]
+        if sort_key and sort_key not in equality_keys:
+            keys.append((sort_key, sort_direction or SortDirection.ASC))
+        keys.extend((key, SortDirection.ASC) for key in range_keys)
+        return IndexSpec(tuple(keys)) if keys else None
+
+    def record(self, filters: List[Filter] = None, sort_key: str = None, sort_direction: SortDirection = None):
+        """
+        Record a query
+
+        Args:
+            filters: filters of the query
+            sort_key: key used to sort the query results
+            sort_direction: direction of the query results sorting
+
+        """
+        index = self.suggest(filters, sort_key, sort_direction)
+        if index is not None:
+            with self._lock:
+                self._usages[index] += 1
+
+    def missing_indexes(self, existing_indexes: List[IndexSpec], min_usages: int = 1) -> List[Tuple[IndexSpec, int]]:
+        """
+        Get the suggested indexes of the recorded queries not covered by the existing indexes
+
+        Args:
+            existing_indexes: indexes existing in the storage
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes with the number of recorded queries they serve, most used first
+
+        """
+        with self._lock:
+            usages = self._usages.most_common()
+        return [(index, count) for index, count in usages
+                if count >= min_usages and not any(existing.covers(index) for existing in existing_indexes)]
+
+    def advise(self, existing_indexes: List[IndexSpec], logger: Logger, target: str,
+               min_usages: int = 1) -> List[IndexSpec]:
+        """
+        Report the missing indexes of the recorded queries through the logger
+
+        Args:
+            existing_indexes: indexes existing in the storage
+            logger: logger used to report the missing indexes
+            target: name of the collection or table the queries were run on
+            min_usages: minimum number of recorded queries to report an index
+
+        Returns: missing indexes, most used first
+
+        """
+        missing_indexes = self.missing_indexes(existing_indexes, min_usages)
+        for index, usages in missing_indexes:
+            logger.warning(f'Missing index on {target} {index.fields} used by {usages} queries')
+        return [index for index, _ in missing_indexes]
+
+    def reset(self):
+        """
+        Clear the recorded queries
+        """
+        with self._lock:
+            self._usages.clear()
@@ -0,0 +1,55 @@
+"""
+Storage index specification module
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from .sort_direction import SortDirection
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    Declarative index specification, with the index keys in order and their sort directions
+    """
+    keys: Tuple[Tuple[str, SortDirection], ...]
+    unique: bool = False
+    name: Optional[str] = None
+
+    @classmethod
+    def of(cls, *keys: str, unique: bool = False, name: str = None) -> 'IndexSpec':
+        """
+        Create an ascending index specification for the specified keys
+
+        Args:
+            *keys: index keys in order
+            unique: True if the index should be unique, False otherwise
+            name: name of the index, generated from the keys if not specified
+
+        Returns: index specification
+
+        """
+        return cls(tuple((key, SortDirection.ASC) for key in keys), unique=unique, name=name)
+
+    @property
+    def fields(self) -> Tuple[str, ...]:
+        """
+        Get the index keys names
+
+        Returns: tuple with the names of the index keys in order
+
+        """
+        return tuple(key for key, _ in self.keys)
+
+    def covers(self, other: 'IndexSpec') -> bool:
+        """
+        Check if this index can serve the queries served by the other index, that is, if the other index keys are
+        a prefix of this index keys
+
+        Args:
+            other: index to check
+
+        Returns: True if this index covers the other one, False otherwise
+
+        """
+        return self.fields[:len(other.fields)] == other.fields
@@ -0,0 +1,194 @@
+"""
+In memory storage indexes module
+"""
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Dict, Hashable, Iterator, List, Set, Tuple
+
+from .filter.parsers.memory_filter_parser import item_value, MISSING
+
+
+class _Bottom:
+    """
+    Value lower than any other value
+    """
+    def __lt__(self, _):
+        return True
+
+    def __gt__(self, _):
+        return False
+
+
+class _Top:
+    """
+    Value greater than any other value
+    """
+    def __lt__(self, _):
+        return False
+
+    def __gt__(self, _):
+        return True
+
+
+BOTTOM = _Bottom()
+TOP = _Top()
+
+
+def sort_value(value: Any) -> Tuple:
+    """
+    Get the comparable form of an item value, with the missing and null values sorted before the rest
+
+    Args:
+        value: item value
+
+    Returns: sortable tuple of the value
+
+    """
+    return (0,) if value is MISSING or value is None else (1, value)
+
+
+class HashIndex:
+    """
+    Index of the item identifiers by the value of a key, for the equality lookups
+    """
+
+    def __init__(self, key: str):
+        """
+        Initialize the hash index
+
+        Args:
+            key: indexed key
+        """
+        self.key = key
+        self._identifiers: Dict[Hashable, Set[Any]] = dict()
+
+    @staticmethod
+    def _hashable(value: Any) -> Any:
+        """
+        Get the hashable form of the value
+
+        Args:
+            value: item value
+
+        Returns: value if hashable, MISSING otherwise
+
+        """
+        try:
+            hash(value)
+            return value
+        except TypeError:
+            return MISSING
+
+    def add(self, identifier: Any, item: dict):
+        """
+        Index the item
+
+        Args:
+            identifier: item identifier
+            item: item to index
+
+        """
+        value = item_value(item, self.key)
+        value = None if value is MISSING else self._hashable(value)
+        if value is not MISSING:
+            self._identifiers.setdefault(value, set()).add(identifier)
+
+    def remove(self, identifier: Any, item: dict):
+        """
+        Remove the item from the index
+
+        Args:
+            identifier: item identifier
+            item: indexed item
+
+        """
+        value = item_value(item, self.key)
+        value = None if value is MISSING else self._hashable(value)
+        identifiers = self._identifiers.get(value)
+        if identifiers is not None:
+            identifiers.discard(identifier)
+            if not identifiers:
+                del self._identifiers[value]
+
+    def lookup(self, value: Any) -> Set[Any]:
+        """
+        Get the identifiers of the items with the specified value
+
+        Args:
+            value: value to look up
+
+        Returns: identifiers of the matching items
+
+        """
+        return self._identifiers.get(self._hashable(value), set())
+
+
+class SortedIndex:
+    """
+    Index of the item identifiers sorted by the value of a key and by identifier, for the range lookups and the
+    sorted iterations. The indexed values should be comparable between them.
+    """
+
+    def __init__(self, key: str):
+        """
+        Initialize the sorted index
+
+        Args:
+            key: indexed key
+        """
+        self.key = key
+        self._entries: List[Tuple[Tuple, Any]] = list()
+
+    def add(self, identifier: Any, item: dict):
+        """
+        Index the item. If its value can not be compared with the indexed values the TypeError is raised before
+        changing the index.
+
+        Args:
+            identifier: item identifier
+            item: item to index
+
+        """
+        insort(self._entries, (sort_value(item_value(item, self.key)), identifier))
+
+    def remove(self, identifier: Any, item: dict):
+        """
+        Remove the item from the index
+
+        Args:
+            identifier: item identifier
+            item: indexed item
+
+        """
+        entry = (sort_value(item_value(item, self.key)), identifier)
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def range(self, lower: Any = None, upper: Any = None) -> List[Any]:
+        """
+        Get the identifiers of the items with a value between the specified limits, not included
+
+        Args:
+            lower: lower limit of the range
+            upper: upper limit of the range
+
+        Returns: identifiers of the matching items sorted by value
+
+        """
+        start = bisect_left(self._entries, ((0,), TOP)) if lower is None \
+            else bisect_right(self._entries, ((1, lower), TOP))
+        end = len(self._entries) if upper is None else bisect_left(self._entries, ((1, upper), BOTTOM))
+        return [identifier for _, identifier in self._entries[start:end]]
+
+    def iterate(self, reverse: bool = False) -> Iterator[Any]:
+        """
+        Iterate the indexed identifiers sorted by value and identifier
+
+        Args:
+            reverse: True to iterate from the greatest value, False otherwise
+
+        Returns: iterator to the identifiers
+
+        """
+        entries = reversed(self._entries) if reverse else iter(self._entries)
+        return (identifier for _, identifier in entries)
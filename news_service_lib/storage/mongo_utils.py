@@ -1,8 +1,92 @@
 """
 MongoDB utilities module
 """
+import os
+from logging import Logger
+from threading import Lock
+from typing import Dict, List, Optional, Tuple, Union
+
+import pymongo
 from pymongo import MongoClient
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.errors import ServerSelectionTimeoutError, BulkWriteError
+from pymongo.read_preferences import Primary, PrimaryPreferred, Secondary, SecondaryPreferred, Nearest, \
+    _ServerMode
+from pymongo.write_concern import WriteConcern
+
+from ..config import config_bool
+from .bulk_save_result import BulkSaveResult, BulkSaveError
+from .exceptions import StorageError, StorageIntegrityError
+
+DUPLICATE_KEY_ERROR_CODE = 11000
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest
+}
+
+_mongo_clients: Dict[Tuple[int, Tuple[str, ...], str], MongoClient] = dict()
+_mongo_clients_lock = Lock()
+
+
+def shared_mongo_client(members: List[str], rsname: str) -> MongoClient:
+    """
+    Get the client of the specified replicaset shared by all the storages of the process, creating it if it does
+    not exist. The client connects lazily on its first operation, so it does not block the service startup, and
+    its connection pool is shared by all the collections. The forked processes get their own clients.
+
+    Args:
+        members: replicaset members addresses
+        rsname: replicaset name
+
+    Returns: shared client of the replicaset
+
+    """
+    members = tuple(sorted(member.strip() for member in members))
+    key = (os.getpid(), members, rsname)
+    with _mongo_clients_lock:
+        mongo_client = _mongo_clients.get(key)
+        if mongo_client is None:
+            mongo_client = pymongo.MongoClient(list(members), replicaset=rsname, connect=False)
+            _mongo_clients[key] = mongo_client
+        return mongo_client
+
+
+def close_mongo_clients():
+    """
+    Close the shared clients of the current process, the next storages will get new clients
+    """
+    with _mongo_clients_lock:
+        for key in [key for key in _mongo_clients if key[0] == os.getpid()]:
+            _mongo_clients.pop(key).close()
+
+
+def init_replicaset(members: List[str], rsname: str, logger: Logger) -> bool:
+    """
+    Initiate the replicaset with the specified members through the first one. It is an administration step for the
+    development and test deployments, which should be run once before using the storages.
+
+    Args:
+        members: replicaset members addresses
+        rsname: replicaset name
+        logger: logger used to report the replicaset already initiated
+
+    Returns: True if the replicaset was initiated, False if it was already initiated or not available
+
+    """
+    first_host, first_port = members[0].strip().split(':')
+    rs_config = {'_id': rsname, 'members': [{'_id': index, 'host': member.strip()}
+                                            for index, member in enumerate(members)]}
+    mongo_admin_client = pymongo.MongoClient(first_host, int(first_port), connect=True)
+    try:
+        mongo_admin_client.admin.command('replSetInitiate', rs_config)
+        return True
+    except Exception as ex:
+        logger.info('Replicaset already initialized %s', str(ex))
+        return False
+    finally:
+        mongo_admin_client.close()
 
 
 def mongo_health_check(mongo_client: MongoClient) -> bool:
@@ -20,3 +104,79 @@ def mongo_health_check(mongo_client: MongoClient) -> bool:
         return True
     except ServerSelectionTimeoutError:
         return False
+
+
+def bulk_save_result(items: List[dict], ordered: bool, bulk_write_error: BulkWriteError = None) -> BulkSaveResult:
+    """
+    Build the bulk save result of a mongodb bulk insert
+
+    Args:
+        items: items sent to the bulk insert
+        ordered: True if the bulk insert was ordered, False otherwise
+        bulk_write_error: error raised by the bulk insert if any
+
+    Returns: result with the persisted items and the per item errors
+
+    """
+    item_errors = dict()
+    if bulk_write_error is not None:
+        for write_error in bulk_write_error.details.get('writeErrors', []):
+            error_class = StorageIntegrityError if write_error.get('code') == DUPLICATE_KEY_ERROR_CODE \
+                else StorageError
+            item_errors[write_error['index']] = error_class(write_error.get('errmsg'))
+        if ordered and item_errors:
+            for index in range(min(item_errors) + 1, len(items)):
+                item_errors[index] = StorageError('Item not processed because a previous item failed')
+
+    result = BulkSaveResult()
+    for index, item in enumerate(items):
+        if index in item_errors:
+            result.errors.append(BulkSaveError(index, item, item_errors[index]))
+        else:
+            result.saved.append(item)
+    return result
+
+
+def read_preference(mode: str = None, max_staleness: Union[int, str] = None) -> Optional[_ServerMode]:
+    """
+    Build the read preference of the specified mode
+
+    Args:
+        mode: read preference mode name (primary, primaryPreferred, secondary, secondaryPreferred or nearest)
+        max_staleness: maximum replication lag in seconds of the secondaries to read from, not applied to primary
+
+    Returns: read preference, None if the mode is not specified
+
+    """
+    if not mode:
+        return None
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f'Read preference {mode} not supported')
+    if mode == 'primary':
+        return Primary()
+    return READ_PREFERENCES[mode](max_staleness=int(max_staleness) if max_staleness not in (None, '') else -1)
+
+
+def write_concern(w: Union[int, str] = None, j: Union[bool, str] = None, wtimeout: Union[int, str] = None,
+                  base: WriteConcern = None) -> Optional[WriteConcern]:
+    """
+    Build the write concern with the specified acknowledgment options. The options can be the configuration
+    strings.
+
+    Args:
+        w: number of members or tag which should acknowledge the writes, majority for the majority of them
+        j: True to wait for the writes to be journaled
+        wtimeout: maximum milliseconds to wait for the acknowledgment
+        base: write concern whose options are kept if not specified
+
+    Returns: write concern, None if no option is specified
+
+    """
+    options = dict(base.document) if base is not None else dict()
+    if w not in (None, ''):
+        options['w'] = int(w) if str(w).isdigit() else w
+    if j not in (None, ''):
+        options['j'] = config_bool(j)
+    if wtimeout not in (None, ''):
+        options['wtimeout'] = int(wtimeout)
+    return WriteConcern(**options) if options else None
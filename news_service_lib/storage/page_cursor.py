@@ -0,0 +1,70 @@
+"""
+Storage keyset pagination cursors module
+"""
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+from typing import Any, List
+
+from bson import json_util
+
+DATETIME_TAG = '$datetime'
+
+
+def _encode_value(value: Any) -> Any:
+    """
+    Get the serializable form of a keyset value. The datetimes are tagged ISO strings, which keep their
+    microseconds and their timezone if any, because the extended JSON dates are truncated to milliseconds and
+    made timezone aware, which would make the keyset conditions return again the last item of the page.
+
+    Args:
+        value: keyset value
+
+    Returns: serializable keyset value
+
+    """
+    return {DATETIME_TAG: value.isoformat()} if isinstance(value, datetime) else value
+
+
+def _decode_value(value: Any) -> Any:
+    """
+    Get the keyset value of its serialized form
+
+    Args:
+        value: serialized keyset value
+
+    Returns: keyset value, the tagged datetimes as naive or timezone aware datetimes like the encoded ones
+
+    """
+    if isinstance(value, dict) and list(value) == [DATETIME_TAG]:
+        return datetime.fromisoformat(value[DATETIME_TAG])
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the keyset values of the last item of a page into an opaque cursor
+
+    Args:
+        *values: keyset values of the last item of the page (sort key value if sorted and primary key value)
+
+    Returns: opaque page cursor
+
+    """
+    return urlsafe_b64encode(json_util.dumps([_encode_value(value) for value in values]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode the keyset values of the input opaque cursor
+
+    Args:
+        cursor: opaque page cursor
+
+    Returns: keyset values of the last item of the previous page
+
+    """
+    try:
+        values = json_util.loads(urlsafe_b64decode(cursor.encode()).decode())
+        return [_decode_value(value) for value in values]
+    except Exception as ex:
+        raise ValueError(f'Invalid page cursor {cursor}') from ex
@@ -0,0 +1,92 @@
+"""
+Storage time partitions granularity definitions module
+"""
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from typing import Optional, Union
+
+
+def partition_datetime(value: Union[date, datetime]) -> datetime:
+    """
+    Get the naive datetime used to partition the specified date. The timezone aware datetimes are partitioned by
+    their UTC time.
+
+    Args:
+        value: date or datetime to partition
+
+    Returns: naive datetime of the value
+
+    """
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo is not None else value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    raise TypeError(f'{value!r} is not a date')
+
+
+class PartitionGranularity(Enum):
+    """
+    Time span of the storage partitions:
+    - MONTH = one partition per calendar month, suffixed with the year and month like 2020_01
+    - WEEK = one partition per ISO week, starting on monday, suffixed with the ISO year and week like 2020_w01
+    """
+    MONTH = '%Y_%m'
+    WEEK = '%G_w%V'
+
+    def start(self, value: Union[date, datetime]) -> datetime:
+        """
+        Get the start of the partition which contains the specified date
+
+        Args:
+            value: date or datetime contained by the partition
+
+        Returns: partition start datetime
+
+        """
+        value = partition_datetime(value)
+        if self == PartitionGranularity.MONTH:
+            return datetime(value.year, value.month, 1)
+        return datetime(value.year, value.month, value.day) - timedelta(days=value.weekday())
+
+    def end(self, start: datetime) -> datetime:
+        """
+        Get the end of the partition with the specified start, which is the start of the next partition
+
+        Args:
+            start: partition start datetime
+
+        Returns: partition end datetime, not included in the partition
+
+        """
+        if self == PartitionGranularity.MONTH:
+            return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return start + timedelta(weeks=1)
+
+    def suffix(self, start: datetime) -> str:
+        """
+        Get the name suffix of the partition with the specified start
+
+        Args:
+            start: partition start datetime
+
+        Returns: partition name suffix
+
+        """
+        return start.strftime(self.value)
+
+    def parse(self, suffix: str) -> Optional[datetime]:
+        """
+        Get the start of the partition with the specified name suffix
+
+        Args:
+            suffix: partition name suffix
+
+        Returns: partition start datetime, None if the suffix is not valid for the granularity
+
+        """
+        try:
+            start = datetime.strptime(f'{suffix}_1' if self == PartitionGranularity.WEEK else suffix,
+                                      f'{self.value}_%u' if self == PartitionGranularity.WEEK else self.value)
+        except ValueError:
+            return None
+        return start if self.suffix(start) == suffix else None
@@ -0,0 +1,115 @@
+"""
+Change stream resume tokens stores module
+"""
+from abc import ABCMeta, abstractmethod
+from threading import Lock
+from typing import Any, Optional
+
+from pymongo.collection import Collection
+
+
+class ResumeTokenStore(metaclass=ABCMeta):
+    """
+    Store of the change stream resume tokens checkpointed by the consumers, used to resume consuming the changes
+    after the last processed one
+    """
+
+    @abstractmethod
+    def load(self, consumer: str) -> Optional[Any]:
+        """
+        Load the last checkpointed resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+
+        Returns: last resume token of the consumer, None if it has no checkpoint
+
+        """
+
+    @abstractmethod
+    def save(self, consumer: str, token: Any):
+        """
+        Checkpoint the resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+            token: resume token of the last processed change
+
+        """
+
+
+class MemoryResumeTokenStore(ResumeTokenStore):
+    """
+    Resume tokens store keeping the checkpoints in the process memory
+    """
+
+    def __init__(self):
+        """
+        Initialize the memory resume tokens store
+        """
+        self._tokens = dict()
+        self._lock = Lock()
+
+    def load(self, consumer: str) -> Optional[Any]:
+        """
+        Load the last checkpointed resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+
+        Returns: last resume token of the consumer, None if it has no checkpoint
+
+        """
+        with self._lock:
+            return self._tokens.get(consumer)
+
+    def save(self, consumer: str, token: Any):
+        """
+        Checkpoint the resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+            token: resume token of the last processed change
+
+        """
+        with self._lock:
+            self._tokens[consumer] = token
+
+
+class MongoResumeTokenStore(ResumeTokenStore):
+    """
+    Resume tokens store persisting the checkpoints in a mongodb collection, one document per consumer
+    """
+
+    def __init__(self, collection: Collection):
+        """
+        Initialize the mongodb resume tokens store
+
+        Args:
+            collection: collection used to persist the checkpoints
+        """
+        self._collection = collection
+
+    def load(self, consumer: str) -> Optional[Any]:
+        """
+        Load the last checkpointed resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+
+        Returns: last resume token of the consumer, None if it has no checkpoint
+
+        """
+        checkpoint = self._collection.find_one({'_id': consumer})
+        return checkpoint['token'] if checkpoint else None
+
+    def save(self, consumer: str, token: Any):
+        """
+        Checkpoint the resume token of the consumer
+
+        Args:
+            consumer: name of the consumer
+            token: resume token of the last processed change
+
+        """
+        self._collection.replace_one({'_id': consumer}, {'_id': consumer, 'token': token}, upsert=True)
@@ -0,0 +1,211 @@
+"""
+Storage slow operations instrumentation module
+"""
+import functools
+from dataclasses import dataclass
+from inspect import isgeneratorfunction, signature
+from logging import Logger
+from time import perf_counter
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+
+import elasticapm
+
+from ..config import config_bool
+from .filter.boolean_filter import BooleanFilter, normalize_filters
+from .filter.filter import Filter
+
+DEFAULT_SLOW_THRESHOLD = 0.1
+EXPLAINED_OPERATIONS: Dict[str, Optional[int]] = dict(get=None, get_one=1, count=None, exists=1)
+QUERY_ARGUMENTS = ('filters', 'sort_key', 'sort_direction', 'limit', 'offset', 'after')
+
+
+def filter_shape(filters: Sequence[Filter] = None) -> str:
+    """
+    Describe the normalized filters without their values, so the operations with the same filters shape are grouped
+
+    Args:
+        filters: filters to describe
+
+    Returns: description of the filter types, keys and not null value keys
+
+    """
+    def describe(filter_instance: Filter) -> str:
+        if isinstance(filter_instance, BooleanFilter):
+            return f'{filter_instance.__class__.__name__}({", ".join(map(describe, filter_instance.filters))})'
+        _, key, value_keys, null_value_keys = filter_instance.shape
+        values = [value_key for value_key in value_keys if value_key not in null_value_keys]
+        return f'{filter_instance.__class__.__name__}({", ".join([str(key)] + values)})'
+
+    return ', '.join(describe(filter_instance) for filter_instance in normalize_filters(filters))
+
+
+@dataclass
+class SlowOperation:
+    """
+    Storage operation which took longer than the slow operation threshold. The examined documents are the ones
+    reported by the storage query plan, None if the plan was not explained or does not report them.
+    """
+    target: str
+    operation: str
+    duration: float
+    filter_shape: str
+    sort_key: Optional[str] = None
+    returned: Optional[int] = None
+    examined: Optional[int] = None
+
+
+class SlowOperationHook:
+    """
+    Hook reporting the storage operations slower than a threshold through the logger, as APM spans and to the
+    optional callback
+    """
+
+    def __init__(self, logger: Logger, threshold: Union[float, str] = DEFAULT_SLOW_THRESHOLD,
+                 explain: Union[bool, str] = False, callback: Callable[[SlowOperation], Any] = None):
+        """
+        Initialize the slow operation hook. The options can be the configuration strings.
+
+        Args:
+            logger: logger used to report the slow operations
+            threshold: minimum seconds of an operation to be reported
+            explain: True to explain the slow queries to get the number of examined documents, which runs the
+                query plan again in the caller thread, False otherwise
+            callback: function called with each slow operation
+        """
+        self._logger = logger
+        self.threshold = float(threshold)
+        self.explain = config_bool(explain)
+        self._callback = callback
+
+    def observe(self, storage: Any, operation: str, start: float, duration: float, returned: int = None,
+                **query: Any) -> Optional[SlowOperation]:
+        """
+        Report the storage operation if it is slower than the threshold
+
+        Args:
+            storage: storage which ran the operation
+            operation: name of the operation
+            start: performance counter value at the start of the operation
+            duration: seconds taken by the operation
+            returned: number of items returned by the operation
+            **query: filters, sort and page arguments of the operation, explained with the same values
+
+        Returns: reported slow operation, None if the operation was not slow
+
+        """
+        if duration < self.threshold:
+            return None
+        examined = None
+        if self.explain and operation in EXPLAINED_OPERATIONS:
+            query = dict(query)
+            if EXPLAINED_OPERATIONS[operation] is not None:
+                query['limit'] = EXPLAINED_OPERATIONS[operation]
+            try:
+                examined = storage.examined(**query)
+            except Exception as ex:
+                self._logger.warning(f'Error explaining the slow {operation} operation: {ex}')
+        slow_operation = SlowOperation(storage.operation_target, operation, duration,
+                                       filter_shape(query.get('filters')), sort_key=query.get('sort_key'),
+                                       returned=returned, examined=examined)
+        self.record(slow_operation, start)
+        return slow_operation
+
+    def record(self, slow_operation: SlowOperation, start: float):
+        """
+        Report the slow operation to the logger, as an APM span of the current transaction and to the callback
+
+        Args:
+            slow_operation: slow operation to report
+            start: performance counter value at the start of the operation
+
+        """
+        self._logger.warning(f'Slow {slow_operation.operation} on {slow_operation.target} took '
+                             f'{slow_operation.duration * 1000:.1f} ms, filters [{slow_operation.filter_shape}], '
+                             f'sort {slow_operation.sort_key}, returned {slow_operation.returned}, '
+                             f'examined {slow_operation.examined}')
+        labels = {key: value for key, value in dict(returned=slow_operation.returned, examined=slow_operation.examined,
+                                                    sort_key=slow_operation.sort_key).items() if value is not None}
+        with elasticapm.capture_span(f'{slow_operation.target}.{slow_operation.operation}', span_type='db',
+                                     span_action='query', labels=labels,
+                                     extra=dict(db=dict(statement=slow_operation.filter_shape)),
+                                     start=start, duration=slow_operation.duration):
+            pass
+        if self._callback is not None:
+            self._callback(slow_operation)
+
+
+def instrumented(function: Callable) -> Callable:
+    """
+    Time the decorated storage operation and report it to the storage slow operation hook, if it has one. The
+    duration of the generator operations only includes the time spent producing their items.
+
+    Args:
+        function: storage operation to instrument
+
+    Returns: instrumented operation
+
+    """
+    function_signature = signature(function)
+
+    def query_arguments(*args, **kwargs) -> dict:
+        arguments = function_signature.bind(*args, **kwargs).arguments
+        return {name: arguments[name] for name in QUERY_ARGUMENTS if name in arguments}
+
+    if isgeneratorfunction(function):
+        @functools.wraps(function)
+        def generator_wrapper(self, *args, **kwargs):
+            hook = self.slow_operation_hook
+            if hook is None:
+                yield from function(self, *args, **kwargs)
+                return
+            start = perf_counter()
+            duration = 0.0
+            returned = 0
+            items = function(self, *args, **kwargs)
+            try:
+                while True:
+                    next_start = perf_counter()
+                    try:
+                        item = next(items)
+                    finally:
+                        duration += perf_counter() - next_start
+                    returned += 1
+                    yield item
+            except StopIteration:
+                pass
+            finally:
+                items.close()
+                hook.observe(self, function.__name__, start, duration, returned=returned,
+                             **query_arguments(self, *args, **kwargs))
+        return generator_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        hook = self.slow_operation_hook
+        if hook is None:
+            return function(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            return function(self, *args, **kwargs)
+        finally:
+            hook.observe(self, function.__name__, start, perf_counter() - start,
+                         **query_arguments(self, *args, **kwargs))
+    return wrapper
+
+
+def slow_operation_hook(logger: Logger, threshold: Union[float, str] = None,
+                        explain: Union[bool, str] = False) -> Optional[SlowOperationHook]:
+    """
+    Build the slow operation hook of a storage from its configuration options
+
+    Args:
+        logger: logger used to report the slow operations
+        threshold: minimum seconds of an operation to be reported, the operations are not reported if not specified
+        explain: True to explain the slow queries to get the number of examined documents
+
+    Returns: slow operation hook, None if no threshold is specified
+
+    """
+    if threshold in (None, ''):
+        return None
+    return SlowOperationHook(logger, threshold, explain)
@@ -2,13 +2,24 @@
 SQL initialization module
 """
 from .engine_type import SqlEngineType
-from .utils import create_sql_engine, init_sql_db, sql_health_check
+from .utils import create_sql_engine, init_sql_db, sql_health_check, sql_pool_stats
+from .pool import SqlPoolOptions, SqlPoolStats, SqlPoolMonitor, MonitoredQueuePool
 from .session_provider import SqlSessionProvider
+from .replica_router import ReplicaRouter, ReplicaStrategy
+from .explain import explain_query
 
 __all__ = [
     "create_sql_engine",
     "init_sql_db",
     "sql_health_check",
+    "sql_pool_stats",
+    "SqlPoolOptions",
+    "SqlPoolStats",
+    "SqlPoolMonitor",
+    "MonitoredQueuePool",
     "SqlEngineType",
-    "SqlSessionProvider"
+    "SqlSessionProvider",
+    "ReplicaRouter",
+    "ReplicaStrategy",
+    "explain_query",
 ]
@@ -0,0 +1,57 @@
+"""
+SQL queries explain module
+"""
+from threading import Lock
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Query, Session
+
+EXPLAIN_OPTION = 'explain_prefix'
+EXPLAIN_PREFIXES = dict(sqlite='EXPLAIN QUERY PLAN')
+DEFAULT_EXPLAIN_PREFIX = 'EXPLAIN'
+_LISTEN_LOCK = Lock()
+
+
+def _explain_statement(_, __, statement: str, parameters, context, ___):
+    """
+    Prefix the statements executed with the explain option, so they are explained with the same compiled SQL and
+    bound parameters than when they are run
+    """
+    prefix = context.execution_options.get(EXPLAIN_OPTION) if context is not None else None
+    return (f'{prefix} {statement}' if prefix else statement), parameters
+
+
+def _listen_explain(engine: Engine):
+    """
+    Register the statements explain listener in the engine, only once and only in the engines used to explain
+    queries
+
+    Args:
+        engine: engine which executes the explained queries
+
+    """
+    with _LISTEN_LOCK:
+        if not event.contains(engine, 'before_cursor_execute', _explain_statement):
+            event.listen(engine, 'before_cursor_execute', _explain_statement, retval=True)
+
+
+def explain_query(session: Session, query: Query) -> List[dict]:
+    """
+    Get the database plan of the specified query, running it prefixed with the explain statement of the session
+    database dialect through a listener of the session engine
+
+    Args:
+        session: session used to explain the query
+        query: query to explain
+
+    Returns: rows of the database explain output
+
+    """
+    engine = session.get_bind()
+    _listen_explain(engine.engine if not isinstance(engine, Engine) else engine)
+    prefix = EXPLAIN_PREFIXES.get(engine.dialect.name, DEFAULT_EXPLAIN_PREFIX)
+    result = session.execute(query.statement.execution_options(**{EXPLAIN_OPTION: prefix}))
+    keys = result.keys()
+    return [dict(zip(keys, row)) for row in result]
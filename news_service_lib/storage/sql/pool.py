@@ -0,0 +1,249 @@
+"""
+SQL connection pool options and monitoring module
+"""
+from bisect import bisect_left
+from dataclasses import dataclass, field, fields
+from threading import Lock
+from time import perf_counter
+from typing import Optional, Dict, Tuple
+
+from sqlalchemy.pool import Pool, QueuePool
+
+from ...config import config_bool
+from .engine_type import SqlEngineType
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+
+@dataclass(frozen=True)
+class SqlPoolOptions:
+    """
+    Connection pool options of a SQL engine. The defaults are the SQLAlchemy defaults. The statement timeout is
+    in milliseconds and the connect timeout in seconds.
+    """
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = -1
+    pool_pre_ping: bool = False
+    statement_timeout: Optional[int] = None
+    connect_timeout: Optional[int] = None
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'SqlPoolOptions':
+        """
+        Get the pool options defined in the specified configuration section, ignoring the rest of its values
+
+        Args:
+            config: configuration section values, as read from the configuration file
+
+        Returns: pool options with the configured values and the default values for the rest
+
+        """
+        options = dict()
+        for option in fields(cls):
+            value = config.get(option.name)
+            if value is None or value == '':
+                continue
+            if option.type is bool:
+                options[option.name] = config_bool(value)
+            elif option.type is float:
+                options[option.name] = float(value)
+            else:
+                options[option.name] = int(value)
+        return cls(**options)
+
+    def engine_arguments(self, engine_type: SqlEngineType) -> dict:
+        """
+        Get the engine creation arguments of the pool options supported by the specified engine type. The SQLite
+        in memory engine keeps a single connection per thread, so only the pre ping is applied.
+
+        Args:
+            engine_type: type of the engine to create
+
+        Returns: engine creation keyword arguments
+
+        """
+        if engine_type != SqlEngineType.MYSQL:
+            return dict(pool_pre_ping=self.pool_pre_ping)
+
+        connect_args = dict()
+        if self.statement_timeout is not None:
+            connect_args['init_command'] = f'SET SESSION max_execution_time={self.statement_timeout}'
+        if self.connect_timeout is not None:
+            connect_args['connect_timeout'] = self.connect_timeout
+        return dict(poolclass=MonitoredQueuePool, pool_size=self.pool_size, max_overflow=self.max_overflow,
+                    pool_timeout=self.pool_timeout, pool_recycle=self.pool_recycle,
+                    pool_pre_ping=self.pool_pre_ping, connect_args=connect_args)
+
+
+@dataclass
+class SqlPoolStats:
+    """
+    Connection pool usage snapshot. The waits are the checkouts which blocked because the pool was exhausted, and
+    the wait histogram maps the upper bound in seconds of each bucket to the number of them which waited up to it.
+    """
+    size: int = 0
+    checked_out: int = 0
+    checked_in: int = 0
+    overflow: int = 0
+    waits: int = 0
+    wait_total: float = 0.0
+    wait_histogram: Dict[float, int] = field(default_factory=dict)
+    connects: int = 0
+    connect_latency_total: float = 0.0
+    connect_latency_max: float = 0.0
+
+    @property
+    def connect_latency_avg(self) -> float:
+        """
+        Get the average latency of the new connections
+
+        Returns: average connect latency in seconds, 0 if there was no connection
+
+        """
+        return self.connect_latency_total / self.connects if self.connects else 0.0
+
+
+class SqlPoolMonitor:
+    """
+    Thread safe recorder of the connection pool checkout waits and the connect latencies
+    """
+
+    def __init__(self):
+        """
+        Initialize the pool monitor
+        """
+        self._lock = Lock()
+        self._wait_counts = [0] * len(WAIT_BUCKETS)
+        self._wait_total = 0.0
+        self._connects = 0
+        self._connect_latency_total = 0.0
+        self._connect_latency_max = 0.0
+
+    def record_wait(self, seconds: float):
+        """
+        Record the time waited by a checkout blocked by the pool exhaustion
+
+        Args:
+            seconds: waited seconds
+
+        """
+        with self._lock:
+            self._wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+            self._wait_total += seconds
+
+    def record_connect(self, seconds: float):
+        """
+        Record the time taken to open a new database connection
+
+        Args:
+            seconds: connect latency in seconds
+
+        """
+        with self._lock:
+            self._connects += 1
+            self._connect_latency_total += seconds
+            self._connect_latency_max = max(self._connect_latency_max, seconds)
+
+    def stats(self, pool: Pool) -> SqlPoolStats:
+        """
+        Get the usage snapshot of the specified pool with the recorded waits and connect latencies
+
+        Args:
+            pool: monitored pool
+
+        Returns: pool usage snapshot
+
+        """
+        with self._lock:
+            stats = SqlPoolStats(waits=sum(self._wait_counts), wait_total=self._wait_total,
+                                 wait_histogram=dict(zip(WAIT_BUCKETS, self._wait_counts)),
+                                 connects=self._connects, connect_latency_total=self._connect_latency_total,
+                                 connect_latency_max=self._connect_latency_max)
+        if isinstance(pool, QueuePool):
+            stats.size = pool.size()
+            stats.checked_out = pool.checkedout()
+            stats.checked_in = pool.checkedin()
+            stats.overflow = max(pool.overflow(), 0)
+        return stats
+
+    def reset(self):
+        """
+        Reset the recorded waits and connect latencies
+        """
+        with self._lock:
+            self._wait_counts = [0] * len(WAIT_BUCKETS)
+            self._wait_total = 0.0
+            self._connects = 0
+            self._connect_latency_total = 0.0
+            self._connect_latency_max = 0.0
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    Queue pool recording the time waited by the connection checkouts blocked because there is no idle connection
+    and no overflow left
+    """
+
+    def __init__(self, creator, monitor: SqlPoolMonitor = None, **kwargs):
+        """
+        Initialize the monitored queue pool
+
+        Args:
+            creator: database connections creator
+            monitor: monitor recording the checkout waits
+            **kwargs: queue pool arguments
+        """
+        super().__init__(creator, **kwargs)
+        self.monitor = monitor or SqlPoolMonitor()
+
+    def _do_get(self):
+        """
+        Check out a connection recording the time waited for it if the pool is exhausted
+
+        Returns: checked out connection record
+
+        """
+        if not self._exhausted():
+            return super()._do_get()
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.monitor.record_wait(perf_counter() - start)
+
+    def _exhausted(self) -> bool:
+        """
+        Check if a checkout has to wait for a connection to be returned to the pool
+
+        Returns: True if there is no idle connection and no overflow left, False otherwise
+
+        """
+        return self._pool.empty() and -1 < self._max_overflow <= self._overflow
+
+    def recreate(self) -> 'MonitoredQueuePool':
+        """
+        Recreate the pool keeping the monitor, so the records survive the engine disposal
+
+        Returns: new pool with the same configuration
+
+        """
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+
+def split_pool_options(engine_config: dict) -> Tuple[SqlPoolOptions, dict]:
+    """
+    Split the pool options from the rest of the engine configuration values
+
+    Args:
+        engine_config: engine configuration values
+
+    Returns: pool options and the remaining engine configuration values
+
+    """
+    option_names = {option.name for option in fields(SqlPoolOptions)}
+    return (SqlPoolOptions.from_config(engine_config),
+            {key: value for key, value in engine_config.items() if key not in option_names})
@@ -0,0 +1,134 @@
+"""
+SQL read replicas router module
+"""
+from enum import Enum
+from threading import Lock
+from time import monotonic, perf_counter
+from typing import List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_EJECTION_TIME = 30.0
+LATENCY_SMOOTHING = 0.2
+
+
+class ReplicaStrategy(Enum):
+    """
+    Read replica selection strategy:
+        - ROUND_ROBIN: rotate the healthy replicas
+        - LEAST_LATENCY: choose the healthy replica with the lowest smoothed query latency
+    """
+    ROUND_ROBIN = 'round_robin'
+    LEAST_LATENCY = 'least_latency'
+
+
+class ReplicaRouter:
+    """
+    Router choosing the replica engine of the read only sessions. The replicas whose connection is lost or can not
+    be established are ejected during the ejection time, and the primary engine is used if there is no healthy
+    replica. The statement errors, like missing tables, lock timeouts or deadlocks, do not eject the replicas.
+    """
+
+    def __init__(self, replicas: List[Engine], strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN,
+                 ejection_time: float = DEFAULT_EJECTION_TIME):
+        """
+        Initialize the router listening the statements executed by the replicas
+
+        Args:
+            replicas: read replica engines
+            strategy: replica selection strategy
+            ejection_time: seconds a failing replica is not chosen
+        """
+        self._replicas = list(replicas)
+        self._strategy = strategy
+        self._ejection_time = ejection_time
+        self._latencies = {replica: 0.0 for replica in self._replicas}
+        self._ejected_until = {replica: 0.0 for replica in self._replicas}
+        self._next_index = 0
+        self._lock = Lock()
+        for replica in self._replicas:
+            self._listen(replica)
+
+    def _listen(self, replica: Engine):
+        """
+        Listen the statements executed by the replica to record their latency and their failures
+
+        Args:
+            replica: replica engine to listen
+
+        """
+        @event.listens_for(replica, 'before_cursor_execute')
+        def before_execute(connection, *_):
+            """
+            Record the statement start time
+            """
+            connection.info.setdefault('replica_query_start', []).append(perf_counter())
+
+        @event.listens_for(replica, 'after_cursor_execute')
+        def after_execute(connection, *_):
+            """
+            Record the statement latency
+            """
+            self.record_latency(replica, perf_counter() - connection.info['replica_query_start'].pop())
+
+        @event.listens_for(replica, 'handle_error')
+        def handle_error(context):
+            """
+            Eject the replica if the statement failed because the dialect detected a disconnection
+            """
+            query_starts = context.connection.info.get('replica_query_start') if context.connection else None
+            if query_starts:
+                query_starts.pop()
+            if context.is_disconnect:
+                self.eject(replica)
+
+    def record_latency(self, replica: Engine, seconds: float):
+        """
+        Update the smoothed latency of the replica
+
+        Args:
+            replica: replica engine
+            seconds: latency of the executed statement
+
+        """
+        with self._lock:
+            self._latencies[replica] += LATENCY_SMOOTHING * (seconds - self._latencies[replica])
+
+    def eject(self, replica: Engine):
+        """
+        Stop choosing the replica during the ejection time
+
+        Args:
+            replica: replica engine to eject
+
+        """
+        with self._lock:
+            self._ejected_until[replica] = monotonic() + self._ejection_time
+
+    def healthy_replicas(self) -> List[Engine]:
+        """
+        Get the replicas not ejected
+
+        Returns: healthy replica engines
+
+        """
+        now = monotonic()
+        return [replica for replica in self._replicas if self._ejected_until[replica] <= now]
+
+    def choose(self) -> Optional[Engine]:
+        """
+        Choose the replica for a new read only session
+
+        Returns: chosen replica engine, None if there is no healthy replica
+
+        """
+        with self._lock:
+            healthy_replicas = self.healthy_replicas()
+            if not healthy_replicas:
+                return None
+            if self._strategy == ReplicaStrategy.LEAST_LATENCY:
+                return min(healthy_replicas, key=self._latencies.get)
+            replica = healthy_replicas[self._next_index % len(healthy_replicas)]
+            self._next_index += 1
+            return replica
@@ -1,30 +1,170 @@
 """
 SQL session provider definition
 """
-from typing import Optional, Any
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import get_ident
+from typing import Optional, Any, Iterator, NamedTuple, Tuple, Hashable, List
 
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import scoped_session, sessionmaker, Session
 
+from .replica_router import ReplicaRouter, ReplicaStrategy, DEFAULT_EJECTION_TIME
+
+
+def execution_context_key() -> Tuple[int, Optional[int]]:
+    """
+    Get the key of the current execution context
+
+    Returns: identifier of the current thread and identifier of the current asyncio task if any
+
+    """
+    try:
+        current_task = asyncio.current_task()
+    except RuntimeError:
+        current_task = None
+    return get_ident(), id(current_task) if current_task is not None else None
+
+
+class SessionScope(NamedTuple):
+    """
+    Session state of an execution context
+    """
+    owner: Hashable
+    session: Optional[Session]
+    nesting: int
+
 
 class SqlSessionProvider:
     """
-    SQL session provider implementation
+    SQL session provider implementation. The provided session and its nesting level are scoped to the current
+    execution context, so each thread and each asyncio task gets its own session.
     """
-    def __init__(self, engine: Engine):
+    def __init__(self, engine: Engine, replicas: List[Engine] = None,
+                 replica_strategy: ReplicaStrategy = ReplicaStrategy.ROUND_ROBIN,
+                 ejection_time: float = DEFAULT_EJECTION_TIME):
         """
         Initialize session provider
 
         Args:
-            engine: SQL engine instance
+            engine: SQL engine instance, the primary engine if replicas are specified
+            replicas: read replica engines used by the read only sessions
+            replica_strategy: strategy used to choose the replica of each read only session
+            ejection_time: seconds a failing replica is not chosen
+        """
+        self._engine = engine
+        self._replica_router = ReplicaRouter(replicas, replica_strategy, ejection_time) if replicas else None
+        self._session_maker = sessionmaker(bind=engine, expire_on_commit=False)
+        self._session_factory = scoped_session(self._session_maker, scopefunc=execution_context_key)
+        self._context = ContextVar(f'sql_session_scope_{id(self)}', default=None)
+
+    @property
+    def engine(self) -> Engine:
+        """
+        Engine the provided sessions are bound to
+
+        Returns: SQL engine instance
+
+        """
+        return self._engine
+
+    @property
+    def current_session(self) -> Optional[Session]:
+        """
+        Session of the provider context open in the current execution context
+
+        Returns: current execution context session if a provider context is open, None otherwise
+
+        """
+        return self._session if self._nesting > 0 else None
+
+    @property
+    def replica_router(self) -> Optional[ReplicaRouter]:
+        """
+        Router of the read only sessions
+
+        Returns: read replicas router, None if there are no replicas
+
+        """
+        return self._replica_router
+
+    def _bind(self, read_only: bool) -> Engine:
+        """
+        Get the engine to bind a new session to
+
+        Args:
+            read_only: True if the session is used only for reading, False otherwise
+
+        Returns: chosen replica engine for the read only sessions if any is healthy, the primary engine otherwise
+
         """
-        self._session_factory = scoped_session(sessionmaker(bind=engine, expire_on_commit=False))
-        self._session: Optional[Session] = None
-        self._nesting = 0
+        if read_only and self._replica_router is not None:
+            return self._replica_router.choose() or self._engine
+        return self._engine
+
+    @property
+    def _scope(self) -> SessionScope:
+        """
+        Session state of the current execution context. The state inherited from the parent context of a new
+        asyncio task is ignored, so the task does not share the session of its parent.
+
+        Returns: current execution context session state
+
+        """
+        owner = execution_context_key()
+        scope = self._context.get()
+        if scope is None or scope.owner != owner:
+            return SessionScope(owner, None, 0)
+        return scope
+
+    @property
+    def _session(self) -> Optional[Session]:
+        """
+        Session of the current execution context
+
+        Returns: current execution context session if initialized, None otherwise
+
+        """
+        return self._scope.session
+
+    @_session.setter
+    def _session(self, session: Optional[Session]):
+        """
+        Set the session of the current execution context
+
+        Args:
+            session: session to set
+
+        """
+        self._context.set(self._scope._replace(session=session))
+
+    @property
+    def _nesting(self) -> int:
+        """
+        Nesting level of the current execution context session
+
+        Returns: current execution context nesting level
+
+        """
+        return self._scope.nesting
+
+    @_nesting.setter
+    def _nesting(self, nesting: int):
+        """
+        Set the nesting level of the current execution context session
+
+        Args:
+            nesting: nesting level to set
+
+        """
+        self._context.set(self._scope._replace(nesting=nesting))
 
     def __call__(self, read_only: bool = True):
         """
-        Initialize the session to be provided
+        Initialize the session to be provided. The nested contexts share the session of the outermost one, so a
+        write session can not be nested in a read only session, which is not committed and can be bound to a
+        replica.
 
         Args:
             read_only: True if the session should be used only for reading, False otherwise
@@ -32,8 +172,12 @@ class SqlSessionProvider:
         Returns: the provider with the session initialized
 
         """
+        if self._nesting > 0 and not read_only and self._session.info['read_only']:
+            raise ValueError('Write session requested inside a read only session, open the outer session with '
+                             'read_only=False')
         if self._nesting <= 0:
-            self._session = self._session_factory()
+            self._session_factory.remove()
+            self._session = self._session_factory(bind=self._bind(read_only))
             self._session.info['read_only'] = read_only
         return self
 
@@ -60,18 +204,38 @@ class SqlSessionProvider:
         """
         self._nesting -= 1
         if self._nesting <= 0:
-            if exc_val:
-                self._session.rollback()
-            elif not self._session.info['read_only']:
-                try:
-                    self._session.commit()
-                except Exception as inner_exc:
+            try:
+                if exc_val:
                     self._session.rollback()
-                    raise inner_exc
-            self._session.close()
+                elif not self._session.info['read_only']:
+                    try:
+                        self._session.commit()
+                    except Exception as inner_exc:
+                        self._session.rollback()
+                        raise inner_exc
+            finally:
+                self._session_factory.remove()
+                self._session = None
         if exc_val:
             raise exc_val
 
+    @contextmanager
+    def independent_session(self) -> Iterator[Session]:
+        """
+        Provide a read only session independent of the current context session, which is closed when the context
+        exits. Long lived operations like streaming reads use it to avoid capturing the operations run while they
+        are open.
+
+        Returns: independent read only session
+
+        """
+        session = self._session_maker(bind=self._bind(True))
+        session.info['read_only'] = True
+        try:
+            yield session
+        finally:
+            session.close()
+
     @property
     def query_property(self):
         """
@@ -93,6 +257,6 @@ class SqlSessionProvider:
         """
         Clear the current context database session
         """
-        session = self()._session
-        session.rollback()
-        session.close()
+        self()._session.rollback()
+        self._session_factory.remove()
+        self._session = None
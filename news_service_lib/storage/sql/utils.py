@@ -1,13 +1,19 @@
 """
 SQL utilities module
 """
+from time import perf_counter
+from weakref import WeakKeyDictionary
+
 from alembic import command
 from alembic.config import Config
-from sqlalchemy import inspect
+from sqlalchemy import inspect, event
 from sqlalchemy.engine import Engine, create_engine
 from sqlalchemy.ext.declarative import DeclarativeMeta
 
 from .engine_type import SqlEngineType
+from .pool import SqlPoolOptions, SqlPoolMonitor, SqlPoolStats, split_pool_options
+
+POOL_MONITORS: 'WeakKeyDictionary[Engine, SqlPoolMonitor]' = WeakKeyDictionary()
 
 
 def init_sql_db(base: DeclarativeMeta, engine: Engine, alembic_ini_path: str = None):
@@ -33,18 +39,54 @@ def init_sql_db(base: DeclarativeMeta, engine: Engine, alembic_ini_path: str = N
         base.metadata.create_all()
 
 
-def create_sql_engine(engine_type: SqlEngineType, **engine_config) -> Engine:
+def create_sql_engine(engine_type: SqlEngineType, pool_options: SqlPoolOptions = None, **engine_config) -> Engine:
     """
-    Create the sql base engine
+    Create the sql base engine with a monitored connection pool
 
     Args:
         engine_type: type of the engine to create
-        **engine_config: engine configuration params
+        pool_options: connection pool options, read from the engine configuration params if not specified
+        **engine_config: engine configuration params, which can include the pool options
 
     Returns: created engine wof the provided type with the specified configuration
 
     """
-    return create_engine(engine_type.uri.format(**engine_config))
+    config_pool_options, engine_config = split_pool_options(engine_config)
+    pool_options = pool_options or config_pool_options
+    monitor = SqlPoolMonitor()
+    engine_arguments = pool_options.engine_arguments(engine_type)
+    if 'poolclass' in engine_arguments:
+        engine_arguments['monitor'] = monitor
+    engine = create_engine(engine_type.uri.format(**engine_config), **engine_arguments)
+
+    @event.listens_for(engine, 'do_connect')
+    def timed_connect(dialect, _, cargs, cparams):
+        """
+        Open the database connection recording its latency
+        """
+        start = perf_counter()
+        connection = dialect.connect(*cargs, **cparams)
+        monitor.record_connect(perf_counter() - start)
+        return connection
+
+    POOL_MONITORS[engine] = monitor
+    return engine
+
+
+def sql_pool_stats(engine: Engine) -> SqlPoolStats:
+    """
+    Get the connection pool usage of the specified engine
+
+    Args:
+        engine: engine created with create_sql_engine
+
+    Returns: checked out and overflow connections, blocked checkout waits histogram and connect latencies
+
+    """
+    monitor = POOL_MONITORS.get(engine)
+    if monitor is None:
+        raise ValueError('Engine not created with create_sql_engine')
+    return monitor.stats(engine.pool)
 
 
 def sql_health_check(engine: Engine) -> bool:
@@ -9,6 +9,8 @@ class StorageType(Enum):
     Storage type enum:
         MONGO: MongoDB storage type
         SQL: SQL storage type
+        MEMORY: in process memory storage type
     """
     MONGO = 'MONGO'
     SQL = 'SQL'
+    MEMORY = 'MEMORY'
@@ -0,0 +1,119 @@
+"""
+Bounded LRU cache with TTL expiration module
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import RLock
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+
+@dataclass
+class CacheStats:
+    """
+    Cache usage counters
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        Get the ratio of lookups served from the cache
+
+        Returns: hits divided by the total lookups, 0 if there was no lookup
+
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TTLLRUCache:
+    """
+    Thread safe cache evicting the least recently used entries when full and expiring the entries older than
+    the time to live
+    """
+    _MISSING = object()
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initialize the cache
+
+        Args:
+            max_size: maximum number of entries
+            ttl: entries time to live in seconds
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = RLock()
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        """
+        Get the number of cached entries
+
+        Returns: number of entries, including the expired ones not yet removed
+
+        """
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get the cached value of the specified key, updating the hit and miss counters
+
+        Args:
+            key: key of the cached value
+            default: value returned if the key is not cached
+
+        Returns: cached value if present and not expired, the default value otherwise
+
+        """
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.stats.misses += 1
+                return default
+            expiration, value = entry
+            if expiration < monotonic():
+                del self._entries[key]
+                self.stats.expirations += 1
+                self.stats.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Cache the value for the specified key, evicting the least recently used entry if the cache is full
+
+        Args:
+            key: key of the value
+            value: value to cache
+
+        """
+        with self._lock:
+            self._entries[key] = (monotonic() + self._ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def invalidate(self, predicate: Callable[[Hashable, Any], bool] = None):
+        """
+        Remove the cached entries which match the predicate
+
+        Args:
+            predicate: function receiving an entry key and value and returning True if it should be removed,
+                all the entries are removed if not specified
+
+        """
+        with self._lock:
+            keys = [key for key, (_, value) in self._entries.items() if predicate is None or predicate(key, value)]
+            for key in keys:
+                del self._entries[key]
+            self.stats.invalidations += len(keys)
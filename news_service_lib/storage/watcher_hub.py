@@ -0,0 +1,309 @@
+"""
+Storage watcher fan out hub module
+"""
+from collections import OrderedDict
+from enum import Enum
+from itertools import count
+from logging import Logger
+from threading import Condition, Lock, Thread
+from time import sleep
+from typing import Any, Callable, Iterator, List, Optional
+
+from .resume_token_store import ResumeTokenStore
+from .storage_watcher import StorageWatcher
+
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_RETRY_DELAY = 1.0
+MAX_RETRY_DELAY = 60.0
+
+
+class SlowConsumerPolicy(Enum):
+    """
+    Policy applied to the inserts published to a subscriber whose queue is full:
+    - DROP = the new inserts are dropped
+    - BLOCK = the hub waits for the subscriber to consume, delaying the other subscribers and the change stream
+    - COALESCE = the pending insert with the same key is replaced by the new one, and if there is none the oldest
+      pending insert is dropped
+    """
+    DROP = 'DROP'
+    BLOCK = 'BLOCK'
+    COALESCE = 'COALESCE'
+
+
+def insert_key(inserted_item: Any) -> Any:
+    """
+    Get the key used to coalesce the inserted item, its identifier
+
+    Args:
+        inserted_item: dictionary or object inserted item
+
+    Returns: identifier of the inserted item
+
+    """
+    if isinstance(inserted_item, dict):
+        return inserted_item.get('_id')
+    return getattr(inserted_item, 'id', inserted_item)
+
+
+class Subscription:
+    """
+    Subscription of a consumer to the inserts fanned out by a watcher hub, with its own bounded queue. Iterating the
+    subscription gets the inserts until it is closed.
+    """
+
+    def __init__(self, hub: 'WatcherHub', queue_size: int, policy: SlowConsumerPolicy,
+                 coalesce_key: Callable[[Any], Any]):
+        """
+        Initialize the subscription
+
+        Args:
+            hub: hub publishing the inserts
+            queue_size: maximum number of pending inserts
+            policy: policy applied to the inserts published while the queue is full
+            coalesce_key: function getting the key of the inserts used to coalesce them
+        """
+        self._hub = hub
+        self._queue_size = queue_size
+        self._policy = policy
+        self._coalesce_key = coalesce_key
+        self._pending: OrderedDict = OrderedDict()
+        self._sequence = count()
+        self._condition = Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def __enter__(self) -> 'Subscription':
+        """
+        Use the subscription as a context manager, closing it on exit
+
+        Returns: this subscription
+
+        """
+        return self
+
+    def __exit__(self, *_):
+        """
+        Close the subscription
+        """
+        self.close()
+
+    def __iter__(self) -> Iterator[Any]:
+        """
+        Iterate the published inserts until the subscription is closed
+
+        Returns: iterator to the inserted items
+
+        """
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                inserted_item = self._pending.popitem(last=False)[1]
+                self._condition.notify_all()
+            yield inserted_item
+
+    @property
+    def closed(self) -> bool:
+        """
+        Check if the subscription is closed
+
+        Returns: True if the subscription is closed, False otherwise
+
+        """
+        return self._closed
+
+    @property
+    def pending(self) -> int:
+        """
+        Get the number of inserts waiting in the queue
+
+        Returns: number of pending inserts
+
+        """
+        with self._condition:
+            return len(self._pending)
+
+    def get(self, timeout: float = None) -> Optional[Any]:
+        """
+        Get the next published insert, waiting for it if the queue is empty
+
+        Args:
+            timeout: maximum seconds to wait, wait indefinitely if not specified
+
+        Returns: next inserted item, None if there was none before the timeout or the subscription is closed
+
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._pending or self._closed, timeout) or not self._pending:
+                return None
+            inserted_item = self._pending.popitem(last=False)[1]
+            self._condition.notify_all()
+            return inserted_item
+
+    def publish(self, inserted_item: Any):
+        """
+        Queue the inserted item, applying the slow consumer policy if the queue is full
+
+        Args:
+            inserted_item: inserted item to queue
+
+        """
+        with self._condition:
+            if self._closed:
+                return
+            if self._policy == SlowConsumerPolicy.COALESCE:
+                key = self._coalesce_key(inserted_item)
+                if key in self._pending:
+                    self._pending[key] = inserted_item
+                    self.dropped += 1
+                    self._condition.notify_all()
+                    return
+            else:
+                key = next(self._sequence)
+            if len(self._pending) >= self._queue_size:
+                if self._policy == SlowConsumerPolicy.BLOCK:
+                    self._condition.wait_for(lambda: len(self._pending) < self._queue_size or self._closed)
+                    if self._closed:
+                        return
+                elif self._policy == SlowConsumerPolicy.DROP:
+                    self.dropped += 1
+                    return
+                else:
+                    self._pending.popitem(last=False)
+                    self.dropped += 1
+            self._pending[key] = inserted_item
+            self._condition.notify_all()
+
+    def close(self):
+        """
+        Detach the subscription from the hub, the pending inserts can still be consumed
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._hub.unsubscribe(self)
+
+
+class WatcherHub:
+    """
+    Hub consuming the inserts of a storage watcher with a single change stream and fanning them out to the in
+    process subscribers. The stream is opened with the first subscription and kept open while the subscribers
+    attach and detach, and it is reopened with backoff if it fails, resuming from the resume store if provided.
+    """
+
+    def __init__(self, watcher: StorageWatcher, logger: Logger,
+                 fields: List[str] = None,
+                 resume_store: ResumeTokenStore = None,
+                 consumer: str = None,
+                 retry_delay: float = DEFAULT_RETRY_DELAY):
+        """
+        Initialize the watcher hub
+
+        Args:
+            watcher: storage watcher whose inserts are consumed
+            logger: logger instance to use
+            fields: fields of the inserted items to load, all the fields if not specified
+            resume_store: store used to checkpoint the fanned out inserts and to resume the stream after the last one
+            consumer: name of the hub checkpoints in the resume store
+            retry_delay: seconds to wait before reopening the failed stream, doubled after each consecutive failure
+        """
+        self._watcher = watcher
+        self._logger = logger
+        self._fields = fields
+        self._resume_store = resume_store
+        self._consumer = consumer
+        self._retry_delay = retry_delay
+        self._subscriptions: List[Subscription] = list()
+        self._lock = Lock()
+        self._stream_thread: Optional[Thread] = None
+        self._closed = False
+
+    @property
+    def subscribers(self) -> int:
+        """
+        Get the number of attached subscriptions
+
+        Returns: number of subscriptions
+
+        """
+        with self._lock:
+            return len(self._subscriptions)
+
+    def subscribe(self, queue_size: int = DEFAULT_QUEUE_SIZE,
+                  policy: SlowConsumerPolicy = SlowConsumerPolicy.BLOCK,
+                  coalesce_key: Callable[[Any], Any] = insert_key) -> Subscription:
+        """
+        Attach a new subscription to the inserts consumed after it, opening the stream if it is not open
+
+        Args:
+            queue_size: maximum number of pending inserts of the subscription
+            policy: policy applied to the inserts published while the subscription queue is full
+            coalesce_key: function getting the key of the inserts used to coalesce them, their identifier by default
+
+        Returns: new subscription
+
+        """
+        subscription = Subscription(self, queue_size, policy, coalesce_key)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('Watcher hub closed')
+            self._subscriptions.append(subscription)
+            if self._stream_thread is None:
+                self._stream_thread = Thread(target=self._stream, name='watcher_hub_stream', daemon=True)
+                self._stream_thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Detach the subscription from the hub, the stream is kept open
+
+        Args:
+            subscription: subscription to detach
+
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        if not subscription.closed:
+            subscription.close()
+
+    def close(self):
+        """
+        Close the subscriptions and stop fanning out the inserts. The stream is closed when it delivers its next
+        insert, because the blocking change streams can not be interrupted.
+        """
+        with self._lock:
+            self._closed = True
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.close()
+
+    def _stream(self):
+        """
+        Consume the watcher inserts and publish them to the subscriptions until the hub is closed, reopening the
+        stream with backoff when it fails
+        """
+        retry_delay = self._retry_delay
+        while not self._closed:
+            try:
+                inserts = self._watcher.consume_inserts(fields=self._fields, resume_store=self._resume_store,
+                                                        consumer=self._consumer)
+                try:
+                    for inserted_item in inserts:
+                        retry_delay = self._retry_delay
+                        with self._lock:
+                            if self._closed:
+                                return
+                            subscriptions = list(self._subscriptions)
+                        for subscription in subscriptions:
+                            subscription.publish(inserted_item)
+                finally:
+                    inserts.close()
+                self._logger.warning('Inserts stream of the watcher hub ended, reopening it')
+                sleep(retry_delay)
+            except Exception as ex:
+                self._logger.error(f'Error consuming the inserts of the watcher hub, retrying in {retry_delay} '
+                                   f'seconds: {ex}')
+                sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, MAX_RETRY_DELAY)
@@ -0,0 +1,33 @@
+"""
+New model tests module
+"""
+from unittest import TestCase
+
+from ...models import New
+
+
+class TestNew(TestCase):
+    """
+    New model test cases
+    """
+    def test_partial(self):
+        """
+        Test the partial new sets the loaded fields and reports the missing ones
+        """
+        new = New.partial(_id='test_id', title='test_title', url='test_url', date=1.0)
+
+        self.assertEqual(new.title, 'test_title')
+        self.assertEqual(new.url, 'test_url')
+        self.assertIsNone(new.content)
+        self.assertTrue(new.is_partial)
+        self.assertEqual(new.missing_fields, {'content', 'source', 'hydrated', 'entities', 'noun_chunks', 'summary',
+                                              'sentiment'})
+
+    def test_not_partial(self):
+        """
+        Test the fully initialized new is not partial
+        """
+        new = New(title='test_title', url='test_url', content='test_content', source='test_source', date=1.0)
+
+        self.assertFalse(new.is_partial)
+        self.assertEqual(new, New.partial(**dict(new)))
@@ -0,0 +1,162 @@
+"""
+Asynchronous MongoDB storage tests module
+"""
+from datetime import datetime
+from logging import getLogger
+from unittest import TestCase
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from aiounittest import async_test
+from pymongo.errors import BulkWriteError
+
+from ...storage.filter import MatchFilter, RangeFilter
+from ...storage.implementation import AsyncMongoStorage
+from ...storage.sort_direction import SortDirection
+
+LOGGER = getLogger()
+ITEMS = [dict(_id=1, title='first', date=datetime(2020, 1, 1, 0, 0, 0, 1)),
+         dict(_id=2, title='second', date=datetime(2020, 1, 2)),
+         dict(_id=3, title='third', date=datetime(2020, 1, 3))]
+
+
+def mock_cursor(items: list) -> MagicMock:
+    """
+    Create a mocked motor cursor iterating the specified items
+
+    Args:
+        items: items returned by the cursor
+
+    Returns: mocked cursor, whose sort, skip and limit return the cursor itself
+
+    """
+    cursor = MagicMock()
+    cursor.__aiter__.return_value = items
+    cursor.sort.return_value = cursor
+    cursor.skip.return_value = cursor
+    cursor.limit.return_value = cursor
+    return cursor
+
+
+class TestAsyncMongoStorage(TestCase):
+    """
+    Asynchronous MongoDB storage interface test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        with patch('news_service_lib.storage.implementation.async_mongo_storage.AsyncIOMotorClient'):
+            self.client = AsyncMongoStorage('localhost:27017', 'test', 'test', LOGGER)
+        self.client.set_collection('test')
+        self.collection = MagicMock()
+        self.collection.insert_one = AsyncMock()
+        self.collection.insert_many = AsyncMock()
+        self.collection.find_one = AsyncMock(return_value=ITEMS[0])
+        self.collection.delete_one = AsyncMock()
+        self.client.collection = self.collection
+
+    @async_test
+    async def test_save(self):
+        """
+        Test the items are inserted in the collection
+        """
+        await self.client.save(dict(ITEMS[0]))
+        result = await self.client.save_many([dict(item) for item in ITEMS[1:]], ordered=True)
+
+        self.collection.insert_one.assert_awaited_once_with(ITEMS[0])
+        self.collection.insert_many.assert_awaited_once_with(ITEMS[1:], ordered=True)
+        self.assertEqual(result.saved, ITEMS[1:])
+        self.assertTrue(result.success)
+
+    @async_test
+    async def test_save_many_errors(self):
+        """
+        Test the bulk write errors are reported per item
+        """
+        self.collection.insert_many.side_effect = BulkWriteError(dict(writeErrors=[
+            dict(index=1, code=11000, errmsg='duplicate key error')]))
+
+        result = await self.client.save_many([dict(item) for item in ITEMS])
+
+        self.assertEqual([item['_id'] for item in result.saved], [1, 3])
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [1])
+
+    @async_test
+    async def test_get(self):
+        """
+        Test the asynchronous get iterates the cursor of the parsed query
+        """
+        self.collection.find.return_value = mock_cursor(ITEMS)
+
+        items = [item async for item in self.client.get([MatchFilter('title', 'first')], fields=['title'])]
+
+        self.assertEqual(items, ITEMS)
+        self.collection.find.assert_called_once_with({'title': 'first'}, {'title': 1})
+        self.collection.find.return_value.sort.assert_not_called()
+
+    @async_test
+    async def test_get_pages(self):
+        """
+        Test the pages are sorted by the sort key and the identifier and sought after the page cursor
+        """
+        first_cursor = mock_cursor(ITEMS[:2])
+        second_cursor = mock_cursor(ITEMS[2:])
+        self.collection.find.side_effect = [first_cursor, second_cursor]
+
+        first_page = [item async for item in self.client.get(sort_key='date', sort_direction=SortDirection.ASC,
+                                                             limit=2, offset=1)]
+        after = self.client.page_cursor(first_page[-1], sort_key='date')
+        second_page = [item async for item in self.client.get([RangeFilter('date', lower=datetime(2019, 1, 1))],
+                                                              sort_key='date', limit=2, after=after)]
+
+        self.assertEqual(first_page + second_page, ITEMS)
+        self.assertEqual(self.collection.find.call_args_list[0][0][0], {})
+        first_cursor.sort.assert_called_once_with([('date', 1), ('_id', 1)])
+        first_cursor.skip.assert_called_once_with(1)
+        self.assertEqual(self.collection.find.call_args_list[1][0][0],
+                         {'$and': [{'date': {'$gt': datetime(2019, 1, 1)}},
+                                   {'$or': [{'date': {'$gt': ITEMS[1]['date']}},
+                                            {'date': ITEMS[1]['date'], '_id': {'$gt': 2}}]}]})
+        second_cursor.skip.assert_not_called()
+        second_cursor.limit.assert_called_once_with(2)
+
+    @async_test
+    async def test_get_one(self):
+        """
+        Test the asynchronous get one finds the first item matching the filters
+        """
+        item = await self.client.get_one([MatchFilter('title', 'first')])
+
+        self.assertEqual(item, ITEMS[0])
+        self.collection.find_one.assert_awaited_once_with({'title': 'first'}, None)
+
+    @async_test
+    async def test_get_many_by_key(self):
+        """
+        Test the values are looked up with one query per chunk of values
+        """
+        self.collection.find.side_effect = [mock_cursor(ITEMS[:2]), mock_cursor(ITEMS[2:])]
+
+        items = await self.client.get_many_by_key('title', ['first', 'second', 'third', 'first'], chunk_size=2)
+
+        self.assertEqual(items, {item['title']: item for item in ITEMS})
+        self.assertEqual([call[0][0] for call in self.collection.find.call_args_list],
+                         [{'title': {'$in': ['first', 'second']}}, {'title': {'$in': ['third']}}])
+
+    @async_test
+    async def test_delete(self):
+        """
+        Test the asynchronous delete removes the identified item
+        """
+        await self.client.delete(1)
+
+        self.collection.delete_one.assert_awaited_once_with({'_id': 1})
+
+    def test_collection_not_set(self):
+        """
+        Test the operations fail if the collection is not set
+        """
+        self.client.collection = None
+
+        with self.assertRaises(AttributeError):
+            self.client.get_one()
@@ -0,0 +1,104 @@
+"""
+Asynchronous SQL storage tests module
+"""
+import asyncio
+from logging import getLogger
+from unittest import TestCase
+
+from aiounittest import async_test
+from sqlalchemy import Column, Integer, String, create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.pool import StaticPool
+
+from ...storage.filter import MatchFilter
+from ...storage.implementation import AsyncSqlStorage
+from ...storage.sort_direction import SortDirection
+from ...storage.sql import SqlSessionProvider, init_sql_db
+
+LOGGER = getLogger()
+BASE = declarative_base()
+
+
+class TestModel(BASE):
+    """
+    Test model
+    """
+    __tablename__ = 'test'
+
+    id = Column(Integer, primary_key=True)
+    test1 = Column(String(50))
+    test2 = Column(String(50))
+
+
+class TestAsyncSQLStorage(TestCase):
+    """
+    Asynchronous SQL storage interface test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        test_engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+        init_sql_db(BASE, test_engine)
+        self.session_provider = SqlSessionProvider(test_engine)
+        self.client = AsyncSqlStorage(self.session_provider, TestModel, LOGGER, max_workers=1)
+
+    def tearDown(self):
+        """
+        Tear down test environment
+        """
+        self.client.close()
+
+    @async_test
+    async def test_save_get(self):
+        """
+        Test the saved instances are returned by the asynchronous get
+        """
+        await self.client.save(TestModel(test1='test_11', test2='test_12'))
+        await self.client.save_many([TestModel(test1='test_21', test2='test_22')])
+
+        model_instances = [model_instance async for model_instance in self.client.get()]
+
+        self.assertEqual(len(model_instances), 2)
+
+    @async_test
+    async def test_get_chunks(self):
+        """
+        Test the entities are fetched chunk by chunk after the previous chunk, while other operations run between
+        the chunks
+        """
+        client = AsyncSqlStorage(self.session_provider, TestModel, LOGGER, max_workers=1, chunk_size=2)
+        await client.save_many([TestModel(test1=f'test_{index % 3}', test2=str(index)) for index in range(7)])
+
+        model_instances = list()
+        async for model_instance in client.get(sort_key='test1', sort_direction=SortDirection.DESC, limit=5,
+                                               offset=1):
+            model_instances.append(model_instance)
+            self.assertIsNotNone(await client.get_one())
+        client.close()
+
+        self.assertEqual([(model_instance.test1, model_instance.test2) for model_instance in model_instances],
+                         [('test_2', '2'), ('test_1', '4'), ('test_1', '1'), ('test_0', '6'), ('test_0', '3')])
+
+    @async_test
+    async def test_get_one(self):
+        """
+        Test the asynchronous get one returns the instance matching the filters
+        """
+        await asyncio.gather(*[self.client.save(TestModel(test1=f'test_{index}1', test2=f'test_{index}2'))
+                               for index in range(5)])
+
+        model_instance = await self.client.get_one([MatchFilter('test1', 'test_31')])
+
+        self.assertEqual(model_instance.test2, 'test_32')
+
+    @async_test
+    async def test_delete(self):
+        """
+        Test the asynchronous delete removes the instance
+        """
+        model_instance = await self.client.save(TestModel(test1='test_11', test2='test_12'))
+
+        await self.client.delete(model_instance.id)
+
+        self.assertIsNone(await self.client.get_one())
@@ -0,0 +1,135 @@
+"""
+Buffered storage writer tests module
+"""
+from logging import getLogger
+from threading import Event
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from ...storage.buffered_storage_writer import BufferedStorageWriter
+from ...storage.bulk_save_result import BulkSaveResult, BulkSaveError
+from ...storage.exceptions import StorageError, StorageIntegrityError
+from ...storage.implementation import MemoryStorage
+
+LOGGER = getLogger()
+
+
+class TestBufferedStorageWriter(TestCase):
+    """
+    Buffered storage writer test cases
+    """
+
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.storage = MemoryStorage(LOGGER)
+        self.errors = list()
+
+    def test_flush_size(self):
+        """
+        Test the items are saved in bulks of the flush size as soon as a bulk is filled
+        """
+        with patch.object(self.storage, 'save_many', wraps=self.storage.save_many) as save_many_mock:
+            writer = BufferedStorageWriter(self.storage, LOGGER, buffer_size=10, flush_size=2, flush_interval=60)
+            writer.save_many([dict(_id=index) for index in range(4)])
+            self.assertTrue(writer.flush(5))
+            writer.close()
+
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual([len(call[0][0]) for call in save_many_mock.call_args_list], [2, 2])
+
+    def test_flush_interval(self):
+        """
+        Test the queued items are saved once the flush interval expires without requesting a flush
+        """
+        with BufferedStorageWriter(self.storage, LOGGER, flush_size=100, flush_interval=0.01) as writer:
+            writer.save(dict(_id=1))
+            for _ in range(100):
+                if self.storage.count():
+                    break
+                sleep(0.01)
+            self.assertEqual(self.storage.count(), 1)
+            self.assertEqual(writer.pending, 0)
+
+    def test_close_flushes(self):
+        """
+        Test closing the writer saves the pending items and rejects the new ones
+        """
+        writer = BufferedStorageWriter(self.storage, LOGGER, flush_size=100, flush_interval=60)
+        writer.save_many([dict(_id=index) for index in range(3)])
+        writer.close()
+
+        self.assertEqual(self.storage.count(), 3)
+        with self.assertRaises(StorageError):
+            writer.save(dict(_id=4))
+
+    def test_backpressure(self):
+        """
+        Test the save blocks while the buffer is full, failing once its timeout expires
+        """
+        saving = Event()
+        release = Event()
+
+        def save_many(items, ordered):
+            """
+            Block the bulk saves until released
+            """
+            saving.set()
+            release.wait(5)
+            return BulkSaveResult(list(items))
+
+        with patch.object(self.storage, 'save_many', side_effect=save_many):
+            writer = BufferedStorageWriter(self.storage, LOGGER, buffer_size=2, flush_size=1, flush_interval=60)
+            writer.save(dict(_id=1))
+            self.assertTrue(saving.wait(5))
+            writer.save_many([dict(_id=2), dict(_id=3)], timeout=1)
+            with self.assertRaises(StorageError):
+                writer.save(dict(_id=4), timeout=0.01)
+            release.set()
+            writer.save(dict(_id=4), timeout=5)
+            writer.close()
+        self.assertEqual(writer.pending, 0)
+
+    def test_retry_errors(self):
+        """
+        Test the failed items are retried, except the integrity errors, and reported once the retries are exhausted
+        """
+        self.storage.save(dict(_id=1))
+        failures = iter([StorageError('connection lost'), StorageError('connection lost')])
+
+        def save_many(items, ordered):
+            """
+            Fail the first two bulk saves, then save the items with the memory storage
+            """
+            failure = next(failures, None)
+            if failure is not None:
+                raise failure
+            return MemoryStorage.save_many(self.storage, items, ordered)
+
+        with patch.object(self.storage, 'save_many', side_effect=save_many) as save_many_mock:
+            writer = BufferedStorageWriter(self.storage, LOGGER, flush_size=10, max_retries=2, retry_delay=0.001,
+                                           on_error=self.errors.append)
+            writer.save_many([dict(_id=1), dict(_id=2)])
+            writer.close()
+
+        self.assertEqual(save_many_mock.call_count, 3)
+        self.assertEqual([(bulk_error.index, bulk_error.item) for bulk_error in self.errors], [(0, dict(_id=1))])
+        self.assertIsInstance(self.errors[0].error, StorageIntegrityError)
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_retries_exhausted(self):
+        """
+        Test the items still failing after the retries are reported to the error callback
+        """
+        result = BulkSaveResult(errors=[BulkSaveError(0, dict(_id=1), StorageError('timeout'))])
+        with patch.object(self.storage, 'save_many', return_value=result) as save_many_mock:
+            writer = BufferedStorageWriter(self.storage, LOGGER, flush_size=10, max_retries=1, retry_delay=0.001,
+                                           on_error=self.errors.append)
+            writer.save(dict(_id=1))
+            self.assertTrue(writer.flush(5))
+            writer.close()
+
+        self.assertEqual(save_many_mock.call_count, 2)
+        self.assertEqual([bulk_error.item for bulk_error in self.errors], [dict(_id=1)])
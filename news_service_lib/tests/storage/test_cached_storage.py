@@ -0,0 +1,195 @@
+"""
+Cached storage tests module
+"""
+from logging import getLogger
+from time import sleep
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from ...storage.filter import MatchFilter, RangeFilter
+from ...storage.implementation import CachedStorage, MongoStorage, Storage
+from ...storage.watcher_hub import WatcherHub
+
+LOGGER = getLogger()
+MOCKED_ITEM = {'_id': 1, 'title': 'test', 'date': 2}
+
+
+class TestCachedStorage(TestCase):
+    """
+    Cached storage test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.storage_mock = MagicMock(spec=Storage)
+        self.storage_mock.get_one.return_value = MOCKED_ITEM
+        self.storage_mock.get.side_effect = lambda *_, **__: iter([MOCKED_ITEM])
+        self.cached_storage = CachedStorage(self.storage_mock, LOGGER, max_size=2, ttl=60)
+
+    def test_get_one_cached(self):
+        """
+        Test the repeated lookups are served from the cache independently of the filters order
+        """
+        first_item = self.cached_storage.get_one([MatchFilter('title', 'test'), RangeFilter('date', lower=1)])
+        second_item = self.cached_storage.get_one([RangeFilter('date', lower=1), MatchFilter('title', 'test')])
+
+        self.assertEqual(first_item, MOCKED_ITEM)
+        self.assertEqual(second_item, MOCKED_ITEM)
+        self.storage_mock.get_one.assert_called_once()
+        self.assertEqual(self.cached_storage.stats.hits, 1)
+        self.assertEqual(self.cached_storage.stats.misses, 1)
+
+    def test_get_many_by_key_cached(self):
+        """
+        Test the values lookups are cached as single item lookups and only the not cached values are loaded
+        """
+        self.storage_mock.get_many_by_key.return_value = {'test': MOCKED_ITEM}
+        items = self.cached_storage.get_many_by_key('title', ['test', 'other'])
+        self.assertEqual(items, {'test': MOCKED_ITEM})
+        self.storage_mock.get_many_by_key.assert_called_once_with('title', ['test', 'other'], fields=None,
+                                                                  chunk_size=1000)
+
+        self.assertEqual(self.cached_storage.get_one([MatchFilter('title', 'test')]), MOCKED_ITEM)
+        self.assertEqual(self.cached_storage.get_many_by_key('title', ['other', 'test']), {'test': MOCKED_ITEM})
+        self.storage_mock.get_one.assert_not_called()
+        self.storage_mock.get_many_by_key.assert_called_once()
+
+    def test_get_many_by_key_not_hashable(self):
+        """
+        Test the lookups of not hashable values are not cached
+        """
+        self.storage_mock.get_many_by_key.return_value = dict()
+
+        self.assertEqual(self.cached_storage.get_many_by_key('tags', [['test']]), dict())
+        self.assertEqual(self.cached_storage.get_many_by_key('tags', [['test']]), dict())
+        self.assertEqual(self.storage_mock.get_many_by_key.call_count, 2)
+
+    def test_cached_copies(self):
+        """
+        Test the cached items can not be altered by the callers
+        """
+        self.storage_mock.get_one.return_value = None
+        self.storage_mock.get_one.side_effect = lambda *_, **__: dict(MOCKED_ITEM)
+        self.storage_mock.get.side_effect = lambda *_, **__: iter([dict(MOCKED_ITEM)])
+        self.cached_storage.get_one([MatchFilter('title', 'test')])['title'] = 'altered'
+        next(self.cached_storage.get([MatchFilter('title', 'test')], limit=1))['title'] = 'altered'
+        self.cached_storage.get_one([MatchFilter('title', 'test')])['title'] = 'altered'
+        next(self.cached_storage.get([MatchFilter('title', 'test')], limit=1))['title'] = 'altered'
+
+        self.assertEqual(self.cached_storage.get_one([MatchFilter('title', 'test')])['title'], 'test')
+        self.assertEqual(next(self.cached_storage.get([MatchFilter('title', 'test')], limit=1))['title'], 'test')
+        self.assertEqual(self.cached_storage.stats.hits, 4)
+
+    def test_get_cached_only_with_limit(self):
+        """
+        Test only the lookups with limit are cached
+        """
+        list(self.cached_storage.get([MatchFilter('title', 'test')]))
+        list(self.cached_storage.get([MatchFilter('title', 'test')]))
+        items = list(self.cached_storage.get([MatchFilter('title', 'test')], limit=10))
+        cached_items = list(self.cached_storage.get([MatchFilter('title', 'test')], limit=10))
+
+        self.assertEqual(items, cached_items)
+        self.assertEqual(self.storage_mock.get.call_count, 3)
+
+    def test_lru_eviction(self):
+        """
+        Test the least recently used lookup is evicted when the cache is full
+        """
+        for title in ('test1', 'test2', 'test3'):
+            self.cached_storage.get_one([MatchFilter('title', title)])
+        self.cached_storage.get_one([MatchFilter('title', 'test1')])
+
+        self.assertEqual(self.storage_mock.get_one.call_count, 4)
+        self.assertEqual(self.cached_storage.stats.evictions, 2)
+
+    def test_ttl_expiration(self):
+        """
+        Test the expired lookups are loaded again from the wrapped storage
+        """
+        cached_storage = CachedStorage(self.storage_mock, LOGGER, ttl=0.01)
+        cached_storage.get_one([MatchFilter('title', 'test')])
+        sleep(0.02)
+        cached_storage.get_one([MatchFilter('title', 'test')])
+
+        self.assertEqual(self.storage_mock.get_one.call_count, 2)
+        self.assertEqual(cached_storage.stats.expirations, 1)
+
+    def test_save_invalidates_matching(self):
+        """
+        Test saving an item invalidates only the lookups which could include it
+        """
+        self.cached_storage.get_one([MatchFilter('title', 'test')])
+        self.cached_storage.get_one([MatchFilter('title', 'other')])
+
+        self.cached_storage.save(dict(title='test'))
+        self.cached_storage.get_one([MatchFilter('title', 'test')])
+        self.cached_storage.get_one([MatchFilter('title', 'other')])
+
+        self.assertEqual(self.storage_mock.get_one.call_count, 3)
+        self.assertEqual(self.cached_storage.stats.invalidations, 1)
+
+    def test_watching_invalidates_inserts(self):
+        """
+        Test the inserts consumed from a storage watcher invalidate the matching lookups
+        """
+        watcher_mock = MagicMock(spec=MongoStorage)
+        watcher_mock.get_one.return_value = MOCKED_ITEM
+        cached_storage = CachedStorage(watcher_mock, LOGGER)
+        cached_storage.get_one([RangeFilter('date', lower=1, upper=3)])
+        cached_storage.get_one([RangeFilter('date', lower=5)])
+
+        def inserts(*_, **__):
+            yield dict(title='test', date=2)
+            cached_storage.stop_watching()
+
+        watcher_mock.consume_inserts.side_effect = inserts
+        cached_storage.start_watching()
+        cached_storage._watcher_thread.join()
+
+        self.assertEqual(cached_storage.stats.invalidations, 1)
+
+    def test_watching_restarts(self):
+        """
+        Test the failed inserts stream is reopened resuming after the last consumed insert, invalidating all the
+        cached lookups meanwhile
+        """
+        watcher_mock = MagicMock(spec=MongoStorage)
+        watcher_mock.get_one.return_value = MOCKED_ITEM
+        cached_storage = CachedStorage(watcher_mock, LOGGER)
+        cached_storage.get_one([RangeFilter('date', lower=5)])
+
+        def inserts(*_, **__):
+            yield dict(title='test', date=2)
+            cached_storage.stop_watching()
+
+        watcher_mock.consume_inserts.side_effect = [ConnectionError('Stream closed'), inserts()]
+        cached_storage.start_watching(retry_delay=0.01)
+        cached_storage._watcher_thread.join(5)
+
+        self.assertFalse(cached_storage._watcher_thread.is_alive())
+        self.assertEqual(watcher_mock.consume_inserts.call_count, 2)
+        resume_store = watcher_mock.consume_inserts.call_args_list[0][1]['resume_store']
+        self.assertIs(watcher_mock.consume_inserts.call_args_list[1][1]['resume_store'], resume_store)
+        self.assertEqual(cached_storage.stats.invalidations, 1)
+
+    def test_watching_hub(self):
+        """
+        Test the inserts fanned out by a watcher hub invalidate the matching lookups
+        """
+        hub_mock = MagicMock(spec=WatcherHub)
+        hub_mock.subscribe.return_value = iter([dict(title='test', date=2)])
+        self.cached_storage.get_one([RangeFilter('date', lower=1, upper=3)])
+        self.cached_storage.start_watching(hub_mock)
+        self.cached_storage._watcher_thread.join()
+
+        hub_mock.subscribe.assert_called_once()
+        self.assertEqual(self.cached_storage.stats.invalidations, 1)
+
+    def test_watching_not_watcher(self):
+        """
+        Test watching a storage which is not a storage watcher raises error
+        """
+        with self.assertRaises(TypeError):
+            self.cached_storage.start_watching()
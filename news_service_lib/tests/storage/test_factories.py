@@ -5,7 +5,9 @@ import unittest
 from logging import getLogger
 
 from ...storage.implementation.mongo_storage import MongoStorage
-from ...storage import storage_factory
+from ...storage.implementation.async_mongo_storage import AsyncMongoStorage
+from ...storage.implementation.memory_storage import MemoryStorage
+from ...storage import storage_factory, async_storage_factory
 
 LOGGER = getLogger()
 
@@ -28,6 +30,28 @@ class TestFactories(unittest.TestCase):
         storage = storage_factory('MONGO', {'members': '0.0.0.0:1234', 'rsname': 'test', 'database': 'test'}, LOGGER)
         self.assertTrue(isinstance(storage, MongoStorage))
 
+    def test_storage_factory_memory(self):
+        """
+        Test storage factory with Memory type creates memory storage
+        """
+        storage = storage_factory('MEMORY', {'name': 'test'}, LOGGER)
+        self.assertTrue(isinstance(storage, MemoryStorage))
+
+    def test_async_storage_factory_unknown(self):
+        """
+        Test async storage factory raises error for unknown type
+        """
+        with self.assertRaises(NotImplementedError):
+            async_storage_factory('UNKNOWN', {}, LOGGER)
+
+    def test_async_storage_factory_mongo(self):
+        """
+        Test async storage factory with Mongo type creates async Mongo client
+        """
+        storage = async_storage_factory('MONGO', {'members': '0.0.0.0:1234', 'rsname': 'test', 'database': 'test'},
+                                        LOGGER)
+        self.assertTrue(isinstance(storage, AsyncMongoStorage))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,152 @@
+"""
+Filters and filters compiler tests module
+"""
+from unittest import TestCase
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.declarative import declarative_base
+
+from ...storage.filter import MatchFilter, RangeFilter, And, Or, Not, compile_filters, normalize_filters
+from ...storage.filter.parsers import MongoFilterParser, SQLFilterParser
+
+BASE = declarative_base()
+
+
+class TestEntity(BASE):
+    """
+    SQLAlchemy entity for testing purposes
+    """
+    __tablename__ = 'test'
+
+    id = Column(Integer, primary_key=True)
+    test = Column(String(255))
+    test_int = Column(Integer)
+
+
+class TestFilterCompiler(TestCase):
+    """
+    Filters and filters compiler test cases implementation
+    """
+    def test_filter_immutable(self):
+        """
+        Test the filters can not be altered
+        """
+        match_filter = MatchFilter('test', 'test')
+        with self.assertRaises(AttributeError):
+            match_filter.key = 'test2'
+        with self.assertRaises(TypeError):
+            match_filter['value'] = 'test2'
+
+    def test_filter_hashable(self):
+        """
+        Test the equal filters have the same hash and the copies with other values are different
+        """
+        range_filter = RangeFilter('test_int', lower=1)
+
+        self.assertEqual(range_filter, RangeFilter('test_int', lower=1))
+        self.assertEqual(len({range_filter, RangeFilter('test_int', lower=1)}), 1)
+        self.assertNotEqual(range_filter, range_filter.with_values(upper=3))
+        self.assertEqual(range_filter.with_values(upper=3), RangeFilter('test_int', lower=1, upper=3))
+
+    def test_compile_memoized(self):
+        """
+        Test the filters with the same shape share the same plan
+        """
+        plan = compile_filters([MatchFilter('test', 'test'), RangeFilter('test_int', lower=1)], MongoFilterParser)
+        other_plan = compile_filters([MatchFilter('test', 'other'), RangeFilter('test_int', lower=5)],
+                                     MongoFilterParser)
+        upper_plan = compile_filters([MatchFilter('test', 'test'), RangeFilter('test_int', upper=1)],
+                                     MongoFilterParser)
+
+        self.assertIs(plan, other_plan)
+        self.assertIsNot(plan, upper_plan)
+
+    def test_compile_mongo(self):
+        """
+        Test binding the mongo plan values returns the mongo query of the filters
+        """
+        filters = [MatchFilter('test', 'test'), RangeFilter('test_int', lower=1, upper=3)]
+        plan = compile_filters(filters, MongoFilterParser)
+
+        query = MongoFilterParser.bind(plan.query, plan.values(filters))
+
+        self.assertEqual(query, {'test': 'test', 'test_int': {'$gt': 1, '$lt': 3}})
+
+    def test_compile_sql(self):
+        """
+        Test the SQL plan resolves the model columns and binds the filter values as parameters
+        """
+        filters = [MatchFilter('test', 'test'), RangeFilter('test_int', lower=1)]
+        plan = compile_filters(filters, SQLFilterParser, TestEntity)
+
+        self.assertEqual(len(plan.query), 2)
+        self.assertEqual(set(plan.values(filters).values()), {'test', 1})
+        self.assertEqual(filters[0].key, 'test')
+
+    def test_compile_sql_unknown_key(self):
+        """
+        Test compiling filters with keys not present in the model raises error
+        """
+        with self.assertRaises(AttributeError):
+            compile_filters([MatchFilter('unknown', 'test')], SQLFilterParser, TestEntity)
+
+    def test_normalize_filters(self):
+        """
+        Test the normalization flattens the nested and/or filters, removes the repeated filters and the double
+        negations
+        """
+        first = MatchFilter('test', 'first')
+        second = MatchFilter('test', 'second')
+        range_filter = RangeFilter('test_int', lower=1)
+
+        normalized = normalize_filters([And(first, And(range_filter, first)), Or(first, Or(second, first)),
+                                        Not(Not(range_filter))])
+
+        self.assertEqual(normalized, (first, range_filter, Or(first, second)))
+        self.assertEqual(normalize_filters([Or(first)]), (first,))
+        with self.assertRaises(ValueError):
+            Or()
+
+    def test_compile_mongo_same_key(self):
+        """
+        Test the mongo filters over the same key are merged or kept in an $and clause instead of overwritten
+        """
+        filters = [RangeFilter('test_int', lower=1), RangeFilter('test_int', upper=5), MatchFilter('test', 'first'),
+                   MatchFilter('test', 'second')]
+        plan = compile_filters(filters, MongoFilterParser)
+
+        query = MongoFilterParser.bind(plan.query, plan.values(filters))
+
+        self.assertEqual(query, {'test_int': {'$gt': 1, '$lt': 5}, 'test': 'first', '$and': [{'test': 'second'}]})
+
+    def test_compile_mongo_boolean(self):
+        """
+        Test the or and not filters are compiled to the $or and $nor mongo operators, sharing the plan between
+        filters of the same shape
+        """
+        filters = [Or(MatchFilter('test', 'first'),
+                      And(MatchFilter('test', 'second'), RangeFilter('test_int', lower=1))),
+                   Not(RangeFilter('test_int', upper=3))]
+        other_filters = [Or(MatchFilter('test', 'a'),
+                            And(MatchFilter('test', 'b'), RangeFilter('test_int', lower=2))),
+                         Not(RangeFilter('test_int', upper=4))]
+        plan = compile_filters(filters, MongoFilterParser)
+
+        query = MongoFilterParser.bind(plan.query, plan.values(filters))
+
+        self.assertIs(plan, compile_filters(other_filters, MongoFilterParser))
+        self.assertEqual(query, {'$or': [{'test': 'first'}, {'test': 'second', 'test_int': {'$gt': 1}}],
+                                 '$nor': [{'test_int': {'$lt': 3}}]})
+
+    def test_compile_sql_boolean(self):
+        """
+        Test the or and not filters are compiled to the SQL OR and NOT expressions with bound values
+        """
+        filters = [Or(MatchFilter('test', 'first'), RangeFilter('test_int', lower=1)), Not(MatchFilter('test', 'x'))]
+        plan = compile_filters(filters, SQLFilterParser, TestEntity)
+
+        self.assertEqual([str(expression) for expression in plan.query],
+                         ['test.test = :filter_0_0_value OR test.test_int > :filter_0_1_lower',
+                          'test.test != :filter_1_0_value'])
+        self.assertEqual(plan.values(filters), dict(filter_0_0_value='first', filter_0_1_lower=1,
+                                                    filter_1_0_value='x'))
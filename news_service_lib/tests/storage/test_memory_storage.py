@@ -0,0 +1,294 @@
+"""
+Memory storage tests module
+"""
+from logging import getLogger
+from threading import Thread
+from unittest import TestCase
+
+from ...storage.aggregation import Aggregation, AggregationOperation, GroupKey
+from ...storage.exceptions import StorageError, StorageIntegrityError
+from ...storage.filter import MatchFilter, RangeFilter, InFilter, And, Or, Not
+from ...storage.implementation import MemoryStorage
+from ...storage.index_spec import IndexSpec
+from ...storage.resume_token_store import MemoryResumeTokenStore
+from ...storage.sort_direction import SortDirection
+
+LOGGER = getLogger()
+
+
+class TestMemoryStorage(TestCase):
+    """
+    Memory storage test cases
+    """
+    ITEMS = [dict(name='first', value=3, group='a'),
+             dict(name='second', value=1, group='b'),
+             dict(name='third', value=2, group='a'),
+             dict(name='fourth', group='b')]
+
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.storage = MemoryStorage(LOGGER, name='test')
+
+    def _save_items(self):
+        """
+        Save the test items
+        """
+        for item in self.ITEMS:
+            self.storage.save(dict(item))
+
+    def test_save(self):
+        """
+        Test the saved item is stored as a copy with an assigned identifier
+        """
+        item = dict(name='first', nested=dict(value=1))
+        self.storage.save(item)
+        item['nested']['value'] = 2
+
+        stored_item = self.storage.get_one()
+        self.assertEqual(stored_item['_id'], item['_id'])
+        self.assertEqual(stored_item['nested']['value'], 1)
+
+    def test_save_duplicated_identifier(self):
+        """
+        Test saving an item with the identifier of a stored item raises an integrity error
+        """
+        self.storage.save(dict(_id=1))
+        with self.assertRaises(StorageIntegrityError):
+            self.storage.save(dict(_id=1))
+
+    def test_save_many_ordered(self):
+        """
+        Test the ordered bulk save stops at the first failing item
+        """
+        result = self.storage.save_many([dict(_id=1), dict(_id=1), dict(_id=2)], ordered=True)
+        self.assertEqual(len(result.saved), 1)
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [1, 2])
+        self.assertEqual(len(self.storage), 1)
+
+    def test_get_filters(self):
+        """
+        Test the match and range filters select the expected items
+        """
+        self._save_items()
+        self.assertEqual([item['name'] for item in self.storage.get([MatchFilter('group', 'a')])],
+                         ['first', 'third'])
+        self.assertEqual([item['name'] for item in self.storage.get([RangeFilter('value', lower=1)])],
+                         ['first', 'third'])
+        self.assertEqual([item['name'] for item in self.storage.get([MatchFilter('group', 'a'),
+                                                                     RangeFilter('value', upper=3)])],
+                         ['third'])
+        self.assertEqual([item['name'] for item in self.storage.get([MatchFilter('value', None)])], ['fourth'])
+
+    def test_get_many_by_key(self):
+        """
+        Test the items are loaded by key value with the in filter served by the hash index
+        """
+        self._save_items()
+        items = self.storage.get_many_by_key('name', ['third', 'first', 'missing'], fields=['value'], chunk_size=1)
+        self.assertEqual(items, {'first': dict(_id=items['first']['_id'], name='first', value=3),
+                                 'third': dict(_id=items['third']['_id'], name='third', value=2)})
+        self.assertEqual([item['name'] for item in self.storage.get([InFilter('group', ['b', 'c']),
+                                                                     InFilter('value', [1, 2])])], ['second'])
+
+    def test_get_boolean_filters(self):
+        """
+        Test the or and not filters, with the not filters matching the items without the key
+        """
+        self._save_items()
+        self.assertEqual([item['name'] for item in self.storage.get([Or(MatchFilter('name', 'second'),
+                                                                        RangeFilter('value', lower=2))])],
+                         ['first', 'second'])
+        self.assertEqual([item['name'] for item in self.storage.get([Not(RangeFilter('value', lower=1))])],
+                         ['second', 'fourth'])
+        self.assertEqual([item['name'] for item in self.storage.get([And(MatchFilter('group', 'a'),
+                                                                         Not(MatchFilter('value', 3)))])],
+                         ['third'])
+
+    def test_get_sorted(self):
+        """
+        Test the items are sorted by the sort key with the missing values first
+        """
+        self._save_items()
+        self.assertEqual([item['name'] for item in self.storage.get(sort_key='value')],
+                         ['fourth', 'second', 'third', 'first'])
+        self.assertEqual([item['name'] for item in self.storage.get([MatchFilter('group', 'a')], sort_key='value',
+                                                                    sort_direction=SortDirection.DESC)],
+                         ['first', 'third'])
+
+    def test_get_pages(self):
+        """
+        Test the keyset pagination gets all the items without repeating them
+        """
+        self._save_items()
+        first_page = list(self.storage.get(sort_key='value', limit=2))
+        cursor = self.storage.page_cursor(first_page[-1], sort_key='value')
+        second_page = list(self.storage.get(sort_key='value', limit=2, after=cursor))
+        self.assertEqual([item['name'] for item in first_page + second_page], ['fourth', 'second', 'third', 'first'])
+        self.assertEqual(list(self.storage.get(sort_key='value', limit=2, offset=4)), [])
+
+    def test_get_fields(self):
+        """
+        Test the get projection includes only the requested fields and the identifier
+        """
+        self._save_items()
+        item = self.storage.get_one([MatchFilter('name', 'first')], fields=['value'])
+        self.assertEqual(set(item), {'_id', 'value'})
+
+    def test_explain(self):
+        """
+        Test the explain reports the index used to find the candidates and the examined and matched items
+        """
+        self._save_items()
+        plan = self.storage.explain([MatchFilter('group', 'a'), RangeFilter('value', lower=2)])
+        self.assertEqual(plan['index'], dict(type='hash', keys=['group']))
+        self.assertEqual((plan['examined'], plan['matched']), (2, 1))
+        plan = self.storage.explain(sort_key='value', sort_direction=SortDirection.DESC)
+        self.assertEqual((plan['index'], plan['examined'], plan['sort']), (None, 4, 'index'))
+
+    def test_count_exists(self):
+        """
+        Test the count and exists methods with and without filters
+        """
+        self._save_items()
+        self.assertEqual(self.storage.count(), 4)
+        self.assertEqual(self.storage.count([MatchFilter('group', 'b')]), 2)
+        self.assertTrue(self.storage.exists([RangeFilter('value', lower=2)]))
+        self.assertFalse(self.storage.exists([RangeFilter('value', lower=3)]))
+
+    def test_aggregate(self):
+        """
+        Test the aggregation of the items by group
+        """
+        self._save_items()
+        results = self.storage.aggregate(['group'], [Aggregation(AggregationOperation.COUNT),
+                                                     Aggregation(AggregationOperation.SUM, 'value'),
+                                                     Aggregation(AggregationOperation.MAX, 'value')])
+        self.assertEqual(results, [dict(group='a', count=2, sum_value=5, max_value=3),
+                                   dict(group='b', count=2, sum_value=1, max_value=1)])
+        buckets = self.storage.aggregate([GroupKey('value', bucket_size=2)], [Aggregation(AggregationOperation.COUNT)],
+                                         [RangeFilter('value', lower=0)])
+        self.assertEqual(buckets, [dict(value=0, count=1), dict(value=2, count=2)])
+
+    def test_drop(self):
+        """
+        Test dropping the storage removes all the items and keeps the unique constraints usable
+        """
+        self.storage = MemoryStorage(LOGGER, indexes=[IndexSpec.of('name', unique=True)])
+        self.storage.ensure_indexes()
+        self._save_items()
+
+        self.storage.drop()
+        self.storage.save(dict(name='first'))
+
+        self.assertEqual([item['name'] for item in self.storage.get([MatchFilter('name', 'first')])], ['first'])
+        self.assertEqual(self.storage.count(), 1)
+
+    def test_not_comparable_values(self):
+        """
+        Test the items whose values can not be sorted with the indexed values are rejected without being stored
+        """
+        self._save_items()
+        self.assertEqual([item['name'] for item in self.storage.get(sort_key='value', limit=1)], ['fourth'])
+
+        with self.assertRaises(StorageError):
+            self.storage.save(dict(name='fifth', value='high'))
+        with self.assertRaises(StorageError):
+            self.storage.update([MatchFilter('name', 'first')], dict(value='high'))
+
+        self.assertEqual(self.storage.count(), 4)
+        self.assertIsNone(self.storage.get_one([MatchFilter('name', 'fifth')]))
+        self.assertEqual([item['value'] for item in self.storage.get([RangeFilter('value', lower=2)])], [3])
+
+    def test_update_delete(self):
+        """
+        Test the updates and deletes keep the indexes consistent
+        """
+        self._save_items()
+        self.assertEqual(self.storage.update_many([MatchFilter('group', 'a')], dict(group='c')), 2)
+        self.assertEqual(self.storage.count([MatchFilter('group', 'a')]), 0)
+        self.assertEqual(self.storage.count([MatchFilter('group', 'c')]), 2)
+        self.assertEqual(self.storage.update([MatchFilter('name', 'second')], dict(value=10)), 1)
+        self.assertEqual([item['name'] for item in self.storage.get([RangeFilter('value', lower=5)])], ['second'])
+        self.assertEqual(self.storage.delete_many([MatchFilter('group', 'c')]), 2)
+        self.storage.delete(self.storage.get_one([MatchFilter('name', 'second')])['_id'])
+        self.assertEqual([item['name'] for item in self.storage.get(sort_key='value')], ['fourth'])
+
+    def test_upsert(self):
+        """
+        Test the upsert inserts the new items and updates the stored ones
+        """
+        self.assertTrue(self.storage.upsert(dict(name='first', value=1), ['name']))
+        self.assertFalse(self.storage.upsert(dict(name='first', value=2), ['name']))
+        self.assertFalse(self.storage.save_if_absent(dict(name='first', value=3), ['name']))
+        self.assertEqual(self.storage.count(), 1)
+        self.assertEqual(self.storage.get_one()['value'], 2)
+
+        result = self.storage.upsert_many([dict(name='first', value=4), dict(name='second', value=5)], ['name'])
+        self.assertTrue(result.success)
+        self.assertEqual([item['value'] for item in self.storage.get(sort_key='name')], [4, 5])
+
+    def test_unique_index(self):
+        """
+        Test the declared unique indexes reject the duplicated keys
+        """
+        storage = MemoryStorage(LOGGER, indexes=[IndexSpec.of('name', unique=True)])
+        self.assertEqual(storage.ensure_indexes(), ['name'])
+        storage.save(dict(name='first'))
+        storage.save(dict(name='second'))
+        with self.assertRaises(StorageIntegrityError):
+            storage.save(dict(name='first'))
+        with self.assertRaises(StorageIntegrityError):
+            storage.update([MatchFilter('name', 'second')], dict(name='first'))
+        self.assertEqual(storage.count([MatchFilter('name', 'first')]), 1)
+        self.assertIn(IndexSpec.of('name', unique=True), storage.existing_indexes())
+
+    def test_advise_indexes(self):
+        """
+        Test the advised indexes are the queried keys not indexed when auto indexing is disabled
+        """
+        storage = MemoryStorage(LOGGER, auto_index=False, index_advisor=True)
+        storage.save(dict(name='first'))
+        list(storage.get([MatchFilter('name', 'first')]))
+        self.assertEqual(storage.advise_indexes(create=True), [IndexSpec.of('name')])
+        self.assertEqual(storage.advise_indexes(), [])
+
+    def test_consume_inserts(self):
+        """
+        Test the inserts consumer receives the inserts after its checkpoint and resumes from the last not processed
+        """
+        resume_store = MemoryResumeTokenStore()
+        self.storage.save(dict(name='before'))
+        resume_store.save('test', 1)
+        consumed = list()
+
+        def consume():
+            """
+            Consume two inserts
+            """
+            for inserted_item in self.storage.consume_inserts(fields=['name'], resume_store=resume_store):
+                consumed.append(inserted_item['name'])
+                if len(consumed) == 2:
+                    break
+        consumer_thread = Thread(target=consume)
+        consumer_thread.start()
+        for name in ('first', 'second', 'third'):
+            self.storage.save(dict(name=name))
+        consumer_thread.join(5)
+
+        self.assertEqual(consumed, ['first', 'second'])
+        resumed = next(self.storage.consume_inserts(resume_store=resume_store))
+        self.assertEqual(resumed['name'], 'second')
+
+    def test_consume_insert_batches(self):
+        """
+        Test the inserts are consumed in batches bounded by size
+        """
+        resume_store = MemoryResumeTokenStore()
+        resume_store.save('test', 0)
+        self._save_items()
+        batches = self.storage.consume_insert_batches(batch_size=3, batch_window=0.01, resume_store=resume_store)
+        self.assertEqual([item['name'] for item in next(batches)], ['first', 'second', 'third'])
+        self.assertEqual([item['name'] for item in next(batches)], ['fourth'])
+        self.assertEqual(resume_store.load('test'), 3)
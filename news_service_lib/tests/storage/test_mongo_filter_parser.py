@@ -25,3 +25,10 @@ class TestMongoFilterParser(TestCase):
         test_upper = 2
         parsed_filter = MongoFilterParser.parse_range('test_int', upper=test_upper, lower=test_lower)
         self.assertEqual(parsed_filter, dict(test_int={'$gt': test_lower, '$lt': test_upper}))
+
+    def test_parse_in(self):
+        """
+        Test the parse in returns the dictionary with the $in operator and the values as a list
+        """
+        parsed_filter = MongoFilterParser.parse_in('test', ('first', 'second'))
+        self.assertEqual(parsed_filter, dict(test={'$in': ['first', 'second']}))
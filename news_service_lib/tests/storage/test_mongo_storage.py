@@ -2,16 +2,72 @@ import unittest
 from logging import getLogger
 
 import mongomock
+from pymongo.read_preferences import Nearest, SecondaryPreferred
 from unittest.mock import patch
 
+from ...storage.aggregation import Aggregation, AggregationOperation, GroupKey
+from ...storage.exceptions import StorageIntegrityError
+from ...storage.filter.boolean_filter import Or, Not
+from ...storage.filter.in_filter import InFilter
 from ...storage.filter.match_filter import MatchFilter
+from ...storage.filter.range_filter import RangeFilter
 from ...storage.implementation.mongo_storage import MongoStorage
+from ...storage.index_spec import IndexSpec
+from ...storage.mongo_utils import close_mongo_clients
+from ...storage.resume_token_store import MemoryResumeTokenStore
+from ...storage.slow_operation import SlowOperationHook
+from ...storage.sort_direction import SortDirection
 
 LOGGER = getLogger()
 MOCKED_ITEM = {'id': 1, 'test': 'test'}
 MOCKED_ITEM_UPDATE = {'id': 1, 'test': 'test2'}
 
 
+class FakeInsertsStream:
+    """
+    Fake insert operations change stream
+    """
+
+    def __init__(self, documents: list):
+        """
+        Initialize the fake change stream with the inserted documents
+        """
+        self._changes = [dict(_id=dict(_data=str(index)), operationType='insert', fullDocument=document)
+                         for index, document in enumerate(documents)]
+
+    def __enter__(self):
+        """
+        Open the fake change stream
+        """
+        return self
+
+    def __exit__(self, *_):
+        """
+        Close the fake change stream
+        """
+        self._changes = []
+
+    def __iter__(self):
+        """
+        Iterate the pending changes
+        """
+        while self._changes:
+            yield self._changes.pop(0)
+
+    @property
+    def alive(self) -> bool:
+        """
+        Check if there are pending changes
+        """
+        return bool(self._changes)
+
+    def try_next(self):
+        """
+        Get the next pending change if any
+        """
+        return self._changes.pop(0) if self._changes else None
+
+
 class TestMongoStorage(unittest.TestCase):
     MONGO_HOST = '0.1.2.3'
     MONGO_PORT = 1234
@@ -19,9 +75,44 @@ class TestMongoStorage(unittest.TestCase):
     DATABASE = 'test'
     COLLECTION = 'test'
 
+    def tearDown(self):
+        """
+        Close the shared clients, so each test uses the mocked servers of its own patch
+        """
+        close_mongo_clients()
+
     @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
-    @patch.object(MongoStorage, '_init_replicaset')
-    def test_collection_not_set(self, _):
+    def test_shared_client(self):
+        """
+        Test the storages of the same replicaset share the same client without initiating the replicaset
+        """
+        with patch('news_service_lib.storage.implementation.mongo_storage.initiate_replicaset') as init_mock:
+            first_storage = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+            second_storage = MongoStorage(self.MONGO_MEMBER, 'test', 'other', LOGGER)
+        init_mock.assert_not_called()
+        self.assertIs(first_storage._mongo_client, second_storage._mongo_client)
+
+        first_storage.set_collection(self.COLLECTION)
+        second_storage.set_collection(self.COLLECTION)
+        first_storage.save(dict(name='first'))
+        self.assertEqual(first_storage.count(), 1)
+        self.assertEqual(second_storage.count(), 0)
+
+        close_mongo_clients()
+        self.assertIsNot(MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)._mongo_client,
+                         first_storage._mongo_client)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_init_replicaset(self):
+        """
+        Test the replicaset is initiated only when requested
+        """
+        with patch('news_service_lib.storage.implementation.mongo_storage.initiate_replicaset') as init_mock:
+            MongoStorage(f'{self.MONGO_MEMBER},0.1.2.4:1234', 'test', self.DATABASE, LOGGER, init_replicaset='true')
+        init_mock.assert_called_once_with([self.MONGO_MEMBER, '0.1.2.4:1234'], 'test', LOGGER)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_collection_not_set(self):
         """
         Test if not setting the collection raises error
         """
@@ -31,8 +122,7 @@ class TestMongoStorage(unittest.TestCase):
             mongo_client.save(MOCKED_ITEM)
 
     @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
-    @patch.object(MongoStorage, '_init_replicaset')
-    def test_save(self, _):
+    def test_save(self):
         """
         Test the persist functionality
         """
@@ -44,8 +134,7 @@ class TestMongoStorage(unittest.TestCase):
         self.assertEqual(stored_item, MOCKED_ITEM)
 
     @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
-    @patch.object(MongoStorage, '_init_replicaset')
-    def test_get_one(self, _):
+    def test_get_one(self):
         """
         Test querying one item
         """
@@ -61,8 +150,65 @@ class TestMongoStorage(unittest.TestCase):
         self.assertEqual(query_item, MOCKED_ITEM_UPDATE)
 
     @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
-    @patch.object(MongoStorage, '_init_replicaset')
-    def test_get(self, _):
+    def test_get_many_by_key(self):
+        """
+        Test the items are loaded by key value in chunks with the in filter
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(url=f'url_{index}', title=f'title_{index}') for index in range(5)])
+
+        items = mongo_client.get_many_by_key('url', ['url_4', 'url_0', 'url_9', 'url_4', 'url_2'], fields=['title'],
+                                             chunk_size=2)
+        self.assertEqual(set(items), {'url_0', 'url_2', 'url_4'})
+        self.assertEqual(items['url_2']['title'], 'title_2')
+        self.assertEqual(len(list(mongo_client.get([InFilter('url', ['url_1', 'url_3'])]))), 2)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_slow_operation_examined(self):
+        """
+        Test the slow queries report the documents examined by their explained plan, explained with the same limit
+        """
+        slow_operations = list()
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER, slow_operation_threshold='0',
+                                    explain_slow_operations='true', index_advisor='false')
+        self.assertEqual((mongo_client.slow_operation_hook.threshold, mongo_client.slow_operation_hook.explain),
+                         (0.0, True))
+        self.assertIsNone(mongo_client.index_advisor)
+        mongo_client.slow_operation_hook = SlowOperationHook(LOGGER, threshold=0.0, explain=True,
+                                                             callback=slow_operations.append)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save(dict(name='test'))
+
+        with patch.object(mongomock.database.Database, 'command',
+                          return_value=dict(executionStats=dict(totalDocsExamined=7))) as command_mock:
+            self.assertEqual(mongo_client.get_one([MatchFilter('name', 'test')])['name'], 'test')
+
+        explain_command = command_mock.call_args[0][0]
+        self.assertEqual(explain_command['verbosity'], 'executionStats')
+        self.assertEqual(dict(explain_command['explain']), dict(find=self.COLLECTION, filter=dict(name='test'),
+                                                                sort=dict(_id=1), limit=1))
+        self.assertEqual([(slow_operation.operation, slow_operation.examined) for slow_operation in slow_operations],
+                         [('save', None), ('get_one', 7)])
+        self.assertEqual(slow_operations[-1].target, self.COLLECTION)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_get_boolean_filters(self):
+        """
+        Test the or and not filters and the filters over the same key select the items server side
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(name=f'name_{index}', value=index) for index in range(5)])
+
+        items = mongo_client.get([Or(MatchFilter('name', 'name_0'), RangeFilter('value', lower=1)),
+                                  Not(MatchFilter('name', 'name_3'))])
+        self.assertEqual([item['name'] for item in items], ['name_0', 'name_2', 'name_4'])
+        self.assertEqual(mongo_client.count([MatchFilter('name', 'name_1'), MatchFilter('name', 'name_2')]), 0)
+        self.assertEqual(mongo_client.count([RangeFilter('value', lower=0), RangeFilter('value', upper=3)]), 2)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_get(self):
         """
         Test querying multiple items
         """
@@ -79,8 +225,7 @@ class TestMongoStorage(unittest.TestCase):
         self.assertEqual(filtered_items[0], MOCKED_ITEM_UPDATE)
 
     @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
-    @patch.object(MongoStorage, '_init_replicaset')
-    def test_delete(self, _):
+    def test_delete(self):
         """
         Test the delete functionality
         """
@@ -94,3 +239,287 @@ class TestMongoStorage(unittest.TestCase):
         mongo_client.delete(MOCKED_ITEM['_id'])
         items = list(mongo_client.get())
         self.assertEqual(len(items), 0)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_save_many(self):
+        """
+        Test the bulk persist functionality reports the failing items without aborting the batch
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.collection.create_index('test', unique=True)
+
+        result = mongo_client.save_many([dict(test='test1'), dict(test='test1'), dict(test='test2')])
+
+        self.assertEqual(len(result.saved), 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].index, 1)
+        self.assertIsInstance(result.errors[0].error, StorageIntegrityError)
+        self.assertEqual(len(list(mongo_client.get())), 2)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_save_many_ordered(self):
+        """
+        Test the ordered bulk persist stops at the first failing item
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.collection.create_index('test', unique=True)
+
+        result = mongo_client.save_many([dict(test='test1'), dict(test='test1'), dict(test='test2')], ordered=True)
+
+        self.assertEqual(len(result.saved), 1)
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [1, 2])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_get_pages(self):
+        """
+        Test querying the items in pages using the page cursor of the last item of each page
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(test=f'test{index % 3}', index=index) for index in range(7)])
+
+        pages = []
+        after = None
+        while True:
+            page = list(mongo_client.get(sort_key='test', sort_direction=SortDirection.DESC, limit=3, after=after))
+            if not page:
+                break
+            pages.append([item['index'] for item in page])
+            after = mongo_client.page_cursor(page[-1], sort_key='test')
+
+        self.assertEqual(pages, [[5, 2, 4], [1, 6, 3], [0]])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_get_limit_offset(self):
+        """
+        Test querying the items with limit and offset
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(index=index) for index in range(5)])
+
+        items = list(mongo_client.get(limit=2, offset=2))
+
+        self.assertEqual([item['index'] for item in items], [2, 3])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_get_fields(self):
+        """
+        Test querying items loading only the specified fields
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save(dict(test='test', content='test_content'))
+
+        items = list(mongo_client.get(fields=['test']))
+        item = mongo_client.get_one(fields=['content'])
+
+        self.assertEqual(set(items[0].keys()), {'_id', 'test'})
+        self.assertEqual(set(item.keys()), {'_id', 'content'})
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_ensure_indexes(self):
+        """
+        Test ensuring the indexes creates the declared collection indexes
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION, indexes=[IndexSpec.of('test', unique=True, name='test_index'),
+                                                              IndexSpec.of('source', 'date')])
+
+        mongo_client.ensure_indexes()
+
+        existing_fields = [index.fields for index in mongo_client.existing_indexes()]
+        self.assertIn(('test',), existing_fields)
+        self.assertIn(('source', 'date'), existing_fields)
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_advise_indexes(self):
+        """
+        Test the index advisor reports the indexes needed by the queries and creates them if requested
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER, index_advisor=True)
+        mongo_client.set_collection(self.COLLECTION, indexes=[IndexSpec.of('title')])
+        mongo_client.ensure_indexes()
+
+        mongo_client.get_one([MatchFilter('title', 'test')])
+        list(mongo_client.get([RangeFilter('date', lower=1), MatchFilter('source', 'test')], sort_key='date'))
+        list(mongo_client.get([RangeFilter('date', lower=1), MatchFilter('source', 'test')], sort_key='date'))
+
+        missing_indexes = mongo_client.advise_indexes(create=True)
+
+        self.assertEqual([index.fields for index in missing_indexes], [('source', 'date')])
+        self.assertEqual(mongo_client.advise_indexes(), [])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_count_exists(self):
+        """
+        Test counting and checking the existence of the items which match the filters
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(id=index, test='test') for index in range(5)])
+
+        self.assertEqual(mongo_client.count(), 5)
+        self.assertEqual(mongo_client.count([RangeFilter('id', lower=0, upper=4)]), 3)
+        self.assertTrue(mongo_client.exists([MatchFilter('id', 3)]))
+        self.assertFalse(mongo_client.exists([MatchFilter('id', 9)]))
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_aggregate(self):
+        """
+        Test aggregating the average sentiment per source and day
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(source='source_1', date=100.0, sentiment=1.0),
+                                dict(source='source_1', date=200.0, sentiment=0.0),
+                                dict(source='source_1', date=86500.0, sentiment=0.5),
+                                dict(source='source_2', date=300.0, sentiment=-1.0)])
+
+        groups = mongo_client.aggregate(['source', GroupKey('date', bucket_size=86400)],
+                                        [Aggregation(AggregationOperation.AVG, 'sentiment'),
+                                         Aggregation(AggregationOperation.COUNT, name='news')])
+        totals = mongo_client.aggregate([], [Aggregation(AggregationOperation.MIN, 'sentiment')],
+                                        filters=[MatchFilter('source', 'source_1')])
+
+        self.assertEqual(groups, [dict(source='source_1', date=0.0, avg_sentiment=0.5, news=2),
+                                  dict(source='source_1', date=86400.0, avg_sentiment=0.5, news=1),
+                                  dict(source='source_2', date=0.0, avg_sentiment=-1.0, news=1)])
+        self.assertEqual(totals, [dict(min_sentiment=0.0)])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_aggregate_negative_buckets(self):
+        """
+        Test the negative key values are grouped in the bucket below them
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(id=index) for index in range(-3, 3)])
+
+        buckets = mongo_client.aggregate([GroupKey('id', bucket_size=2)], [Aggregation(AggregationOperation.COUNT)])
+
+        self.assertEqual(buckets, [dict(id=-4, count=1), dict(id=-2, count=2), dict(id=0, count=2),
+                                   dict(id=2, count=1)])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_drop(self):
+        """
+        Test dropping the storage drops its collection
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save(dict(test='test'))
+
+        mongo_client.drop()
+
+        self.assertNotIn(self.COLLECTION, mongo_client.collection.database.list_collection_names())
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_delete_many_update(self):
+        """
+        Test deleting and updating the items which match the filters
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        mongo_client.save_many([dict(id=index, test='test') for index in range(5)])
+
+        updated_one = mongo_client.update([MatchFilter('test', 'test')], dict(test='updated'))
+        updated_many = mongo_client.update_many([RangeFilter('id', lower=2)], dict(test='updated', hydrated=True))
+        deleted = mongo_client.delete_many([MatchFilter('test', 'updated')])
+
+        self.assertEqual(updated_one, 1)
+        self.assertEqual(updated_many, 2)
+        self.assertEqual(deleted, 3)
+        self.assertEqual(sorted(item['id'] for item in mongo_client.get()), [1, 2])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_upsert(self):
+        """
+        Test upserting the items inserts the new ones and updates the existing ones by key
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+
+        inserted = mongo_client.upsert(dict(MOCKED_ITEM), ['id'])
+        updated = mongo_client.upsert(dict(MOCKED_ITEM_UPDATE), ['id'])
+        result = mongo_client.upsert_many([dict(id=1, test='test3'), dict(id=2, test='test')], ['id'])
+
+        self.assertTrue(inserted)
+        self.assertFalse(updated)
+        self.assertEqual(len(result.saved), 2)
+        self.assertEqual(sorted((item['id'], item['test']) for item in mongo_client.get()), [(1, 'test3'), (2, 'test')])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_save_if_absent(self):
+        """
+        Test saving if absent only inserts the items not already stored
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+
+        inserted = mongo_client.save_if_absent(dict(MOCKED_ITEM), ['id'])
+        duplicated = mongo_client.save_if_absent(dict(MOCKED_ITEM_UPDATE), ['id'])
+
+        self.assertTrue(inserted)
+        self.assertFalse(duplicated)
+        self.assertEqual([(item['id'], item['test']) for item in mongo_client.get()], [(1, 'test')])
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_consume_inserts_resume(self):
+        """
+        Test consuming the inserts checkpoints the resume token of each insert and resumes after the last one
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        resume_store = MemoryResumeTokenStore()
+        resume_store.save('consumer', dict(_data='previous'))
+
+        with patch.object(mongo_client.collection, 'watch', return_value=FakeInsertsStream([MOCKED_ITEM])) as watch:
+            inserts = list(mongo_client.consume_inserts(fields=['test'], resume_store=resume_store,
+                                                        consumer='consumer'))
+
+        self.assertEqual(inserts, [MOCKED_ITEM])
+        self.assertEqual(watch.call_args[1]['resume_after'], dict(_data='previous'))
+        self.assertIn('fullDocument.test', watch.call_args[0][0][-1]['$project'])
+        self.assertEqual(resume_store.load('consumer'), dict(_data='0'))
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_consume_insert_batches(self):
+        """
+        Test consuming the inserts in batches checkpoints each batch once processed
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER)
+        mongo_client.set_collection(self.COLLECTION)
+        resume_store = MemoryResumeTokenStore()
+        documents = [dict(id=index) for index in range(5)]
+
+        with patch.object(mongo_client.collection, 'watch', return_value=FakeInsertsStream(documents)):
+            batches = mongo_client.consume_insert_batches(batch_size=2, batch_window=0.01, resume_store=resume_store)
+            first_batch = next(batches)
+            first_checkpoint = resume_store.load(mongo_client.collection.full_name)
+            next_batches = list(batches)
+
+        self.assertEqual(first_batch, documents[:2])
+        self.assertIsNone(first_checkpoint)
+        self.assertEqual(next_batches, [documents[2:4], documents[4:]])
+        self.assertEqual(resume_store.load(mongo_client.collection.full_name), dict(_data='4'))
+
+    @mongomock.patch(servers=((MONGO_HOST, MONGO_PORT),))
+    def test_with_options(self):
+        """
+        Test the storage read preference and write concern can be overridden for a view of the storage
+        """
+        mongo_client = MongoStorage(self.MONGO_MEMBER, 'test', self.DATABASE, LOGGER,
+                                    read_preference='secondaryPreferred', max_staleness='120', w='majority', j='true')
+        mongo_client.set_collection(self.COLLECTION)
+
+        storage_view = mongo_client.with_options(read_preference='nearest', w=1)
+        storage_view.save(dict(MOCKED_ITEM))
+
+        self.assertEqual(mongo_client.collection.read_preference, SecondaryPreferred(max_staleness=120))
+        self.assertEqual(mongo_client.collection.write_concern.document, dict(w='majority', j=True))
+        self.assertEqual(storage_view.collection.read_preference, Nearest())
+        self.assertEqual(storage_view.collection.write_concern.document, dict(w=1, j=True))
+        self.assertEqual(mongo_client.get_one(), MOCKED_ITEM)
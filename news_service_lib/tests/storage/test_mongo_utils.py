@@ -1,12 +1,18 @@
 """
 Mongo utils tests module
 """
+from logging import getLogger
 from unittest import TestCase
+from unittest.mock import patch
 
 import mongomock
 import pymongo
+from pymongo.read_preferences import SecondaryPreferred, Primary
+from pymongo.write_concern import WriteConcern
 
-from ...storage.mongo_utils import mongo_health_check
+from ...storage.mongo_utils import mongo_health_check, read_preference, write_concern, init_replicaset
+
+LOGGER = getLogger()
 
 
 class TestMongoUtils(TestCase):
@@ -32,3 +38,36 @@ class TestMongoUtils(TestCase):
 
         mongo_client = pymongo.MongoClient(host=self.MONGO_HOST, port=self.MONGO_PORT)
         self.assertFalse(mongo_health_check(mongo_client))
+
+    def test_read_preference(self):
+        """
+        Test building the read preference from its configuration values
+        """
+        self.assertIsNone(read_preference())
+        self.assertEqual(read_preference('primary', '90'), Primary())
+        self.assertEqual(read_preference('secondaryPreferred', '90'), SecondaryPreferred(max_staleness=90))
+        with self.assertRaises(ValueError):
+            read_preference('fastest')
+
+    def test_write_concern(self):
+        """
+        Test building the write concern from its configuration values keeping the not specified base options
+        """
+        self.assertIsNone(write_concern())
+        self.assertEqual(write_concern('majority', 'true', '1000'), WriteConcern(w='majority', j=True, wtimeout=1000))
+        self.assertEqual(write_concern(w='1', base=WriteConcern(w='majority', j=True)), WriteConcern(w=1, j=True))
+
+    def test_init_replicaset(self):
+        """
+        Test the replicaset is initiated with all its members through the first one
+        """
+        with patch('pymongo.MongoClient') as client_mock:
+            self.assertTrue(init_replicaset(['0.1.2.3:1234', '0.1.2.4:1234'], 'test', LOGGER))
+            client_mock.return_value.admin.command.side_effect = Exception('already initialized')
+            self.assertFalse(init_replicaset(['0.1.2.3:1234'], 'test', LOGGER))
+
+        client_mock.assert_called_with('0.1.2.3', 1234, connect=True)
+        self.assertEqual(client_mock.return_value.admin.command.call_args_list[0][0],
+                         ('replSetInitiate', {'_id': 'test', 'members': [{'_id': 0, 'host': '0.1.2.3:1234'},
+                                                                         {'_id': 1, 'host': '0.1.2.4:1234'}]}))
+        self.assertEqual(client_mock.return_value.close.call_count, 2)
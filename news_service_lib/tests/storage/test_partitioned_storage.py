@@ -0,0 +1,254 @@
+"""
+Partitioned storage tests module
+"""
+from datetime import date, datetime
+from logging import getLogger
+from unittest import TestCase
+
+from ...storage.aggregation import Aggregation, AggregationOperation
+from ...storage.exceptions import StorageError
+from ...storage.filter import MatchFilter, RangeFilter, InFilter
+from ...storage.implementation import MemoryStorage, PartitionedStorage
+from ...storage.partition_granularity import PartitionGranularity
+from ...storage.sort_direction import SortDirection
+
+LOGGER = getLogger()
+
+
+class TestPartitionGranularity(TestCase):
+    """
+    Partition granularity test cases
+    """
+
+    def test_month(self):
+        """
+        Test the monthly partitions bounds and names
+        """
+        start = PartitionGranularity.MONTH.start(datetime(2020, 12, 31, 23, 59))
+        self.assertEqual(start, datetime(2020, 12, 1))
+        self.assertEqual(PartitionGranularity.MONTH.end(start), datetime(2021, 1, 1))
+        self.assertEqual(PartitionGranularity.MONTH.suffix(start), '2020_12')
+        self.assertEqual(PartitionGranularity.MONTH.parse('2020_12'), start)
+        self.assertIsNone(PartitionGranularity.MONTH.parse('2020_13'))
+
+    def test_week(self):
+        """
+        Test the weekly partitions start on monday and are named by their ISO year and week
+        """
+        start = PartitionGranularity.WEEK.start(date(2021, 1, 3))
+        self.assertEqual(start, datetime(2020, 12, 28))
+        self.assertEqual(PartitionGranularity.WEEK.end(start), datetime(2021, 1, 4))
+        self.assertEqual(PartitionGranularity.WEEK.suffix(start), '2020_w53')
+        self.assertEqual(PartitionGranularity.WEEK.parse('2020_w53'), start)
+        self.assertIsNone(PartitionGranularity.WEEK.parse('2020_12'))
+
+
+class TestPartitionedStorage(TestCase):
+    """
+    Partitioned storage test cases
+    """
+    ITEMS = [dict(_id=1, date=datetime(2020, 1, 10), value=5, group='a'),
+             dict(_id=2, date=datetime(2020, 1, 20), value=1, group='b'),
+             dict(_id=3, date=datetime(2020, 2, 5), value=4, group='a'),
+             dict(_id=4, date=datetime(2020, 2, 15), value=2, group='b'),
+             dict(_id=5, date=datetime(2020, 3, 1), value=3, group='a')]
+
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.partitions = dict()
+        self.storage = PartitionedStorage(self._partition_storage, LOGGER, 'news')
+
+    def _partition_storage(self, name: str) -> MemoryStorage:
+        """
+        Create the memory storage of the partition with the specified name
+
+        Args:
+            name: partition name
+
+        Returns: partition storage
+
+        """
+        self.partitions[name] = MemoryStorage(LOGGER, name=name)
+        return self.partitions[name]
+
+    def _save_items(self):
+        """
+        Save the test items
+        """
+        for item in self.ITEMS:
+            self.storage.save(dict(item))
+
+    def test_save_routes_by_date(self):
+        """
+        Test the items are saved in the partition of their date
+        """
+        self._save_items()
+
+        self.assertEqual(self.storage.partitions, ['news_2020_01', 'news_2020_02', 'news_2020_03'])
+        self.assertEqual([item['_id'] for item in self.partitions['news_2020_02'].get()], [3, 4])
+        with self.assertRaises(StorageError):
+            self.storage.save(dict(_id=6))
+
+    def test_existing_partitions(self):
+        """
+        Test the existing partitions of the storage are loaded and the other names are ignored
+        """
+        storage = PartitionedStorage(self._partition_storage, LOGGER, 'news',
+                                     partitions=['news_2020_02', 'news_2020_01', 'news_invalid', 'other_2020_01'])
+
+        self.assertEqual(storage.partitions, ['news_2020_01', 'news_2020_02'])
+
+    def test_save_many(self):
+        """
+        Test the bulk save groups the items by partition and reports the errors by their position
+        """
+        items = [dict(item) for item in self.ITEMS] + [dict(_id=6), dict(_id=1, date=datetime(2020, 1, 1))]
+
+        result = self.storage.save_many(items)
+
+        self.assertEqual(len(result.saved), 5)
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [5, 6])
+        self.assertEqual(self.storage.count(), 5)
+
+    def test_save_many_ordered(self):
+        """
+        Test the ordered bulk save stops at the first failing item across the partitions
+        """
+        items = [dict(_id=1, date=datetime(2020, 1, 1)), dict(_id=2, date=datetime(2020, 2, 1)),
+                 dict(_id=1, date=datetime(2020, 1, 2)), dict(_id=3, date=datetime(2020, 3, 1))]
+
+        result = self.storage.save_many(items, ordered=True)
+
+        self.assertEqual([item['_id'] for item in result.saved], [1, 2])
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [2, 3])
+        self.assertEqual(self.storage.partitions, ['news_2020_01', 'news_2020_02'])
+
+    def test_pruning(self):
+        """
+        Test the queries only run in the partitions which can contain the items matching the partition key filters
+        """
+        self._save_items()
+        self.partitions['news_2020_01'].get = None
+        self.partitions['news_2020_01'].count = None
+
+        items = self.storage.get([RangeFilter('date', lower=datetime(2020, 2, 1))])
+
+        self.assertEqual([item['_id'] for item in items], [3, 4, 5])
+        self.assertEqual(self.storage.count([MatchFilter('date', datetime(2020, 3, 1))]), 1)
+        self.assertEqual(self.storage.count([InFilter('date', [datetime(2020, 2, 5), datetime(2020, 3, 1)])]), 2)
+        self.assertEqual(self.storage.count([RangeFilter('date', upper=datetime(2020, 1, 1))]), 0)
+
+    def test_get_sorted_by_partition_key(self):
+        """
+        Test the items sorted by the partition key are read one partition after another
+        """
+        self._save_items()
+
+        items = self.storage.get(sort_key='date', sort_direction=SortDirection.DESC, limit=2, offset=1)
+
+        self.assertEqual([item['_id'] for item in items], [4, 3])
+
+    def test_get_merged(self):
+        """
+        Test the items sorted by other keys are merged from all the partitions
+        """
+        self._save_items()
+
+        ascending = self.storage.get(sort_key='value', sort_direction=SortDirection.ASC, limit=3, offset=1)
+        descending = self.storage.get(sort_key='value', sort_direction=SortDirection.DESC, limit=2)
+
+        self.assertEqual([item['value'] for item in ascending], [2, 3, 4])
+        self.assertEqual([item['value'] for item in descending], [5, 4])
+
+    def test_get_pages(self):
+        """
+        Test the page cursors are valid across the partitions
+        """
+        self._save_items()
+
+        first_page = list(self.storage.get(sort_key='value', limit=3))
+        cursor = self.storage.page_cursor(first_page[-1], 'value')
+        second_page = list(self.storage.get(sort_key='value', limit=3, after=cursor))
+
+        self.assertEqual([item['value'] for item in first_page + second_page], [1, 2, 3, 4, 5])
+
+    def test_get_one(self):
+        """
+        Test the first matching item is looked up in chronological order
+        """
+        self._save_items()
+
+        self.assertEqual(self.storage.get_one([MatchFilter('group', 'b')])['_id'], 2)
+        self.assertIsNone(self.storage.get_one([MatchFilter('group', 'c')]))
+
+    def test_get_many_by_key(self):
+        """
+        Test the key values are looked up in all the partitions
+        """
+        self._save_items()
+
+        items = self.storage.get_many_by_key('_id', [1, 4, 5, 7])
+
+        self.assertEqual(sorted(items), [1, 4, 5])
+
+    def test_aggregate(self):
+        """
+        Test the groups aggregated in each partition are merged
+        """
+        self._save_items()
+
+        results = self.storage.aggregate(['group'], [Aggregation(AggregationOperation.COUNT),
+                                                     Aggregation(AggregationOperation.SUM, 'value'),
+                                                     Aggregation(AggregationOperation.MIN, 'value')])
+
+        self.assertEqual(results, [dict(group='a', count=3, sum_value=12, min_value=3),
+                                   dict(group='b', count=2, sum_value=3, min_value=1)])
+        with self.assertRaises(NotImplementedError):
+            self.storage.aggregate(['group'], [Aggregation(AggregationOperation.AVG, 'value')])
+        self.assertEqual(self.storage.aggregate(['group'], [Aggregation(AggregationOperation.AVG, 'value')],
+                                                [MatchFilter('date', datetime(2020, 3, 1))]),
+                         [dict(group='a', avg_value=3)])
+
+    def test_update(self):
+        """
+        Test the updates are applied in the partitions and can not move the items to other partitions
+        """
+        self._save_items()
+
+        self.assertEqual(self.storage.update_many([MatchFilter('group', 'a')], dict(value=0)), 3)
+        self.assertEqual(self.storage.update([MatchFilter('group', 'b')], dict(value=0)), 1)
+        self.assertEqual(self.storage.count([MatchFilter('value', 0)]), 4)
+        with self.assertRaises(StorageError):
+            self.storage.update_many([], dict(date=datetime(2020, 4, 1)))
+
+    def test_delete(self):
+        """
+        Test the items are deleted from the partitions which contain them
+        """
+        self._save_items()
+
+        self.storage.delete(3)
+        deleted = self.storage.delete_many([RangeFilter('date', upper=datetime(2020, 2, 1))])
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual([item['_id'] for item in self.storage.get(sort_key='date')], [4, 5])
+
+    def test_drop_partitions(self):
+        """
+        Test the partitions older than the retention date are dropped
+        """
+        self._save_items()
+        january = self.partitions['news_2020_01']
+
+        dropped = self.storage.drop_partitions(datetime(2020, 2, 15))
+
+        self.assertEqual(dropped, ['news_2020_01'])
+        self.assertEqual(january.count(), 0)
+        self.assertEqual(self.storage.partitions, ['news_2020_02', 'news_2020_03'])
+        self.assertEqual(self.storage.count(), 3)
+
+        self.storage.drop()
+        self.assertEqual(self.storage.partitions, [])
+        self.assertEqual(self.storage.count(), 0)
@@ -0,0 +1,200 @@
+"""
+SQL session provider tests module
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from tempfile import mkstemp
+from threading import Barrier
+from time import perf_counter
+from unittest import TestCase
+
+from aiounittest import async_test
+from sqlalchemy import create_engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.pool import QueuePool
+
+from ...storage.sql import SqlSessionProvider, ReplicaStrategy
+
+LOGGER = getLogger()
+POOL_SIZE = 8
+
+
+class TestSqlSessionProvider(TestCase):
+    """
+    SQL session provider test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        file_descriptor, self.database_path = mkstemp(suffix='.db')
+        os.close(file_descriptor)
+        self.engine = create_engine(f'sqlite:///{self.database_path}', poolclass=QueuePool, pool_size=POOL_SIZE,
+                                    max_overflow=0, pool_timeout=5, connect_args={'check_same_thread': False})
+        self.session_provider = SqlSessionProvider(self.engine)
+
+    def tearDown(self):
+        """
+        Tear down test environment
+        """
+        self.engine.dispose()
+        os.remove(self.database_path)
+
+    def test_nested_session(self):
+        """
+        Test the nested contexts of the same execution context share the session
+        """
+        with self.session_provider(read_only=False) as session:
+            with self.session_provider() as nested_session:
+                self.assertIs(nested_session, session)
+                self.assertFalse(nested_session.info['read_only'])
+        self.assertIsNone(self.session_provider.current_session)
+
+    def test_write_nested_in_read_only_session(self):
+        """
+        Test a write session can not be nested in a read only session
+        """
+        with self.session_provider() as session:
+            with self.assertRaises(ValueError):
+                with self.session_provider(read_only=False):
+                    pass
+            self.assertIs(self.session_provider.current_session, session)
+        self.assertIsNone(self.session_provider.current_session)
+
+    @async_test
+    async def test_task_does_not_inherit_session(self):
+        """
+        Test a task created inside a session context gets its own session
+        """
+        async def task_session():
+            with self.session_provider() as session:
+                return session
+
+        with self.session_provider() as parent_session:
+            child_session = await asyncio.get_event_loop().create_task(task_session())
+
+            self.assertIsNot(child_session, parent_session)
+            self.assertIs(self.session_provider._session, parent_session)
+
+    @async_test
+    async def test_concurrent_tasks_full_pool_width(self):
+        """
+        Benchmark as many interleaved tasks as pool connections, each one using its own nested session
+        """
+        open_connections = list()
+
+        async def task_operation(task_index: int) -> int:
+            with self.session_provider() as session:
+                session.execute('SELECT 1')
+                await asyncio.sleep(0)
+                with self.session_provider() as nested_session:
+                    self.assertIs(nested_session, session)
+                    open_connections.append(self.engine.pool.checkedout())
+                    await asyncio.sleep(0)
+                    return session.execute('SELECT :index', dict(index=task_index)).scalar()
+
+        start = perf_counter()
+        results = await asyncio.gather(*(task_operation(task_index) for task_index in range(POOL_SIZE)))
+        LOGGER.info('%d concurrent tasks completed in %.4f seconds', POOL_SIZE, perf_counter() - start)
+
+        self.assertEqual(results, list(range(POOL_SIZE)))
+        self.assertEqual(max(open_connections), POOL_SIZE)
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+    def test_concurrent_threads_full_pool_width(self):
+        """
+        Benchmark as many threads as pool connections, each one holding its own session at the same time
+        """
+        open_connections = list()
+        barrier = Barrier(POOL_SIZE, action=lambda: open_connections.append(self.engine.pool.checkedout()), timeout=5)
+
+        def thread_operation(thread_index: int) -> int:
+            with self.session_provider() as session:
+                session.execute('SELECT 1')
+                barrier.wait()
+                with self.session_provider() as nested_session:
+                    self.assertIs(nested_session, session)
+                    return session.execute('SELECT :index', dict(index=thread_index)).scalar()
+
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+            results = list(executor.map(thread_operation, range(POOL_SIZE)))
+        LOGGER.info('%d concurrent threads completed in %.4f seconds', POOL_SIZE, perf_counter() - start)
+
+        self.assertEqual(results, list(range(POOL_SIZE)))
+        self.assertEqual(open_connections, [POOL_SIZE])
+        self.assertEqual(self.engine.pool.checkedout(), 0)
+
+
+class TestSqlSessionProviderReplicas(TestCase):
+    """
+    SQL session provider read replicas routing test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.primary = create_engine('sqlite://')
+        self.replicas = [create_engine('sqlite://'), create_engine('sqlite://')]
+
+    def test_read_only_sessions_routed_to_replicas(self):
+        """
+        Test the read only sessions are bound to the replicas in turn and the write sessions to the primary
+        """
+        session_provider = SqlSessionProvider(self.primary, replicas=self.replicas)
+
+        read_binds = list()
+        for _ in range(4):
+            with session_provider() as session:
+                read_binds.append(session.bind)
+        with session_provider(read_only=False) as session:
+            write_bind = session.bind
+        with session_provider.independent_session() as session:
+            independent_bind = session.bind
+
+        self.assertEqual(read_binds, self.replicas * 2)
+        self.assertIs(write_bind, self.primary)
+        self.assertIn(independent_bind, self.replicas)
+
+    def test_query_error_not_ejected(self):
+        """
+        Test the replica failing to execute a statement is not ejected
+        """
+        session_provider = SqlSessionProvider(self.primary, replicas=self.replicas[:1])
+
+        with self.assertRaises(OperationalError):
+            with session_provider() as session:
+                session.execute('SELECT * FROM not_existing')
+
+        with session_provider() as session:
+            self.assertIs(session.bind, self.replicas[0])
+        self.assertEqual(session_provider.replica_router.healthy_replicas(), self.replicas[:1])
+
+    def test_disconnected_replica_ejected(self):
+        """
+        Test the disconnected replica is ejected, falling back to the primary without replicas
+        """
+        session_provider = SqlSessionProvider(self.primary, replicas=self.replicas[:1])
+
+        with self.assertRaises(DBAPIError):
+            with session_provider() as session:
+                session.connection().connection.connection.close()
+                session.execute('SELECT 1')
+
+        with session_provider() as session:
+            self.assertIs(session.bind, self.primary)
+        self.assertEqual(session_provider.replica_router.healthy_replicas(), [])
+
+    def test_least_latency_replica(self):
+        """
+        Test the least latency strategy chooses the replica with the lowest smoothed latency
+        """
+        session_provider = SqlSessionProvider(self.primary, replicas=self.replicas,
+                                              replica_strategy=ReplicaStrategy.LEAST_LATENCY)
+        session_provider.replica_router.record_latency(self.replicas[0], 0.5)
+        session_provider.replica_router.record_latency(self.replicas[1], 0.1)
+
+        with session_provider() as session:
+            self.assertIs(session.bind, self.replicas[1])
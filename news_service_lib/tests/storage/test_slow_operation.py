@@ -0,0 +1,91 @@
+"""
+Slow operations instrumentation tests module
+"""
+from logging import getLogger
+from unittest import TestCase
+from unittest.mock import patch
+
+from sqlalchemy import Column, Integer, String
+from sqlalchemy.ext.declarative import declarative_base
+
+from ...storage.filter import MatchFilter, RangeFilter, Or
+from ...storage.implementation import SqlStorage
+from ...storage.slow_operation import SlowOperationHook, filter_shape
+from ...storage.sql import create_sql_engine, SqlEngineType, init_sql_db, SqlSessionProvider
+
+LOGGER = getLogger()
+BASE = declarative_base()
+
+
+class TestModel(BASE):
+    """
+    Test model
+    """
+    __tablename__ = 'test_slow'
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50))
+    value = Column(Integer)
+
+
+class TestSlowOperation(TestCase):
+    """
+    Slow operations instrumentation test cases
+    """
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        engine = create_sql_engine(SqlEngineType.SQLITE)
+        init_sql_db(BASE, engine)
+        self.storage = SqlStorage(SqlSessionProvider(engine), TestModel, LOGGER)
+        self.slow_operations = list()
+        self.storage.slow_operation_hook = SlowOperationHook(LOGGER, threshold=0.0,
+                                                             callback=self.slow_operations.append)
+
+    def test_filter_shape(self):
+        """
+        Test the filter shape describes the normalized filters without their values
+        """
+        self.assertEqual(filter_shape([MatchFilter('name', 'test'), Or(RangeFilter('value', lower=1),
+                                                                      MatchFilter('name', 'other'))]),
+                         'MatchFilter(name, value), Or(RangeFilter(value, lower), MatchFilter(name, value))')
+
+    def test_slow_operations_reported(self):
+        """
+        Test the operations over the threshold are reported with their duration, filters shape and returned items
+        """
+        self.storage.save(TestModel(name='first', value=1))
+        self.storage.save(TestModel(name='second', value=2))
+        with patch('news_service_lib.storage.slow_operation.elasticapm.capture_span') as capture_span_mock:
+            items = list(self.storage.get([RangeFilter('value', lower=0)], sort_key='value'))
+
+        self.assertEqual(len(items), 2)
+        self.assertEqual([slow_operation.operation for slow_operation in self.slow_operations],
+                         ['save', 'save', 'get'])
+        slow_get = self.slow_operations[-1]
+        self.assertEqual(slow_get.target, 'test_slow')
+        self.assertEqual(slow_get.filter_shape, 'RangeFilter(value, lower)')
+        self.assertEqual(slow_get.sort_key, 'value')
+        self.assertEqual(slow_get.returned, 2)
+        self.assertIsNone(slow_get.examined)
+        self.assertGreater(slow_get.duration, 0)
+        self.assertEqual(capture_span_mock.call_args[0][0], 'test_slow.get')
+        self.assertEqual(capture_span_mock.call_args[1]['duration'], slow_get.duration)
+
+    def test_fast_operations_not_reported(self):
+        """
+        Test the operations under the threshold are not reported
+        """
+        self.storage.slow_operation_hook.threshold = 60.0
+        self.storage.save(TestModel(name='first', value=1))
+        self.assertIsNotNone(self.storage.get_one([MatchFilter('name', 'first')]))
+        self.assertEqual(self.slow_operations, [])
+
+    def test_explain(self):
+        """
+        Test the explain returns the database plan of the query
+        """
+        plan = self.storage.explain([MatchFilter('name', 'first')], sort_key='value', limit=1)
+        self.assertTrue(plan)
+        self.assertIn('detail', plan[0])
@@ -44,3 +44,12 @@ class TestSQLFilterParser(TestCase):
         str_parsed_filters = [str(parsed_filter) for parsed_filter in parsed_filters]
         self.assertIn(str(TestEntity.test_int > test_lower), str_parsed_filters)
         self.assertIn(str(TestEntity.test_int < test_upper), str_parsed_filters)
+
+    def test_parse_in(self):
+        """
+        Test the parse in returns the IN binary expression, expanding the bound parameter placeholder
+        """
+        parsed_filters = SQLFilterParser.parse_in(TestEntity.test, ('first', 'second'))
+        self.assertEqual(str(parsed_filters[0]), str(TestEntity.test.in_(('first', 'second'))))
+        parsed_filters = SQLFilterParser.parse_in(TestEntity.test, SQLFilterParser.parameter('members'))
+        self.assertTrue(parsed_filters[0].right.expanding)
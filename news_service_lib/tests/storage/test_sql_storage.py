@@ -1,11 +1,21 @@
+from datetime import datetime, timedelta
 from logging import getLogger
 from unittest import TestCase
+from unittest.mock import MagicMock, patch
 
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String, inspect
+from sqlalchemy.dialects import mysql
 from sqlalchemy.ext.declarative import declarative_base
 
 from news_service_lib.storage.sql import SqlSessionProvider
+from ...storage.aggregation import Aggregation, AggregationOperation, GroupKey
+from ...storage.exceptions import StorageIntegrityError
+from ...storage.filter import RangeFilter, MatchFilter, InFilter, Or, Not
+from ...storage.index_spec import IndexSpec
 from ...storage.implementation import SqlStorage
+from ...storage.implementation.sql_storage import UPSERT_UPDATE_MARKER
+from ...storage.resume_token_store import MemoryResumeTokenStore
+from ...storage.sort_direction import SortDirection
 from ...storage.sql import create_sql_engine, SqlEngineType, init_sql_db
 
 LOGGER = getLogger()
@@ -19,10 +29,20 @@ class TestModel(BASE):
     __tablename__ = 'test'
 
     id = Column(Integer, primary_key=True)
-    test1 = Column(String(50))
+    test1 = Column(String(50), unique=True)
     test2 = Column(String(50))
 
 
+class DatedModel(BASE):
+    """
+    Test model with a datetime column
+    """
+    __tablename__ = 'dated'
+
+    id = Column(Integer, primary_key=True)
+    date = Column(DateTime)
+
+
 class TestSQLStorage(TestCase):
     """
     SQL Storage interface test cases
@@ -36,8 +56,8 @@ class TestSQLStorage(TestCase):
         """
         test_engine = create_sql_engine(SqlEngineType.SQLITE)
         init_sql_db(BASE, test_engine)
-        session_provider = SqlSessionProvider(test_engine)
-        self.client = SqlStorage(session_provider, TestModel, LOGGER)
+        self.session_provider = SqlSessionProvider(test_engine)
+        self.client = SqlStorage(self.session_provider, TestModel, LOGGER)
 
     def test_save(self):
         """
@@ -70,3 +90,372 @@ class TestSQLStorage(TestCase):
         self.assertIsNotNone(model_instance)
         self.assertEqual(model_instance.test1, self.TEST_1)
         self.assertEqual(model_instance.test2, self.TEST_2)
+
+    def test_get_many_by_key(self):
+        """
+        Test the entities are loaded by key value in chunks with the in filter
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2=f'value_{index}') for index in range(5)])
+
+        model_instances = self.client.get_many_by_key('test1', ['test_4', 'test_0', 'test_9', 'test_4', 'test_2'],
+                                                      fields=['test2'], chunk_size=2)
+        self.assertEqual(set(model_instances), {'test_0', 'test_2', 'test_4'})
+        self.assertEqual(model_instances['test_2'].test2, 'value_2')
+        self.assertEqual(len(list(self.client.get([InFilter('test1', ['test_1', 'test_3'])]))), 2)
+
+    def test_get_boolean_filters(self):
+        """
+        Test the or and not filters select the expected entities
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2=f'value_{index}') for index in range(5)])
+
+        model_instances = self.client.get([Or(MatchFilter('test1', 'test_0'), RangeFilter('test1', lower='test_1')),
+                                           Not(MatchFilter('test2', 'value_3'))])
+        self.assertEqual([model_instance.test1 for model_instance in model_instances], ['test_0', 'test_2', 'test_4'])
+
+    def test_save_many(self):
+        """
+        Test the bulk save persists all the instances
+        """
+        result = self.client.save_many([TestModel(test1='test_11', test2='test_12'),
+                                        TestModel(test1='test_21', test2='test_22')])
+        self.assertTrue(result.success)
+        self.assertEqual(len(result.saved), 2)
+        self.assertEqual(len(list(self.client.get())), 2)
+
+    def test_save_many_errors(self):
+        """
+        Test the bulk save reports the failing instances without aborting the batch
+        """
+        result = self.client.save_many([TestModel(test1=self.TEST_1, test2='test_12'),
+                                        TestModel(test1=self.TEST_1, test2='test_22'),
+                                        TestModel(test1=self.TEST_2, test2='test_32')])
+        self.assertEqual(len(result.saved), 2)
+        self.assertEqual(len(result.errors), 1)
+        self.assertEqual(result.errors[0].index, 1)
+        self.assertIsInstance(result.errors[0].error, StorageIntegrityError)
+        self.assertEqual(len(list(self.client.get())), 2)
+
+    def test_save_many_ordered(self):
+        """
+        Test the ordered bulk save stops at the first failing instance
+        """
+        result = self.client.save_many([TestModel(test1=self.TEST_1, test2='test_12'),
+                                        TestModel(test1=self.TEST_1, test2='test_22'),
+                                        TestModel(test1=self.TEST_2, test2='test_32')], ordered=True)
+        self.assertEqual(len(result.saved), 1)
+        self.assertEqual([bulk_error.index for bulk_error in result.errors], [1, 2])
+        self.assertEqual(len(list(self.client.get())), 1)
+
+    def test_get_pages(self):
+        """
+        Test querying the instances in pages using the page cursor of the last instance of each page
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2=f'test_{index % 3}') for index in range(7)])
+
+        pages = []
+        after = None
+        while True:
+            page = list(self.client.get(sort_key='test2', sort_direction=SortDirection.DESC, limit=3, after=after))
+            if not page:
+                break
+            pages.append([model_instance.test1 for model_instance in page])
+            after = self.client.page_cursor(page[-1], sort_key='test2')
+
+        self.assertEqual(pages, [['test_5', 'test_2', 'test_4'], ['test_1', 'test_6', 'test_3'], ['test_0']])
+
+    def test_get_pages_datetime(self):
+        """
+        Test the page cursors keep the sub millisecond datetimes so the pages do not repeat their last instance
+        """
+        client = SqlStorage(self.session_provider, DatedModel, LOGGER)
+        start = datetime(2020, 1, 1, 12, 0, 0, 100)
+        client.save_many([DatedModel(date=start + timedelta(microseconds=index * 10)) for index in range(5)])
+
+        pages = []
+        after = None
+        for _ in range(5):
+            page = list(client.get(sort_key='date', limit=2, after=after))
+            if not page:
+                break
+            pages.append([model_instance.id for model_instance in page])
+            after = client.page_cursor(page[-1], sort_key='date')
+
+        self.assertEqual(pages, [[1, 2], [3, 4], [5]])
+
+    def test_get_limit_offset(self):
+        """
+        Test querying the instances with limit and offset
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2='test') for index in range(5)])
+
+        model_instances = list(self.client.get(limit=2, offset=2))
+
+        self.assertEqual([model_instance.test1 for model_instance in model_instances], ['test_2', 'test_3'])
+
+    def test_get_fields(self):
+        """
+        Test querying the instances loading only the specified fields
+        """
+        self.client.save(TestModel(test1=self.TEST_1, test2=self.TEST_2))
+
+        model_instance = self.client.get_one(fields=['test1'])
+
+        self.assertEqual(inspect(model_instance).unloaded, {'test2'})
+        self.assertEqual(model_instance.test1, self.TEST_1)
+
+    def test_get_streaming(self):
+        """
+        Test the get streams the instances in chunks without capturing the operations run while iterating
+        """
+        self.client = SqlStorage(self.session_provider, TestModel, LOGGER, chunk_size=2)
+        self.client.save_many([TestModel(test1=f'test_{index}', test2='test') for index in range(5)])
+
+        model_instances = self.client.get(sort_key='test1', sort_direction=SortDirection.DESC)
+        first_instance = next(model_instances)
+        self.client.save(TestModel(test1='test_5', test2='test'))
+        remaining_instances = list(model_instances)
+
+        self.assertEqual(first_instance.test1, 'test_4')
+        self.assertEqual([model_instance.test1 for model_instance in remaining_instances],
+                         ['test_3', 'test_2', 'test_1', 'test_0'])
+        self.assertEqual(len(list(self.client.get())), 6)
+
+    def test_get_in_session(self):
+        """
+        Test the get inside an open session context reads the instances written in it
+        """
+        self.client.save(TestModel(test1=self.TEST_1, test2=self.TEST_2))
+
+        with self.session_provider(read_only=False) as session:
+            session.add(TestModel(test1='test_11', test2=self.TEST_2))
+            model_instances = list(self.client.get(sort_key='test1'))
+
+        self.assertEqual([model_instance.test1 for model_instance in model_instances], [self.TEST_1, 'test_11'])
+        self.assertIsNone(self.session_provider.current_session)
+        self.assertEqual(self.client.count(), 2)
+
+    def test_get_filters_reused(self):
+        """
+        Test the same filters can be reused between queries
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2='test') for index in range(5)])
+        filters = [RangeFilter('test1', lower='test_0', upper='test_4')]
+
+        first_instances = list(self.client.get(filters))
+        second_instances = list(self.client.get(filters))
+
+        self.assertEqual(len(first_instances), 3)
+        self.assertEqual(len(second_instances), 3)
+
+    def test_ensure_indexes(self):
+        """
+        Test ensuring the indexes creates the declared table indexes only once
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, indexes=[IndexSpec.of('test2', 'test1')])
+
+        client.ensure_indexes()
+        client.ensure_indexes()
+
+        existing_fields = [index.fields for index in client.existing_indexes()]
+        self.assertEqual(existing_fields.count(('test2', 'test1')), 1)
+        self.assertIn(('id',), existing_fields)
+
+    def test_advise_indexes(self):
+        """
+        Test the index advisor reports the indexes needed by the queries not covered by the existing ones
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, index_advisor=True)
+
+        client.get_one([MatchFilter('test1', self.TEST_1)])
+        list(client.get([MatchFilter('test2', self.TEST_2)], sort_key='id'))
+
+        missing_indexes = client.advise_indexes()
+
+        self.assertEqual([index.fields for index in missing_indexes], [('test2', 'id')])
+
+    def test_count_exists(self):
+        """
+        Test counting and checking the existence of the instances which match the filters
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2='test') for index in range(5)])
+
+        self.assertEqual(self.client.count(), 5)
+        self.assertEqual(self.client.count([RangeFilter('test1', lower='test_0', upper='test_4')]), 3)
+        self.assertTrue(self.client.exists([MatchFilter('test1', 'test_3')]))
+        self.assertFalse(self.client.exists([MatchFilter('test1', 'test_9')]))
+
+    def test_aggregate(self):
+        """
+        Test aggregating the instances grouped by key and by key buckets
+        """
+        self.client.save_many([TestModel(id=index + 1, test1=f'test_{index}', test2=f'group_{index % 2}')
+                               for index in range(5)])
+
+        groups = self.client.aggregate(['test2'], [Aggregation(AggregationOperation.COUNT),
+                                                   Aggregation(AggregationOperation.SUM, 'id')])
+        buckets = self.client.aggregate([GroupKey('id', bucket_size=2)], [Aggregation(AggregationOperation.MAX, 'id',
+                                                                                       name='last')],
+                                        filters=[RangeFilter('id', lower=1)])
+
+        self.assertEqual(groups, [dict(test2='group_0', count=3, sum_id=9), dict(test2='group_1', count=2, sum_id=6)])
+        self.assertEqual(buckets, [dict(id=2, last=3), dict(id=4, last=5)])
+
+    def test_aggregate_negative_buckets(self):
+        """
+        Test the negative key values are grouped in the bucket below them
+        """
+        self.client.save_many([TestModel(id=index, test1=f'test_{index}') for index in range(-3, 3)])
+
+        buckets = self.client.aggregate([GroupKey('id', bucket_size=2)], [Aggregation(AggregationOperation.COUNT)])
+
+        self.assertEqual(buckets, [dict(id=-4, count=1), dict(id=-2, count=2), dict(id=0, count=2),
+                                   dict(id=2, count=1)])
+
+    def test_delete_many_update(self):
+        """
+        Test deleting and updating the instances which match the filters
+        """
+        self.client.save_many([TestModel(test1=f'test_{index}', test2='test') for index in range(5)])
+
+        updated_one = self.client.update([MatchFilter('test2', 'test')], dict(test2='updated'))
+        updated_many = self.client.update_many([RangeFilter('test1', lower='test_2')], dict(test2='updated'))
+        deleted = self.client.delete_many([MatchFilter('test2', 'updated')])
+
+        self.assertEqual(updated_one, 1)
+        self.assertEqual(updated_many, 2)
+        self.assertEqual(deleted, 3)
+        self.assertEqual(sorted(instance.test1 for instance in self.client.get()), ['test_1', 'test_2'])
+
+    def test_drop(self):
+        """
+        Test dropping the storage drops its table
+        """
+        self.client.save(TestModel(test1=self.TEST_1, test2=self.TEST_2))
+
+        self.client.drop()
+
+        self.assertNotIn(TestModel.__tablename__, inspect(self.session_provider.engine).get_table_names())
+
+    def test_upsert(self):
+        """
+        Test upserting the instances inserts the new ones and updates the existing ones by key
+        """
+        inserted = self.client.upsert(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        updated = self.client.upsert(TestModel(test1=self.TEST_1, test2='updated'), ['test1'])
+        result = self.client.upsert_many([TestModel(test1=self.TEST_1, test2='updated_again'),
+                                          TestModel(test1='test_3', test2=self.TEST_2)], ['test1'])
+
+        self.assertTrue(inserted)
+        self.assertFalse(updated)
+        self.assertEqual(len(result.saved), 2)
+        self.assertEqual(sorted((instance.test1, instance.test2) for instance in self.client.get()),
+                         [(self.TEST_1, 'updated_again'), ('test_3', self.TEST_2)])
+
+    def test_upsert_null(self):
+        """
+        Test upserting an instance with a column set to null updates the column, leaving the not set columns unchanged
+        """
+        self.client.upsert(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        self.client.upsert(TestModel(test1=self.TEST_1), ['test1'])
+        self.assertEqual(self.client.get_one().test2, self.TEST_2)
+
+        self.client.upsert(TestModel(test1=self.TEST_1, test2=None), ['test1'])
+        self.assertIsNone(self.client.get_one().test2)
+
+    def test_upsert_mysql(self):
+        """
+        Test the MySQL upserts are single statements telling the inserts from the updates by the last insert id
+        """
+        session_provider = MagicMock()
+        session_provider.engine.dialect = mysql.dialect()
+        session = session_provider.return_value.__enter__.return_value
+        client = SqlStorage(session_provider, TestModel, LOGGER)
+
+        session.execute.return_value.lastrowid = 1
+        inserted = client.upsert(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        statement = str(session.execute.call_args[0][0].compile(dialect=mysql.dialect()))
+        self.assertTrue(inserted)
+        self.assertEqual(session.execute.call_count, 1)
+        self.assertTrue(statement.startswith('INSERT INTO test'))
+        self.assertIn('ON DUPLICATE KEY UPDATE', statement)
+        self.assertIn('test2 = VALUES(test2)', statement)
+        self.assertIn('last_insert_id', statement)
+
+        session.execute.reset_mock()
+        session.execute.return_value.lastrowid = UPSERT_UPDATE_MARKER
+        updated = client.upsert(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        duplicated = client.save_if_absent(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        statement = str(session.execute.call_args[0][0].compile(dialect=mysql.dialect()))
+        self.assertFalse(updated)
+        self.assertFalse(duplicated)
+        self.assertEqual(session.execute.call_count, 2)
+        self.assertNotIn('IGNORE', statement)
+        self.assertNotIn('VALUES(test2)', statement)
+
+    def test_save_if_absent(self):
+        """
+        Test saving if absent only inserts the instances not already stored
+        """
+        inserted = self.client.save_if_absent(TestModel(test1=self.TEST_1, test2=self.TEST_2), ['test1'])
+        duplicated = self.client.save_if_absent(TestModel(test1=self.TEST_1, test2='updated'), ['test1'])
+
+        self.assertTrue(inserted)
+        self.assertFalse(duplicated)
+        self.assertEqual([(instance.test1, instance.test2) for instance in self.client.get()],
+                         [(self.TEST_1, self.TEST_2)])
+
+    def test_consume_inserts(self):
+        """
+        Test the inserts after the checkpoint are consumed in chunks, resuming from the last not processed
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, chunk_size=2, poll_interval=0.001)
+        resume_store = MemoryResumeTokenStore()
+        client.save(TestModel(test1='before'))
+        resume_store.save('test', 1)
+        for name in ('first', 'second', 'third'):
+            client.save(TestModel(test1=name))
+
+        inserts = client.consume_inserts(fields=['test1'], resume_store=resume_store)
+        self.assertEqual([next(inserts).test1 for _ in range(3)], ['first', 'second', 'third'])
+        inserts.close()
+
+        self.assertEqual(resume_store.load('test'), 3)
+        self.assertEqual(next(client.consume_inserts(resume_store=resume_store)).test1, 'third')
+
+    def test_consume_inserts_from_now(self):
+        """
+        Test the consumers without checkpoint consume the inserts done after they start
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, poll_interval=0.001)
+        client.save(TestModel(test1='before'))
+        with patch('news_service_lib.storage.implementation.sql_storage.sleep',
+                   side_effect=lambda _: client.save(TestModel(test1='after'))):
+            self.assertEqual(next(client.consume_inserts()).test1, 'after')
+
+    def test_consume_inserts_adaptive_interval(self):
+        """
+        Test the poll interval doubles on each empty poll up to the maximum
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, poll_interval=0.1, max_poll_interval=0.5)
+        with patch('news_service_lib.storage.implementation.sql_storage.sleep',
+                   side_effect=[None, None, None, InterruptedError]) as sleep_mock:
+            with self.assertRaises(InterruptedError):
+                next(client.consume_inserts())
+        self.assertEqual([call[0][0] for call in sleep_mock.call_args_list], [0.1, 0.2, 0.4, 0.5])
+
+    def test_consume_insert_batches(self):
+        """
+        Test the inserts are consumed in batches bounded by size, checkpointing the processed ones
+        """
+        client = SqlStorage(self.session_provider, TestModel, LOGGER, poll_interval=0.001, insert_column='test2')
+        resume_store = MemoryResumeTokenStore()
+        resume_store.save('test', '0')
+        for index in range(1, 4):
+            client.save(TestModel(test1=f'test_{index}', test2=str(index)))
+
+        batches = client.consume_insert_batches(batch_size=2, batch_window=0.01, resume_store=resume_store)
+        self.assertEqual([entity.test1 for entity in next(batches)], ['test_1', 'test_2'])
+        self.assertEqual([entity.test1 for entity in next(batches)], ['test_3'])
+        self.assertEqual(resume_store.load('test'), '2')
+        self.assertEqual(client.ensure_indexes(), ['ix_test_test2'])
@@ -4,10 +4,12 @@ SQL utils tests module
 from unittest import TestCase
 from unittest.mock import patch
 
-from sqlalchemy import Column, Integer, inspect, String
+from sqlalchemy import Column, Integer, inspect, String, create_engine
+from sqlalchemy.exc import TimeoutError
 from sqlalchemy.ext.declarative import declarative_base
 
-from news_service_lib.storage.sql import create_sql_engine, SqlEngineType, init_sql_db, sql_health_check
+from news_service_lib.storage.sql import create_sql_engine, SqlEngineType, init_sql_db, sql_health_check, \
+    sql_pool_stats, SqlPoolOptions, SqlPoolMonitor, MonitoredQueuePool
 
 BASE = declarative_base()
 
@@ -111,3 +113,46 @@ class TestSQLUtils(TestCase):
                                    port=self.test_port,
                                    database=self.test_database)
         self.assertFalse(sql_health_check(engine))
+
+    def test_pool_options_from_config(self):
+        """
+        Test the pool options are read from the configuration section values and mapped to the engine arguments
+        """
+        pool_options = SqlPoolOptions.from_config(dict(user=self.test_user, pool_size='20', max_overflow='5',
+                                                       pool_pre_ping='true', pool_timeout='2.5',
+                                                       statement_timeout='3000'))
+
+        self.assertEqual(pool_options, SqlPoolOptions(pool_size=20, max_overflow=5, pool_pre_ping=True,
+                                                      pool_timeout=2.5, statement_timeout=3000))
+        mysql_arguments = pool_options.engine_arguments(SqlEngineType.MYSQL)
+        self.assertEqual(mysql_arguments['poolclass'], MonitoredQueuePool)
+        self.assertEqual(mysql_arguments['pool_size'], 20)
+        self.assertEqual(mysql_arguments['connect_args'], dict(init_command='SET SESSION max_execution_time=3000'))
+        self.assertEqual(pool_options.engine_arguments(SqlEngineType.SQLITE), dict(pool_pre_ping=True))
+
+    def test_pool_stats(self):
+        """
+        Test the pool stats report the checked out connections, the checkout waits and the connect latencies
+        """
+        engine = create_sql_engine(SqlEngineType.SQLITE, pool_pre_ping='true')
+        sql_health_check(engine)
+        self.assertEqual(sql_pool_stats(engine).connects, 1)
+
+        monitor = SqlPoolMonitor()
+        queue_engine = create_engine('sqlite://', poolclass=MonitoredQueuePool, monitor=monitor, pool_size=1,
+                                     max_overflow=1, pool_timeout=0.01)
+        first_connection = queue_engine.connect()
+        second_connection = queue_engine.connect()
+        self.assertEqual(monitor.stats(queue_engine.pool).waits, 0)
+        with self.assertRaises(TimeoutError):
+            queue_engine.connect()
+        stats = monitor.stats(queue_engine.pool)
+        first_connection.close()
+        second_connection.close()
+
+        self.assertEqual(stats.checked_out, 2)
+        self.assertEqual(stats.overflow, 1)
+        self.assertEqual(stats.waits, 1)
+        self.assertEqual(sum(stats.wait_histogram.values()), 1)
+        self.assertGreaterEqual(stats.wait_total, 0.01)
+        self.assertEqual(monitor.stats(queue_engine.pool).checked_out, 0)
@@ -0,0 +1,128 @@
+"""
+Watcher hub tests module
+"""
+from logging import getLogger
+from threading import Event, Thread
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+from ...storage.implementation import MemoryStorage
+from ...storage.resume_token_store import MemoryResumeTokenStore
+from ...storage.watcher_hub import WatcherHub, Subscription, SlowConsumerPolicy, insert_key
+
+LOGGER = getLogger()
+
+
+class TestWatcherHub(TestCase):
+    """
+    Watcher hub test cases
+    """
+
+    def setUp(self):
+        """
+        Set up test environment
+        """
+        self.storage = MemoryStorage(LOGGER, name='test')
+        self.resume_store = MemoryResumeTokenStore()
+        self.resume_store.save('test', 0)
+
+    def test_fan_out(self):
+        """
+        Test all the subscribers get the inserts consumed from a single stream
+        """
+        with patch.object(self.storage, 'consume_inserts', wraps=self.storage.consume_inserts) as consume_mock:
+            hub = WatcherHub(self.storage, LOGGER, resume_store=self.resume_store)
+            first_subscription = hub.subscribe()
+            second_subscription = hub.subscribe()
+            for name in ('first', 'second'):
+                self.storage.save(dict(name=name))
+
+            self.assertEqual([first_subscription.get(5)['name'] for _ in range(2)], ['first', 'second'])
+            self.assertEqual([second_subscription.get(5)['name'] for _ in range(2)], ['first', 'second'])
+            hub.close()
+        consume_mock.assert_called_once()
+
+    def test_attach_detach(self):
+        """
+        Test the subscribers attach and detach without reopening the stream
+        """
+        with patch.object(self.storage, 'consume_inserts', wraps=self.storage.consume_inserts) as consume_mock:
+            hub = WatcherHub(self.storage, LOGGER, resume_store=self.resume_store)
+            with hub.subscribe() as first_subscription:
+                self.storage.save(dict(name='first'))
+                self.assertEqual(first_subscription.get(5)['name'], 'first')
+            self.assertEqual(hub.subscribers, 0)
+
+            second_subscription = hub.subscribe()
+            self.storage.save(dict(name='second'))
+            self.assertEqual(second_subscription.get(5)['name'], 'second')
+            self.assertIsNone(first_subscription.get(0.01))
+            hub.close()
+        consume_mock.assert_called_once()
+        self.assertEqual(list(second_subscription), [])
+
+    def test_stream_reopened(self):
+        """
+        Test the stream is reopened when it fails
+        """
+        stop = Event()
+
+        def consume_inserts(**_):
+            """
+            Fail the first stream and block the second one after its insert
+            """
+            if watcher_mock.consume_inserts.call_count == 1:
+                raise ConnectionError('stream lost')
+            yield dict(_id=1)
+            stop.wait(5)
+
+        watcher_mock = MagicMock()
+        watcher_mock.consume_inserts.side_effect = consume_inserts
+        hub = WatcherHub(watcher_mock, LOGGER, retry_delay=0.001)
+        subscription = hub.subscribe()
+        self.assertEqual(subscription.get(5), dict(_id=1))
+        self.assertEqual(watcher_mock.consume_inserts.call_count, 2)
+        hub.close()
+        stop.set()
+
+    def test_drop_policy(self):
+        """
+        Test the inserts published to a full queue are dropped with the drop policy
+        """
+        subscription = Subscription(MagicMock(), 2, SlowConsumerPolicy.DROP, insert_key)
+        for identifier in range(3):
+            subscription.publish(dict(_id=identifier))
+
+        self.assertEqual(subscription.dropped, 1)
+        self.assertEqual([subscription.get(0), subscription.get(0), subscription.get(0)],
+                         [dict(_id=0), dict(_id=1), None])
+
+    def test_coalesce_policy(self):
+        """
+        Test the inserts with the same key replace the pending one and the oldest is dropped from a full queue
+        """
+        subscription = Subscription(MagicMock(), 2, SlowConsumerPolicy.COALESCE, insert_key)
+        subscription.publish(dict(_id=1, value=1))
+        subscription.publish(dict(_id=2, value=1))
+        subscription.publish(dict(_id=1, value=2))
+        self.assertEqual(subscription.pending, 2)
+        subscription.publish(dict(_id=3, value=1))
+
+        self.assertEqual(subscription.dropped, 2)
+        self.assertEqual([subscription.get(0), subscription.get(0)], [dict(_id=2, value=1), dict(_id=3, value=1)])
+
+    def test_block_policy(self):
+        """
+        Test the publisher waits for the consumer when the queue is full with the block policy
+        """
+        subscription = Subscription(MagicMock(), 1, SlowConsumerPolicy.BLOCK, insert_key)
+        subscription.publish(dict(_id=1))
+        publisher_thread = Thread(target=subscription.publish, args=(dict(_id=2),))
+        publisher_thread.start()
+        publisher_thread.join(0.05)
+        self.assertTrue(publisher_thread.is_alive())
+
+        self.assertEqual(subscription.get(0), dict(_id=1))
+        publisher_thread.join(5)
+        self.assertEqual(subscription.get(0), dict(_id=2))
+        self.assertEqual(subscription.dropped, 0)